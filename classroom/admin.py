@@ -1,21 +1,85 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
 
-from .models import Course, Student, Subject, SubjectGroup, Teacher
+from .conflicts import check_teachers
+from .imports import import_people
+from .models import Course, Delivery, Notification, Student, Subject, SubjectGroup, Teacher
+from .pagination import EstimatedCountPaginator
+from .timetable import schedule
+
+
+class CourseAdminForm(forms.ModelForm):
+    class Meta:
+        model = Course
+        fields = "__all__"
+
+    def clean(self):
+        cleaned_data = super().clean()
+        teachers = cleaned_data.get("teachers")
+
+        if teachers and "batch" in cleaned_data:
+            # The instance only gets the new values after clean()
+            course = Course(
+                pk=self.instance.pk,
+                batch=cleaned_data["batch"],
+                active=cleaned_data.get("active", False),
+            )
+            try:
+                check_teachers(course, [teacher.pk for teacher in teachers])
+            except ValidationError as error:
+                self.add_error(None, error)
+
+        return cleaned_data
 
 
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
-    list_display = ("name", "batch", "classroom", "division", "active")
+    form = CourseAdminForm
+    list_display = (
+        "name",
+        "batch",
+        "classroom",
+        "division",
+        "student_count",
+        "teacher_count",
+        "active",
+    )
     list_filter = ("active", "created")
     search_fields = ("name",)
     date_hierarchy = "created"
     ordering = ("name",)
+    actions = ("assign_slots",)
+
+    @admin.action(
+        description="Assign classrooms and batches to the selected courses",
+        permissions=("change",),
+    )
+    def assign_slots(self, request, queryset):
+        """Solves the selected active courses, the other active courses stay where they are"""
+
+        solution, moved = schedule(queryset.filter(active=True).values_list("pk", flat=True))
+        self.message_user(
+            request,
+            "Placed %s courses, %s of them moved." % (len(solution.assignments), moved),
+            messages.SUCCESS,
+        )
+        if solution.unassigned:
+            self.message_user(
+                request,
+                "%s courses found no free classroom and batch and kept theirs."
+                % len(solution.unassigned),
+                messages.WARNING,
+            )
 
 
 @admin.register(Subject)
 class SubjectAdmin(admin.ModelAdmin):
-    list_display = ("name", "active")
-    list_filter = ("active", "created")
+    list_display = ("name", "requires_lab", "active")
+    list_filter = ("active", "requires_lab", "created")
     search_fields = ("name",)
     date_hierarchy = "created"
     ordering = ("name",)
@@ -28,8 +92,89 @@ class SubjectGroupAdmin(admin.ModelAdmin):
     ordering = ("name",)
 
 
+class ImportForm(forms.Form):
+    file = forms.FileField(help_text="A CSV with a header row, eg. an export of this table.")
+
+
+class PersonAdmin(admin.ModelAdmin):
+    """
+    Base admin of the people tables, which run into tens of thousands of rows.
+
+    The user is fetched in the same query and the total count is skipped or
+    estimated. Searching for digits is an exact lookup on the indexed DNI and
+    anything else matches the start of the names, which the prefix indexes
+    of migration 0002 serve, instead of scanning with a leading wildcard.
+    """
+
+    list_filter = ("active", "created")
+    list_select_related = ("user",)
+    search_fields = ("^last_name", "^first_name")
+    raw_id_fields = ("user",)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    change_list_template = "admin/classroom/person_change_list.html"
+    # The kind of people of classroom.imports
+    import_kind = None
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path(
+                "import/",
+                self.admin_site.admin_view(self.import_view),
+                name="%s_%s_import" % info,
+            ),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        """
+        Imports a CSV upload in bulk. An admin action can't take a file, so this
+        is a view of its own, linked from the changelist.
+        """
+
+        if not (self.has_add_permission(request) and self.has_change_permission(request)):
+            raise PermissionDenied
+
+        result = None
+        form = ImportForm(request.POST or None, request.FILES or None)
+        if form.is_valid():
+            result = import_people(self.import_kind, form.cleaned_data["file"].file)
+            if not result.errors:
+                self.message_user(
+                    request,
+                    "Imported %(processed)s rows: %(created)s created, %(updated)s updated."
+                    % result.as_dict(),
+                    messages.SUCCESS,
+                )
+                info = self.model._meta.app_label, self.model._meta.model_name
+                return redirect("admin:%s_%s_changelist" % info)
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Import %s" % self.model._meta.verbose_name_plural,
+            "form": form,
+            "result": result,
+            # A big file with a systematic mistake would fill the page
+            "errors": result.errors[:100] if result else [],
+        }
+        return TemplateResponse(request, "admin/classroom/import_people.html", context)
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+
+        if term.isdecimal():
+            # A DNI has 8 digits, anything much longer can't match
+            if len(term) > 10:
+                return queryset.none(), False
+            return queryset.filter(dni=int(term)), False
+
+        return super().get_search_results(request, queryset, search_term)
+
+
 @admin.register(Student)
-class StudentAdmin(admin.ModelAdmin):
+class StudentAdmin(PersonAdmin):
+    import_kind = "students"
     list_display = (
         "first_name",
         "last_name",
@@ -43,13 +188,11 @@ class StudentAdmin(admin.ModelAdmin):
         "permission_for_photo",
         "user",
     )
-    list_filter = ("active", "created")
-    search_fields = ("first_name", "last_name", "dni")
-    raw_id_fields = ("user",)
 
 
 @admin.register(Teacher)
-class TeacherAdmin(admin.ModelAdmin):
+class TeacherAdmin(PersonAdmin):
+    import_kind = "teachers"
     list_display = (
         "first_name",
         "last_name",
@@ -61,9 +204,27 @@ class TeacherAdmin(admin.ModelAdmin):
         "email",
         "phone_number",
         "certified",
+        "course_count",
         "active",
         "user",
     )
-    list_filter = ("active", "created")
-    search_fields = ("first_name", "last_name", "dni")
-    raw_id_fields = ("user",)
+
+
+class DeliveryInline(admin.TabularInline):
+    model = Delivery
+    fields = ("email", "status", "attempts", "next_attempt", "sent", "error")
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ("subject", "created")
+    search_fields = ("subject",)
+    date_hierarchy = "created"
+    readonly_fields = ("created",)
+    inlines = (DeliveryInline,)
@@ -0,0 +1,207 @@
+"""
+Daily attendance of the courses.
+
+A row per student per day would be hundreds of millions of rows a year. The
+attendance of a course on a day is one ``Attendance`` row instead, with two
+bitmaps over the roster of the course: who is enrolled that day and who is
+present. ``RosterPosition`` gives every student of a course a bit, the next
+one free the first time the student is marked, and keeps it after the
+student leaves so the older bitmaps stay readable. A course of 30 students
+takes 8 bytes a day.
+
+The reports load the bitmaps of a date range in one query and count the
+bits with NumPy over a days by students matrix, instead of a query or a
+Python loop per student or per day.
+"""
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Max
+
+from .models import Attendance, Course, RosterPosition
+
+CourseStudents = Course.students.through
+
+
+def pack(flags):
+    """Returns the bitmap of an array of booleans, bit ``n`` for ``flags[n]``"""
+
+    return np.packbits(np.asarray(flags, dtype=bool), bitorder="little").tobytes()
+
+
+def unpack(bitmaps, size):
+    """Returns a boolean matrix of ``size`` columns, one row per bitmap"""
+
+    width = (size + 7) // 8
+    # Rosters grow, the bitmaps of the earlier days are shorter
+    data = b"".join(bytes(bitmap).ljust(width, b"\0")[:width] for bitmap in bitmaps)
+    matrix = np.frombuffer(data, dtype=np.uint8).reshape(len(bitmaps), width)
+    return np.unpackbits(matrix, axis=1, count=size, bitorder="little").astype(bool)
+
+
+def get_positions(course):
+    """
+    Returns the roster position of every student of the course, giving one
+    to the students who have none yet, the positions of the students enrolled
+    now and the size of the roster, ie. the next free position. Call it in a
+    transaction which locks the course.
+    """
+
+    positions = dict(
+        RosterPosition.objects.filter(course=course).values_list("student_id", "position")
+    )
+    enrolled = list(
+        CourseStudents.objects.filter(course=course)
+        .order_by("student_id")
+        .values_list("student_id", flat=True)
+    )
+
+    # The positions of deleted students go with them, but their bits stay in
+    # the bitmaps, which are as wide as the roster was
+    size = Attendance.objects.filter(course=course).aggregate(size=Max("size"))["size"] or 0
+    size = max(size, max(positions.values(), default=-1) + 1)
+
+    new = [student_id for student_id in enrolled if student_id not in positions]
+    if new:
+        created = RosterPosition.objects.bulk_create(
+            [
+                RosterPosition(course=course, student_id=student_id, position=position)
+                for position, student_id in enumerate(new, size)
+            ]
+        )
+        positions.update((position.student_id, position.position) for position in created)
+        size += len(new)
+
+    return positions, [positions[student_id] for student_id in enrolled], size
+
+
+def get_day(course, date):
+    """
+    Returns the attendance of the course on the day, locked, with the bitmaps
+    as arrays over today's roster, and the roster positions
+    """
+
+    # Locks the course, the roster positions of two requests can't clash
+    Course.objects.select_for_update().filter(pk=course.pk).exists()
+    positions, enrolled, size = get_positions(course)
+
+    attendance = Attendance.objects.select_for_update().filter(course=course, date=date).first()
+    if attendance is None:
+        attendance = Attendance(course=course, date=date)
+        present = np.zeros(size, dtype=bool)
+    else:
+        present = unpack([attendance.present], size)[0]
+
+    is_enrolled = np.zeros(size, dtype=bool)
+    is_enrolled[enrolled] = True
+
+    return attendance, is_enrolled, present, positions
+
+
+def save_day(attendance, enrolled, present):
+    attendance.size = len(enrolled)
+    attendance.enrolled = pack(enrolled)
+    # Who left the course isn't present any more
+    attendance.present = pack(present & enrolled)
+    attendance.save()
+    return attendance
+
+
+def mark_class(course, date, present=True, exceptions=()):
+    """
+    Marks the whole class present, or absent, on the day, but the students
+    in ``exceptions`` the other way round
+    """
+
+    with transaction.atomic():
+        attendance, enrolled, _, positions = get_day(course, date)
+        flags = enrolled.copy() if present else np.zeros(len(enrolled), dtype=bool)
+        flipped = [positions[student] for student in exceptions if student in positions]
+        flags[flipped] = not present
+        return save_day(attendance, enrolled, flags)
+
+
+def mark_students(course, date, students, present=True):
+    """
+    Marks some students present, or absent, on the day, leaving the rest of
+    the class as it was marked, absent on a new day
+    """
+
+    with transaction.atomic():
+        attendance, enrolled, flags, positions = get_day(course, date)
+        flags[[positions[student] for student in students if student in positions]] = present
+        return save_day(attendance, enrolled, flags)
+
+
+def get_attendances(filters, start=None, end=None):
+    attendances = Attendance.objects.filter(**filters).order_by("date")
+    if start is not None:
+        attendances = attendances.filter(date__gte=start)
+    if end is not None:
+        attendances = attendances.filter(date__lte=end)
+    return attendances
+
+
+def get_daily_rates(courses, start=None, end=None):
+    """
+    Returns the attendance of every course and day from ``start`` to ``end``,
+    included: the students enrolled and present, and the share present
+    """
+
+    rows = list(
+        get_attendances({"course__in": courses}, start, end).values_list(
+            "course_id", "date", "size", "enrolled", "present"
+        )
+    )
+    if not rows:
+        return []
+
+    size = max(row[2] for row in rows)
+    enrolled = unpack([row[3] for row in rows], size).sum(axis=1)
+    present = unpack([row[4] for row in rows], size).sum(axis=1)
+    rates = np.divide(present, enrolled, out=np.zeros(len(rows)), where=enrolled > 0)
+
+    return [
+        {
+            "course": course_id,
+            "date": date,
+            "enrolled": int(enrolled[index]),
+            "present": int(present[index]),
+            "rate": round(float(rates[index]), 4),
+        }
+        for index, (course_id, date, *_) in enumerate(rows)
+    ]
+
+
+def get_absence_rates(course, start=None, end=None):
+    """
+    Returns the days every student of the course was enrolled from ``start``
+    to ``end``, included, the days absent and the share absent, by student id
+    """
+
+    rows = list(
+        get_attendances({"course": course}, start, end).values_list("size", "enrolled", "present")
+    )
+    if not rows:
+        return {}
+
+    positions = dict(
+        RosterPosition.objects.filter(course=course).values_list("position", "student_id")
+    )
+    size = max(max(row[0] for row in rows), max(positions, default=-1) + 1)
+    enrolled = unpack([row[1] for row in rows], size)
+    present = unpack([row[2] for row in rows], size)
+
+    days = enrolled.sum(axis=0)
+    absences = (enrolled & ~present).sum(axis=0)
+    rates = np.divide(absences, days, out=np.zeros(size), where=days > 0)
+
+    return {
+        student_id: {
+            "days": int(days[position]),
+            "absences": int(absences[position]),
+            "rate": round(float(rates[position]), 4),
+        }
+        for position, student_id in positions.items()
+        if days[position]
+    }
@@ -0,0 +1,146 @@
+"""
+Per-teacher cache of the course list.
+
+For every teacher we keep the summaries of their courses, newest first, which
+is all the course list page needs. They live in their own cache alias,
+``settings.COURSE_CACHE_ALIAS``, a local memory LRU by default which can be
+pointed at a shared backend through the environment.
+
+Keys carry a random version token per teacher. Invalidating swaps the token
+rather than deleting the data, so a request which read the database before a
+change committed can only ever write under the old, unreachable, version.
+The receivers in ``classroom.signals`` invalidate precisely the teachers whose
+list changed.
+
+The same alias holds the template fragments of the course pages, see
+``classroom.templatetags.course_cache``. Their keys carry the course's
+``updated`` timestamp, which changes when the course row is saved, and a
+version token per course which is swapped when its teachers or students, or
+one of them, change. Hits and misses are counted in the cache too.
+"""
+
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import get_language
+
+from .models import Course
+from .pagination import ORDERING
+
+VERSION_KEY = "courses:teacher:%s:version"
+DATA_KEY = "courses:teacher:%s:%s:%s"
+COURSE_VERSION_KEY = "courses:course:%s:version"
+FRAGMENT_KEY = "courses:fragment:%s:%s:%s:%s:%s"
+FRAGMENT_STATS_KEY = "courses:fragments:%s"
+
+
+def get_cache():
+    return caches[settings.COURSE_CACHE_ALIAS]
+
+
+def get_version(cache, key):
+    """Returns the current version token under ``key``, creating one if needed"""
+
+    version = cache.get(key)
+
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+
+    return version
+
+
+def course_summary(course):
+    """Returns the plain, cacheable, data shown for a course in the list"""
+
+    return {
+        "id": course.id,
+        "name": course.name,
+        "batch": course.get_batch_display(),
+        "classroom": course.get_classroom_display(),
+        "division": course.division,
+        "subject": str(course.subject) if course.subject_id else "",
+        "student_count": course.student_count,
+        "teacher_count": course.teacher_count,
+        "updated": course.updated,
+        "url": course.get_absolute_url(),
+    }
+
+
+def teacher_courses_queryset(teacher_id):
+    return Course.objects.filter(teachers=teacher_id).select_related("subject").order_by(*ORDERING)
+
+
+def get_teacher_courses(teacher_id):
+    """Returns the course summaries of a teacher, newest first"""
+
+    cache = get_cache()
+    version = get_version(cache, VERSION_KEY % teacher_id)
+    key = DATA_KEY % (teacher_id, version, get_language())
+    summaries = cache.get(key)
+
+    if summaries is None:
+        summaries = [course_summary(course) for course in teacher_courses_queryset(teacher_id)]
+        cache.set(key, summaries)
+
+    return summaries
+
+
+def invalidate_teachers(teacher_ids):
+    """Moves the given teachers to a new version so their lists get rebuilt"""
+
+    if teacher_ids:
+        get_cache().set_many({VERSION_KEY % pk: uuid.uuid4().hex for pk in teacher_ids}, None)
+
+
+def invalidate_courses(course_ids):
+    """Moves the given courses to a new version so their page fragments get rendered again"""
+
+    if course_ids:
+        get_cache().set_many(
+            {COURSE_VERSION_KEY % pk: uuid.uuid4().hex for pk in course_ids}, None
+        )
+
+
+def fragment_key(course, name, vary_on=()):
+    """Returns the cache key of the ``name`` fragment of a course page"""
+
+    cache = get_cache()
+    version = get_version(cache, COURSE_VERSION_KEY % course.pk)
+    # Things like the page number, hashed as they could be any string
+    vary = hashlib.md5(
+        ":".join([get_language() or ""] + [str(value) for value in vary_on]).encode()
+    ).hexdigest()
+
+    return FRAGMENT_KEY % (course.pk, course.updated.timestamp(), version, name, vary)
+
+
+def count_fragment(hit):
+    cache = get_cache()
+    key = FRAGMENT_STATS_KEY % ("hits" if hit else "misses")
+    try:
+        cache.incr(key)
+    except ValueError:
+        # incr doesn't create missing keys, add does but only once
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def fragment_stats():
+    """Returns the fragment cache hits and misses counted so far, and the hit ratio"""
+
+    cache = get_cache()
+    hits = cache.get(FRAGMENT_STATS_KEY % "hits", 0)
+    misses = cache.get(FRAGMENT_STATS_KEY % "misses", 0)
+
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / (hits + misses), 3) if hits + misses else None,
+    }
+
+
+def reset_fragment_stats():
+    get_cache().delete_many([FRAGMENT_STATS_KEY % "hits", FRAGMENT_STATS_KEY % "misses"])
@@ -0,0 +1,120 @@
+"""
+Double booking detection.
+
+An active course occupies its classroom, and each of its teachers, for its
+batch. Two active courses in the same (classroom, batch) slot, or sharing a
+teacher in the same batch, are a conflict.
+
+``check_room`` and ``check_teachers`` validate one change by looking its slots
+up in the database, through the (classroom, batch) index and the teacher index
+of the enrollments. ``Course.clean`` and the course admin form always run them.
+With ``settings.STRICT_BOOKINGS`` on, the receivers in ``classroom.signals``
+also run them on every save and teacher assignment, whatever the caller.
+
+``OccupancyIndex`` maps every slot to the courses in it, built in one pass over
+the courses and their teachers, so a whole school report is a scan of the
+slots rather than a comparison of every pair of courses.
+"""
+
+from collections import defaultdict
+from typing import NamedTuple
+
+from django.core.exceptions import ValidationError
+from django.utils.translation import gettext as _
+
+from .models import Course
+
+CourseTeachers = Course.teachers.through
+
+
+class Conflict(NamedTuple):
+    """Courses booked in the same ``slot``, a (classroom, batch) or (teacher_id, batch)"""
+
+    kind: str
+    slot: tuple
+    course_ids: list
+
+
+class OccupancyIndex:
+    def __init__(self):
+        self.rooms = defaultdict(list)
+        self.teachers = defaultdict(list)
+
+    @classmethod
+    def build(cls, chunk_size=2000):
+        """Indexes every active course, streaming only the columns the slots need"""
+
+        index = cls()
+        courses = Course.objects.filter(active=True).order_by()
+        for pk, classroom, batch in courses.values_list("pk", "classroom", "batch").iterator(
+            chunk_size=chunk_size
+        ):
+            index.rooms[classroom, batch].append(pk)
+
+        links = CourseTeachers.objects.filter(course__active=True).order_by()
+        for teacher_id, course_id, batch in links.values_list(
+            "teacher_id", "course_id", "course__batch"
+        ).iterator(chunk_size=chunk_size):
+            index.teachers[teacher_id, batch].append(course_id)
+
+        return index
+
+    def conflicts(self):
+        for kind, slots in (("room", self.rooms), ("teacher", self.teachers)):
+            for slot, course_ids in slots.items():
+                if len(course_ids) > 1:
+                    yield Conflict(kind, slot, course_ids)
+
+
+def check_room(course):
+    """Raises a ValidationError if another active course has the classroom in the batch"""
+
+    if not course.active:
+        return
+
+    taken = (
+        Course.objects.filter(active=True, classroom=course.classroom, batch=course.batch)
+        .exclude(pk=course.pk)
+        .values_list("name", flat=True)[:1]
+    )
+    if taken:
+        message = _("%(classroom)s is already booked in the %(batch)s batch by %(name)s.") % {
+            "classroom": course.get_classroom_display(),
+            "batch": course.get_batch_display().lower(),
+            "name": taken[0],
+        }
+        raise ValidationError({"classroom": message})
+
+
+def check_teachers(course, teacher_ids):
+    """Raises a ValidationError if one of the teachers has another active course in the batch"""
+
+    if not (course.active and teacher_ids):
+        return
+
+    busy = (
+        CourseTeachers.objects.filter(
+            teacher_id__in=teacher_ids, course__active=True, course__batch=course.batch
+        )
+        .exclude(course_id=course.pk)
+        .values_list("teacher__first_name", "teacher__last_name", "course__name")[:1]
+    )
+    if busy:
+        first_name, last_name, name = busy[0]
+        message = _("%(teacher)s already teaches %(name)s in the %(batch)s batch.") % {
+            "teacher": "%s %s" % (first_name, last_name),
+            "name": name,
+            "batch": course.get_batch_display().lower(),
+        }
+        raise ValidationError({"teachers": message})
+
+
+def check_teacher_courses(teacher_id, course_ids):
+    """Raises a ValidationError if assigning a teacher to ``course_ids`` double books them"""
+
+    courses = list(Course.objects.filter(pk__in=course_ids, active=True))
+    batches = [course.batch for course in courses]
+    for course in courses:
+        if batches.count(course.batch) > 1:
+            raise ValidationError(_("Two of the courses are in the same batch."))
+        check_teachers(course, [teacher_id])
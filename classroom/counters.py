@@ -0,0 +1,128 @@
+"""
+Enrollment counters: ``Course.student_count``, ``Course.teacher_count`` and
+``Teacher.course_count``.
+
+The receivers in ``classroom.signals`` keep them up to date as links are added,
+removed or cleared and as people and courses are deleted. Counters are moved
+with ``UPDATE ... SET count = count + n``, never read and written back, so
+concurrent changes can't undo each other. Writes which skip the signals, like
+the bulk seeding, must be followed by ``repair_counters``, also run by
+``manage.py repair_counters``.
+"""
+
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Course, Student, Teacher
+
+CourseStudents = Course.students.through
+CourseTeachers = Course.teachers.through
+
+
+def apply_changes(model, field, changes):
+    """Adds ``changes``, a mapping of pk to a positive or negative delta, to ``field``"""
+
+    # One UPDATE per distinct delta, usually one for the whole change
+    by_delta = defaultdict(list)
+    for pk, delta in changes.items():
+        if delta:
+            by_delta[delta].append(pk)
+
+    for delta, pks in by_delta.items():
+        model.objects.filter(pk__in=pks).update(**{field: F(field) + delta})
+
+
+def links_changed(through, links, sign):
+    """
+    Counts ``links``, (course_id, person_id) pairs of ``through``, as added when
+    ``sign`` is 1 or removed when it's -1.
+    """
+
+    links = list(links)
+    courses = Counter(course_id for course_id, _ in links)
+
+    if through is CourseStudents:
+        apply_changes(Course, "student_count", {pk: sign * n for pk, n in courses.items()})
+    else:
+        apply_changes(Course, "teacher_count", {pk: sign * n for pk, n in courses.items()})
+        teachers = Counter(teacher_id for _, teacher_id in links)
+        apply_changes(Teacher, "course_count", {pk: sign * n for pk, n in teachers.items()})
+
+
+def get_person_field(through):
+    return "student_id" if through is CourseStudents else "teacher_id"
+
+
+def existing_links(through, **filters):
+    return through.objects.filter(**filters).values_list("course_id", get_person_field(through))
+
+
+def m2m_links_changed(through, instance, action, reverse, pk_set):
+    """Counts a change of the students or teachers of courses, as sent by m2m_changed"""
+
+    person_field = get_person_field(through)
+    own, others = ("course_id", person_field) if not reverse else (person_field, "course_id")
+
+    if action == "post_add":
+        # pk_set only holds the links which were actually created
+        links = [(instance.pk, pk) if not reverse else (pk, instance.pk) for pk in pk_set]
+        links_changed(through, links, 1)
+    elif action == "pre_remove":
+        # pk_set holds whatever was asked for, only count the links which exist.
+        # This runs in the transaction of the delete.
+        filters = {own: instance.pk, others + "__in": pk_set}
+        links_changed(through, existing_links(through, **filters), -1)
+    elif action == "pre_clear":
+        links_changed(through, existing_links(through, **{own: instance.pk}), -1)
+
+
+# The links which disappear with a row, and whose counters on the other side must go down
+DELETED_LINKS = {
+    Course: (CourseTeachers, "course_id"),
+    Student: (CourseStudents, "student_id"),
+    Teacher: (CourseTeachers, "teacher_id"),
+}
+
+
+def row_deleted(instance):
+    through, field = DELETED_LINKS[type(instance)]
+    links_changed(through, existing_links(through, **{field: instance.pk}), -1)
+
+
+def link_count(through, field):
+    """A subquery counting the links of ``through`` per ``field``, for the outer row"""
+
+    counts = (
+        through.objects.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+COUNTERS = (
+    (Course, "student_count", CourseStudents, "course_id"),
+    (Course, "teacher_count", CourseTeachers, "course_id"),
+    (Teacher, "course_count", CourseTeachers, "teacher_id"),
+)
+
+
+def repair_counters(log=None):
+    """
+    Recomputes every counter from the links, one UPDATE per counter for the
+    rows which are off. Returns the number of rows fixed per counter.
+    """
+
+    fixed = {}
+    for model, field, through, link_field in COUNTERS:
+        actual = link_count(through, link_field)
+        wrong = model.objects.annotate(actual=actual).exclude(**{field: F("actual")})
+        fixed["%s.%s" % (model.__name__, field)] = count = wrong.update(**{field: actual})
+        if log:
+            log(model, field, count)
+
+    return fixed
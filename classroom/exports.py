@@ -0,0 +1,93 @@
+"""
+Streaming exports of people and course rosters as CSV or JSON lines.
+
+Rows are read with ``values_list().iterator(chunk_size=...)``, a server side
+cursor on PostgreSQL, and written out one line at a time, so memory use stays
+flat however many rows there are. Used by the export views and by the
+export_people management command.
+"""
+
+import csv
+import json
+
+from .models import Course, Student, Teacher
+
+PERSON_COLUMNS = (
+    "id",
+    "first_name",
+    "last_name",
+    "dni",
+    "email",
+    "phone_number",
+    "address1",
+    "address2",
+    "city",
+    "active",
+)
+
+PARENT_COLUMNS = (
+    "father_first_name",
+    "father_last_name",
+    "father_dni",
+    "father_email",
+    "mother_first_name",
+    "mother_last_name",
+    "mother_dni",
+    "mother_email",
+)
+
+STUDENT_COLUMNS = PERSON_COLUMNS + ("permission_for_photo",) + PARENT_COLUMNS
+TEACHER_COLUMNS = PERSON_COLUMNS + ("certified",)
+ROSTER_COLUMNS = ("id", "first_name", "last_name", "dni", "email") + PARENT_COLUMNS
+
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """A file-like object which hands back what's written to it, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(columns, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def jsonl_lines(columns, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), default=str) + "\n"
+
+
+FORMATS = {
+    "csv": (csv_lines, "text/csv"),
+    "jsonl": (jsonl_lines, "application/x-ndjson"),
+}
+
+
+def get_dataset(name, course=None):
+    """Returns the (queryset, columns) of the ``students``, ``teachers`` or ``roster`` dataset"""
+
+    if name == "students":
+        return Student.objects.all(), STUDENT_COLUMNS
+    if name == "teachers":
+        return Teacher.objects.all(), TEACHER_COLUMNS
+    if name == "roster" and isinstance(course, Course):
+        return course.students.all(), ROSTER_COLUMNS
+
+    raise ValueError("Unknown dataset %r" % name)
+
+
+def export_lines(queryset, columns, fmt, chunk_size=CHUNK_SIZE):
+    """
+    Returns an iterator over the lines of the export. Nothing is queried until
+    the first row is needed, so a CSV header goes out straight away.
+    """
+
+    write_lines, _ = FORMATS[fmt]
+    rows = queryset.order_by("last_name", "first_name", "id").values_list(*columns)
+
+    return write_lines(columns, rows.iterator(chunk_size=chunk_size))
@@ -0,0 +1,197 @@
+"""
+Gradebook: the marks of the students of a course, per term.
+
+``save_grades`` writes a course's marks for a term at once, with a single
+``INSERT ... ON CONFLICT DO UPDATE`` on PostgreSQL and SQLite, so a whole
+school entering its end of term marks doesn't cost a query per student, nor
+a read of the marks entered before.
+
+The statistics of courses and subject groups load the marks in one query
+and compute every group at once with NumPy: the marks are sorted by group
+then value, and the sums, percentiles and distributions come from offsets
+into that sorted array rather than a loop per course or per mark.
+"""
+
+import numpy as np
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from .models import Course, Grade
+
+CourseStudents = Course.students.through
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+UPSERT_FIELDS = ("course", "student", "term", "value", "updated")
+CONFLICT_FIELDS = ("course", "term", "student")
+UPDATE_FIELDS = ("value", "updated")
+
+
+def clean_grades(course, term, grades):
+    """
+    Returns ``grades``, marks by student id, as decimals, or raises a
+    ValidationError for marks out of range and students not in the course
+    """
+
+    if term not in dict(Grade.TERM_CHOICES):
+        raise ValidationError(_("Invalid term %(term)s."), params={"term": term})
+
+    field = Grade._meta.get_field("value")
+    errors, cleaned = [], {}
+    for student_id, value in grades.items():
+        try:
+            cleaned[student_id] = field.clean(value, None)
+        except ValidationError as error:
+            errors.extend(error.messages)
+
+    enrolled = set(
+        CourseStudents.objects.filter(course=course, student_id__in=list(grades)).values_list(
+            "student_id", flat=True
+        )
+    )
+    if len(enrolled) < len(grades):
+        errors.append(_("Some students aren't enrolled in the course."))
+
+    if errors:
+        raise ValidationError(errors)
+
+    return cleaned
+
+
+def upsert(grades):
+    """Inserts ``grades``, or updates the marks of the ones which exist, in one statement"""
+
+    opts = Grade._meta
+    quote = connection.ops.quote_name
+    fields = [opts.get_field(name) for name in UPSERT_FIELDS]
+    row = "(%s)" % ", ".join(["%s"] * len(fields))
+    sql = "INSERT INTO %s (%s) VALUES %%s ON CONFLICT (%s) DO UPDATE SET %s" % (
+        quote(opts.db_table),
+        ", ".join(quote(field.column) for field in fields),
+        ", ".join(quote(opts.get_field(name).column) for name in CONFLICT_FIELDS),
+        ", ".join(
+            "%s = EXCLUDED.%s" % (quote(column), quote(column))
+            for column in (opts.get_field(name).column for name in UPDATE_FIELDS)
+        ),
+    )
+
+    # Only splits on SQLite with more marks than parameters allowed, ie. 199
+    batch_size = connection.ops.bulk_batch_size(fields, grades)
+    with connection.cursor() as cursor:
+        for start in range(0, len(grades), batch_size):
+            batch = grades[start : start + batch_size]
+            params = [
+                field.get_db_prep_save(getattr(grade, field.attname), connection)
+                for grade in batch
+                for field in fields
+            ]
+            cursor.execute(sql % ", ".join([row] * len(batch)), params)
+
+
+def save_grades(course, term, grades):
+    """
+    Stores the marks, by student id, of the course for the term. The marks
+    of the students not in ``grades`` stay as they were.
+    """
+
+    now = timezone.now()
+    objs = [
+        Grade(course=course, student_id=student_id, term=term, value=value, updated=now)
+        for student_id, value in clean_grades(course, term, grades).items()
+    ]
+    if not objs:
+        return 0
+
+    if connection.vendor in ("postgresql", "sqlite"):
+        upsert(objs)
+    else:
+        with transaction.atomic():
+            Grade.objects.filter(
+                course=course, term=term, student_id__in=[obj.student_id for obj in objs]
+            ).delete()
+            Grade.objects.bulk_create(objs)
+
+    return len(objs)
+
+
+def describe(keys, values):
+    """
+    Returns the statistics of ``values`` grouped by ``keys``, two sequences
+    of the same length, by key
+    """
+
+    if not len(values):
+        return {}
+
+    labels, first, codes = np.unique(
+        np.array([str(key) for key in keys]), return_index=True, return_inverse=True
+    )
+    values = np.asarray(values, dtype=float)
+    order = np.lexsort((values, codes))
+    codes, values = codes[order], values[order]
+    counts = np.bincount(codes, minlength=len(labels))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    means = np.add.reduceat(values, starts) / counts
+    deviations = np.sqrt(np.add.reduceat((values - means[codes]) ** 2, starts) / counts)
+
+    # Linear interpolation between the closest ranks, like np.percentile
+    percentiles = {}
+    for percentile in PERCENTILES:
+        position = starts + (counts - 1) * percentile / 100
+        low = np.floor(position).astype(int)
+        high = np.ceil(position).astype(int)
+        percentiles[percentile] = values[low] + (values[high] - values[low]) * (position - low)
+
+    # One bin per point of the scale, the maximum mark goes in the last one
+    bins = np.clip(np.floor(values).astype(int), Grade.MIN_VALUE, Grade.MAX_VALUE - 1)
+    distribution = np.zeros((len(labels), Grade.MAX_VALUE - Grade.MIN_VALUE), dtype=int)
+    np.add.at(distribution, (codes, bins - Grade.MIN_VALUE), 1)
+
+    return {
+        keys[first[index]]: {
+            "count": int(counts[index]),
+            "mean": round(float(means[index]), 2),
+            "std": round(float(deviations[index]), 2),
+            "min": float(values[starts[index]]),
+            "max": float(values[starts[index] + counts[index] - 1]),
+            "median": round(float(percentiles[50][index]), 2),
+            "percentiles": {
+                percentile: round(float(results[index]), 2)
+                for percentile, results in percentiles.items()
+            },
+            "distribution": distribution[index].tolist(),
+        }
+        for index in range(len(labels))
+    }
+
+
+def get_grades(term=None, **filters):
+    grades = Grade.objects.filter(**filters)
+    if term is not None:
+        grades = grades.filter(term=term)
+    return grades.order_by()
+
+
+def get_course_statistics(courses=None, term=None):
+    """Returns the statistics of the marks of every course, all of them by default"""
+
+    filters = {} if courses is None else {"course__in": courses}
+    rows = list(get_grades(term, **filters).values_list("course_id", "value"))
+    return describe([row[0] for row in rows], [row[1] for row in rows])
+
+
+def get_group_statistics(groups=None, term=None):
+    """
+    Returns the statistics of the marks of every subject group, all of them
+    by default. A mark counts for every group of the subject of its course.
+    """
+
+    if groups is None:
+        filters = {"course__subject__groups__isnull": False}
+    else:
+        filters = {"course__subject__groups__in": groups}
+    rows = list(get_grades(term, **filters).values_list("course__subject__groups", "value"))
+    return describe([row[0] for row in rows], [row[1] for row in rows])
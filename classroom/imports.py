@@ -0,0 +1,279 @@
+"""
+Bulk import of students and teachers from CSV.
+
+The file is read one row at a time and handled in batches. Every row of a batch
+is validated against the model fields, ``Person.phone_regex`` included, then
+people already known are found by DNI with a single query per batch. New people
+get their users and rows bulk created, known ones are bulk updated, each batch
+in its own transaction. Rows which don't validate are reported by line number
+and skipped.
+
+New people get a user named after their kind and DNI, ie. ``students-30111222``.
+A row whose username is already taken, by a user left from a deleted person or
+anyone else, is reported rather than linked to that user. A batch which still
+conflicts with the database, ie. with a concurrent import, is rolled back and
+all its rows reported.
+
+The columns are the model field names, the same as the exports'. ``dni`` and
+the names are required, ``id``, ``user``, the timestamps and the fields which
+aren't editable, like ``Teacher.course_count``, are ignored. Known people only
+get the columns of the file updated, new ones are rejected if a column they
+need is missing.
+"""
+
+import csv
+import io
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, models, transaction
+
+from users.cache import invalidate_users
+
+from .models import Student, Teacher
+from .search import index_people
+from .signals import people_changed
+from .statistics import tracking
+
+KINDS = {
+    "students": Student,
+    "teachers": Teacher,
+}
+
+IGNORED_FIELDS = {"id", "user", "created", "updated"}
+TRUE_VALUES = {"true", "t", "1", "yes", "y"}
+BATCH_SIZE = 1000
+
+
+def get_import_fields(model):
+    # Not the fields the app keeps itself, like the enrollment counters
+    return [
+        field
+        for field in model._meta.concrete_fields
+        if field.name not in IGNORED_FIELDS and not field.auto_created and field.editable
+    ]
+
+
+class ImportResult:
+    """Counts of what an import did, along with the errors of every rejected row"""
+
+    def __init__(self):
+        self.processed = 0
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.errors = []
+
+    def add_error(self, line, messages):
+        self.errors.append((line, messages))
+
+    def as_dict(self):
+        return {
+            "processed": self.processed,
+            "created": self.created,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "errors": len(self.errors),
+        }
+
+
+class PeopleImporter:
+    def __init__(self, kind, batch_size=BATCH_SIZE, log=None):
+        self.model = KINDS[kind]
+        self.kind = kind
+        self.batch_size = batch_size
+        self.log = log
+        self.fields = []
+        self.result = ImportResult()
+        self.seen_dnis = set()
+        # An unusable password, computed once instead of once per user
+        self.password = make_password(None)
+
+    def run(self, lines):
+        """Imports the CSV ``lines``, any iterable of text lines, and returns the ImportResult"""
+
+        reader = csv.DictReader(lines)
+        columns = set(reader.fieldnames or ())
+        missing = {"dni", "first_name", "last_name"} - columns
+        if missing:
+            self.result.add_error(1, {"__all__": ["Missing columns: %s" % ", ".join(missing)]})
+            return self.result
+
+        # Only the columns in the file are imported, the others are left as they are
+        self.fields = [field for field in get_import_fields(self.model) if field.name in columns]
+        names = {field.name for field in self.fields}
+        self.skipped = {field.name for field in self.model._meta.fields} - names
+
+        batch = []
+        # Line 1 is the header
+        for line, row in enumerate(reader, start=2):
+            batch.append((line, row))
+            if len(batch) == self.batch_size:
+                self.import_batch(batch)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+
+        return self.result
+
+    def clean_row(self, row):
+        """Returns a validated, unsaved, model instance or raises ValidationError"""
+
+        values = {}
+        for field in self.fields:
+            raw = (row.get(field.name) or "").strip()
+            if not raw:
+                if field.null:
+                    values[field.name] = None
+                continue
+            if isinstance(field, models.BooleanField):
+                raw = raw.lower() in TRUE_VALUES
+            values[field.name] = raw
+
+        instance = self.model(**values)
+        instance.clean_fields(exclude=self.skipped)
+
+        return instance
+
+    def import_batch(self, batch):
+        people = {}
+        for line, row in batch:
+            self.result.processed += 1
+            try:
+                person = self.clean_row(row)
+            except ValidationError as error:
+                self.result.add_error(line, error.message_dict)
+                continue
+            if person.dni in self.seen_dnis:
+                message = "DNI %s is repeated in the file." % person.dni
+                self.result.add_error(line, {"dni": [message]})
+                continue
+            self.seen_dnis.add(person.dni)
+            people[person.dni] = (line, person)
+
+        try:
+            with transaction.atomic():
+                existing = {
+                    person.dni: person
+                    for person in self.model.objects.filter(dni__in=list(people))
+                }
+                created = self.get_created(people, existing)
+                updated = self.update(existing, people)
+                self.create(created)
+                # Bulk writes don't send the signals which keep the search index in sync
+                index_people(created + updated)
+        except IntegrityError as error:
+            message = "Not imported, the batch conflicts with the database: %s" % error
+            reported = {line for line, _ in self.result.errors}
+            for line, _ in people.values():
+                if line not in reported:
+                    self.result.add_error(line, {"__all__": [message]})
+            return
+
+        self.result.created += len(created)
+        self.result.updated += len(updated)
+        self.result.unchanged += len(existing) - len(updated)
+
+        if self.log:
+            self.log(self.result)
+
+    def get_created(self, people, existing):
+        """
+        Returns the new people, those which also validate without the columns
+        missing from the file, ie. whose fields all have a default.
+        """
+
+        created = []
+        imported = {field.name for field in self.fields} | IGNORED_FIELDS
+        for dni, (line, person) in people.items():
+            if dni in existing:
+                continue
+            try:
+                person.clean_fields(exclude=imported)
+            except ValidationError as error:
+                self.result.add_error(line, error.message_dict)
+                continue
+            created.append(person)
+
+        # Never link a new person to someone else's user
+        taken = set(
+            get_user_model()
+            .objects.filter(username__in=[self.get_username(person) for person in created])
+            .values_list("username", flat=True)
+        )
+        available = []
+        for person in created:
+            username = self.get_username(person)
+            if username in taken:
+                line, _ = people[person.dni]
+                message = "The username %s is taken by another user." % username
+                self.result.add_error(line, {"dni": [message]})
+            else:
+                available.append(person)
+
+        return available
+
+    def get_username(self, person):
+        return "%s-%s" % (self.kind, person.dni)
+
+    def update(self, existing, people):
+        updated = []
+        # bulk_update builds a CASE per field and row, so unchanged rows and
+        # fields are left out of it
+        changed = set()
+
+        for dni, person in existing.items():
+            _, imported = people[dni]
+            fields = {
+                field.attname
+                for field in self.fields
+                if getattr(person, field.attname) != getattr(imported, field.attname)
+            }
+            if fields:
+                for name in fields:
+                    setattr(person, name, getattr(imported, name))
+                changed |= fields
+                updated.append(person)
+
+        if updated:
+            # bulk_update sends no signals, so the statistics are moved around it
+            with tracking(self.model, [person.pk for person in updated]):
+                self.model.objects.bulk_update(updated, changed, batch_size=self.batch_size)
+            # The rosters showing them, and their profiles cached with their users
+            people_changed(self.model, [person.pk for person in updated])
+            invalidate_users([person.user_id for person in updated])
+        return updated
+
+    def create(self, people):
+        """Bulk creates a user for every new person, then the people"""
+
+        User = get_user_model()
+        usernames = {person.dni: self.get_username(person) for person in people}
+        User.objects.bulk_create(
+            [
+                User(
+                    username=usernames[person.dni],
+                    email=person.email,
+                    first_name=person.first_name,
+                    last_name=person.last_name,
+                    password=self.password,
+                )
+                for person in people
+            ],
+            batch_size=self.batch_size,
+        )
+        user_ids = dict(
+            User.objects.filter(username__in=usernames.values()).values_list("username", "id")
+        )
+
+        for person in people:
+            person.user_id = user_ids[usernames[person.dni]]
+        self.model.objects.bulk_create(people, batch_size=self.batch_size)
+
+
+def import_people(kind, file, batch_size=BATCH_SIZE, log=None):
+    """Imports a CSV of ``kind`` people from a binary file, ie. an upload"""
+
+    lines = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    return PeopleImporter(kind, batch_size=batch_size, log=log).run(lines)
@@ -0,0 +1,149 @@
+"""Benchmarks the sync and async course pages under concurrent load"""
+
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from classroom.management.commands.benchmark import percentile
+from classroom.models import Teacher
+
+
+class Command(BaseCommand):
+    """
+    Fires concurrent requests at the course list and detail pages, the sync
+    views through Django's WSGI handler from a pool of threads, like a threaded
+    WSGI server, and their async twins through the ASGI handler from one event
+    loop, like an ASGI server. Reports requests per second and latency
+    percentiles of each as JSON.
+
+    Everything runs in process, so the numbers compare the handlers rather than
+    servers. Local SQLite answers in microseconds, --latency adds a sleep to
+    every query to stand in for a database across the network, which is where
+    async pays off. Needs some data, see setup_test_data.
+    """
+
+    help = "Compares sync WSGI and async ASGI throughput of the course pages"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("-n", "--requests", type=int, default=200, help="Requests per page.")
+        parser.add_argument(
+            "-c", "--concurrency", type=int, default=20, help="Requests in flight at once."
+        )
+        parser.add_argument(
+            "-l", "--latency", type=float, default=0.0, help="Milliseconds added to every query."
+        )
+        parser.add_argument("-o", "--output", type=str, help="Write the JSON report to a file.")
+
+    def handle(self, *args, **kwargs):
+        teacher = Teacher.objects.filter(course__isnull=False).select_related("user").first()
+        if teacher is None:
+            raise CommandError("No teachers with courses, load some data first.")
+        course = teacher.course_set.first()
+
+        if kwargs["latency"]:
+            self.add_latency(kwargs["latency"] / 1000)
+
+        client = Client()
+        client.force_login(teacher.user)
+        self.cookies = client.cookies
+
+        pages = {
+            "course_list": (
+                reverse("classroom:course_list"),
+                reverse("classroom:course_list_async"),
+            ),
+            "course_detail": (
+                reverse("classroom:course_detail", args=[course.pk]),
+                reverse("classroom:course_detail_async", args=[course.pk]),
+            ),
+        }
+
+        results = {}
+        for name, (sync_url, async_url) in pages.items():
+            self.stdout.write("Benchmarking %s..." % name)
+            results[name] = {
+                "wsgi": self.run_sync(sync_url, kwargs["requests"], kwargs["concurrency"]),
+                "asgi": asyncio.run(
+                    self.run_async(async_url, kwargs["requests"], kwargs["concurrency"])
+                ),
+            }
+
+        report = {
+            "requests": kwargs["requests"],
+            "concurrency": kwargs["concurrency"],
+            "latency_ms": kwargs["latency"],
+            "pages": results,
+        }
+        output = json.dumps(report, indent=2)
+        if kwargs["output"]:
+            with open(kwargs["output"], "w") as f:
+                f.write(output)
+        self.stdout.write(output)
+
+    def add_latency(self, seconds):
+        def sleep(execute, sql, params, many, context):
+            time.sleep(seconds)
+            return execute(sql, params, many, context)
+
+        def install(connection, **kwargs):
+            if sleep not in connection.execute_wrappers:
+                connection.execute_wrappers.append(sleep)
+
+        # Every thread has connections of its own, catch them as they open
+        connection_created.connect(install, weak=False)
+        for connection in connections.all():
+            install(connection)
+
+    def summarize(self, latencies, elapsed, statuses):
+        return {
+            "requests_per_second": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "errors": sum(1 for status in statuses if status != 200),
+        }
+
+    def run_sync(self, url, count, concurrency):
+        local = threading.local()
+
+        def get(_):
+            if not hasattr(local, "client"):
+                local.client = Client()
+                local.client.cookies = self.cookies
+            started = time.perf_counter()
+            response = local.client.get(url, secure=True)
+            return time.perf_counter() - started, response.status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(get, range(count)))
+        elapsed = time.perf_counter() - started
+
+        latencies, statuses = zip(*results)
+        return self.summarize(latencies, elapsed, statuses)
+
+    async def run_async(self, url, count, concurrency):
+        client = AsyncClient()
+        client.cookies = self.cookies
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def get():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(url, secure=True)
+                return time.perf_counter() - started, response.status_code
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(get() for _ in range(count)))
+        elapsed = time.perf_counter() - started
+
+        latencies, statuses = zip(*results)
+        return self.summarize(latencies, elapsed, statuses)
@@ -0,0 +1,150 @@
+"""Benchmarks the classroom pages against a generated dataset"""
+
+import json
+import random
+import subprocess
+import time
+import tracemalloc
+
+import factory.random
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+from classroom.factories import CourseFactory, StudentFactory, TeacherFactory
+from main.instrumentation import record_queries
+
+
+def percentile(values, percent):
+    """Returns the nearest-rank percentile of a list of numbers"""
+
+    ordered = sorted(values)
+    index = max(0, round(percent / 100 * len(ordered) + 0.5) - 1)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    """
+    Seeds a dataset through the factories, drives the classroom pages and the
+    admin changelists through the test client as a logged in teacher and
+    reports latency percentiles, queries per request and peak memory as JSON.
+
+    Everything runs in a transaction which is rolled back at the end, so the
+    database is left as it was. Run it with the same arguments against an
+    empty database on different commits to compare them.
+    """
+
+    help = "Benchmarks the classroom views and admin changelists"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--teachers", type=int, default=20)
+        parser.add_argument("--students", type=int, default=200)
+        parser.add_argument("--courses", type=int, default=50)
+        parser.add_argument(
+            "--students-per-course", type=int, default=25, help="Roster size of every course."
+        )
+        parser.add_argument(
+            "-n", "--requests", type=int, default=50, help="Requests timed per page."
+        )
+        parser.add_argument("--warmup", type=int, default=5, help="Untimed requests per page.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("-o", "--output", type=str, help="Write the JSON report to a file.")
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            teacher, course = self.seed(**kwargs)
+            client = Client()
+            client.force_login(teacher.user)
+
+            results = {
+                name: self.measure(client, url, kwargs["requests"], kwargs["warmup"])
+                for name, url in self.get_urls(course).items()
+            }
+            transaction.set_rollback(True)
+
+        report = {
+            "commit": git_commit(),
+            "dataset": {
+                key: kwargs[key]
+                for key in ("teachers", "students", "courses", "students_per_course", "seed")
+            },
+            "requests": kwargs["requests"],
+            "results": results,
+        }
+        output = json.dumps(report, indent=2)
+
+        if kwargs.get("output"):
+            with open(kwargs["output"], "w") as f:
+                f.write(output)
+        self.stdout.write(output)
+
+    def seed(self, **kwargs):
+        """Creates the dataset and returns the benchmark teacher with one of their courses"""
+
+        random.seed(kwargs["seed"])
+        factory.random.reseed_random(kwargs["seed"])
+
+        teacher = TeacherFactory(user__is_staff=True, user__is_superuser=True)
+        teachers = TeacherFactory.create_batch(size=kwargs["teachers"])
+        students = StudentFactory.create_batch(size=kwargs["students"])
+        roster_size = min(kwargs["students_per_course"], len(students))
+
+        courses = [
+            CourseFactory(
+                teachers=[teacher, *random.sample(teachers, min(2, len(teachers)))],
+                students=random.sample(students, roster_size),
+            )
+            for _ in range(kwargs["courses"])
+        ]
+
+        return teacher, courses[0]
+
+    def get_urls(self, course):
+        return {
+            "classroom_home": reverse("classroom:classroom_home"),
+            "course_list": reverse("classroom:course_list"),
+            "course_detail": course.get_absolute_url(),
+            "admin_student_changelist": reverse("admin:classroom_student_changelist"),
+            "admin_teacher_changelist": reverse("admin:classroom_teacher_changelist"),
+            "admin_course_changelist": reverse("admin:classroom_course_changelist"),
+        }
+
+    def measure(self, client, url, requests, warmup):
+        for _ in range(warmup):
+            client.get(url, secure=True)
+
+        timings, queries = [], []
+
+        for _ in range(requests):
+            started = time.perf_counter()
+            with record_queries() as recorder:
+                response = client.get(url, secure=True)
+            timings.append((time.perf_counter() - started) * 1000)
+            queries.append(recorder.count)
+
+        # Traced separately as tracemalloc slows everything down
+        tracemalloc.start()
+        client.get(url, secure=True)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            "url": url,
+            "status": response.status_code,
+            "p50_ms": round(percentile(timings, 50), 2),
+            "p95_ms": round(percentile(timings, 95), 2),
+            "p99_ms": round(percentile(timings, 99), 2),
+            "queries_per_request": percentile(queries, 50),
+            "max_queries": max(queries),
+            "peak_memory_kb": round(peak / 1024, 1),
+        }
@@ -0,0 +1,69 @@
+"""Reports the double booked classrooms and teachers of the whole school"""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from classroom.conflicts import OccupancyIndex
+from classroom.models import Course, Teacher
+
+
+class Command(BaseCommand):
+    """
+    Builds the occupancy index of every active course in one pass and lists the
+    slots holding more than one course, ie. classrooms booked twice in a batch
+    and teachers with two courses in a batch.
+    """
+
+    help = "Lists the classroom and teacher double bookings"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    def handle(self, *args, **kwargs):
+        conflicts = list(OccupancyIndex.build().conflicts())
+
+        # Only the names of the courses and teachers involved are loaded
+        courses = Course.objects.only("name").in_bulk(
+            {pk for conflict in conflicts for pk in conflict.course_ids}
+        )
+        teachers = Teacher.objects.only("first_name", "last_name").in_bulk(
+            {conflict.slot[0] for conflict in conflicts if conflict.kind == "teacher"}
+        )
+        classrooms = dict(Course.CLASSROOM_CHOICES)
+        batches = dict(Course.BATCH_CHOICES)
+
+        report = []
+        for conflict in conflicts:
+            booked, batch = conflict.slot
+            if conflict.kind == "room":
+                name = classrooms.get(booked, booked)
+            else:
+                name = "%s %s" % (teachers[booked].first_name, teachers[booked].last_name)
+            report.append(
+                {
+                    "kind": conflict.kind,
+                    "name": name,
+                    "batch": str(batches.get(batch, batch)),
+                    "courses": [
+                        {"id": str(pk), "name": courses[pk].name} for pk in conflict.course_ids
+                    ],
+                }
+            )
+
+        if kwargs["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        for item in report:
+            self.stdout.write(
+                "%s %s, %s: %s"
+                % (
+                    item["kind"].capitalize(),
+                    item["name"],
+                    item["batch"].lower(),
+                    ", ".join(course["name"] for course in item["courses"]),
+                )
+            )
+        style = self.style.ERROR if report else self.style.SUCCESS
+        self.stdout.write(style("%s conflicts" % len(report)))
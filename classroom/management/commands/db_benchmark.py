@@ -0,0 +1,208 @@
+"""Benchmarks concurrent database reads, with and without the connection tuning"""
+
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from classroom.management.commands.benchmark import percentile
+from classroom.models import Course, Student
+from main.database import SQLITE_PRAGMAS
+
+# What SQLite does out of the box, ie. before main.database
+DEFAULT_PRAGMAS = {"journal_mode": "DELETE", "synchronous": "FULL"}
+
+
+def connect(path, pragmas):
+    # Django's sqlite3 backend leaves the module's 5 seconds timeout as it is
+    db = sqlite3.connect(path, timeout=5, isolation_level=None)
+    for name, value in pragmas.items():
+        db.execute("PRAGMA %s = %s" % (name, value))
+    return db
+
+
+def read(path, pragmas, queries, params, duration, seed):
+    """Runs the read ``queries`` in a loop, returns the count, errors and latencies"""
+
+    rng = random.Random(seed)
+    db = connect(path, pragmas)
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    while time.perf_counter() < deadline:
+        sql, name = rng.choice(queries)
+        started = time.perf_counter()
+        try:
+            db.execute(sql, [rng.choice(params[name])]).fetchall()
+        except sqlite3.OperationalError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+
+    db.close()
+    return latencies, errors
+
+
+def write(path, pragmas, sql, ids, duration, seed):
+    """Updates one row per transaction in a loop, returns the number of writes and errors"""
+
+    rng = random.Random(seed)
+    db = connect(path, pragmas)
+    writes, errors = 0, 0
+    deadline = time.perf_counter() + duration
+
+    while time.perf_counter() < deadline:
+        try:
+            db.execute(sql, [time.time(), rng.choice(ids)])
+        except sqlite3.OperationalError:
+            errors += 1
+            continue
+        writes += 1
+
+    db.close()
+    return writes, errors
+
+
+def compile_query(queryset):
+    """Returns the SQL of a queryset with a single parameter, with sqlite3 placeholders"""
+
+    sql, params = queryset.query.sql_with_params()
+    assert len(params) == 1, params
+    return sql.replace("%s", "?")
+
+
+class Command(BaseCommand):
+    """
+    Runs concurrent readers, each in a process of its own, against a busy
+    writer on two copies of the SQLite database: one with SQLite's defaults,
+    as Django used them, and one with the pragmas of main.database. Then times
+    queries on a new connection every time against a persistent one, which
+    works for PostgreSQL too. Needs some data, see setup_test_data.
+    """
+
+    help = "Benchmarks concurrent reads before and after the database tuning"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("-r", "--readers", type=int, default=os.cpu_count() or 4)
+        parser.add_argument("-w", "--writers", type=int, default=1)
+        parser.add_argument(
+            "-d", "--duration", type=float, default=5.0, help="Seconds per configuration."
+        )
+        parser.add_argument(
+            "-n", "--connections", type=int, default=200, help="Queries timed per connection mode."
+        )
+        parser.add_argument("-o", "--output", type=str, help="Write the JSON report to a file.")
+
+    def handle(self, *args, **kwargs):
+        report = {"vendor": connection.vendor}
+
+        if connection.vendor == "sqlite":
+            params = {
+                # UUIDs are stored as hex strings on SQLite
+                "roster": [pk.hex for pk in Course.objects.values_list("pk", flat=True)],
+                "dni": list(Student.objects.values_list("dni", flat=True)[:10000]),
+            }
+            if not params["roster"] or not params["dni"]:
+                raise CommandError("No courses or students, load some data first.")
+            report["concurrency"] = self.concurrency(params, **kwargs)
+
+        report["connections"] = self.connections(kwargs["connections"])
+
+        output = json.dumps(report, indent=2)
+        if kwargs["output"]:
+            with open(kwargs["output"], "w") as f:
+                f.write(output)
+        self.stdout.write(output)
+
+    def concurrency(self, params, **kwargs):
+        course = Course.objects.first()
+        queries = [
+            (
+                compile_query(
+                    Student.objects.filter(course=course.pk)
+                    .only("first_name", "last_name", "dni", "email")
+                    .order_by("last_name", "first_name", "id")[:50]
+                ),
+                "roster",
+            ),
+            (compile_query(Student.objects.filter(dni=0)), "dni"),
+        ]
+        update = "UPDATE %s SET updated = ? WHERE dni = ?" % Student._meta.db_table
+        results = {}
+
+        with tempfile.TemporaryDirectory() as directory:
+            for name, pragmas in (("before", DEFAULT_PRAGMAS), ("after", SQLITE_PRAGMAS)):
+                path = os.path.join(directory, "%s.sqlite3" % name)
+                self.copy_database(path)
+                self.stdout.write("Running %s for %ss..." % (name, kwargs["duration"]))
+                results[name] = self.run(path, pragmas, queries, update, params, **kwargs)
+
+        results["speedup"] = round(
+            results["after"]["reads_per_second"] / max(results["before"]["reads_per_second"], 1),
+            2,
+        )
+        return results
+
+    def copy_database(self, path):
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        connection.connection.backup(target)
+        target.close()
+
+    def run(self, path, pragmas, queries, update, params, **kwargs):
+        duration = kwargs["duration"]
+        readers, writers = kwargs["readers"], kwargs["writers"]
+
+        # The journal mode sticks to the file, set it before the workers start
+        connect(path, pragmas).close()
+
+        with ProcessPoolExecutor(max_workers=readers + writers) as executor:
+            reads = [
+                executor.submit(read, path, pragmas, queries, params, duration, seed)
+                for seed in range(readers)
+            ]
+            writes = [
+                executor.submit(write, path, pragmas, update, params["dni"], duration, seed)
+                for seed in range(writers)
+            ]
+            reads = [future.result() for future in reads]
+            writes = [future.result() for future in writes]
+
+        latencies = [latency for worker, _ in reads for latency in worker]
+        total_writes = sum(count for count, _ in writes)
+
+        return {
+            "pragmas": pragmas,
+            "readers": readers,
+            "writers": writers,
+            "reads": len(latencies),
+            "reads_per_second": round(len(latencies) / duration, 1),
+            "read_errors": sum(errors for _, errors in reads),
+            "read_p50_ms": round(percentile(latencies, 50) * 1000, 3) if latencies else None,
+            "read_p99_ms": round(percentile(latencies, 99) * 1000, 3) if latencies else None,
+            "writes_per_second": round(total_writes / duration, 1),
+            "write_errors": sum(errors for _, errors in writes),
+        }
+
+    def connections(self, count):
+        """Times a trivial query on a new connection each time, then on a persistent one"""
+
+        results = {}
+        for name, reconnect in (("new", True), ("persistent", False)):
+            timings = []
+            for _ in range(count):
+                started = time.perf_counter()
+                if reconnect:
+                    connection.close()
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                timings.append(time.perf_counter() - started)
+            results["%s_p50_ms" % name] = round(percentile(timings, 50) * 1000, 3)
+
+        return results
@@ -0,0 +1,68 @@
+"""Prints the query plans of the hot classroom querysets"""
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from classroom.cache import teacher_courses_queryset
+from classroom.models import Course, Student, Teacher
+from classroom.views import CourseDetailView
+
+
+class Command(BaseCommand):
+    """
+    Runs EXPLAIN on the querysets behind the course pages and the admin
+    changelists, built exactly like the views build them, so we can check the
+    indexes are actually used. Needs some data, see setup_test_data.
+    """
+
+    help = "Explains the query plans of the view and admin querysets"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "-s", "--search", type=str, default="", help="Search term for the admin changelists."
+        )
+        parser.add_argument(
+            "-a", "--active", action="store_true", help="Filter the changelists on active."
+        )
+
+    def handle(self, *args, **kwargs):
+        teacher = Teacher.objects.filter(course__isnull=False).first()
+        course = Course.objects.first()
+
+        if teacher is None or course is None:
+            self.stdout.write(self.style.ERROR("No courses to explain, load some data first."))
+            return
+
+        self.explain("course_list", teacher_courses_queryset(teacher.pk))
+        self.explain("course_detail", Course.objects.filter(pk=course.pk))
+        self.explain(
+            "course_detail roster",
+            course.students.only(*CourseDetailView.student_roster_fields).order_by(
+                "last_name", "first_name", "id"
+            )[: CourseDetailView.roster_paginate_by],
+        )
+
+        params = {}
+        if kwargs["search"]:
+            params["q"] = kwargs["search"]
+        if kwargs["active"]:
+            params["active__exact"] = "1"
+
+        for model in (Student, Teacher, Course):
+            self.explain("%s changelist" % model._meta.model_name, self.changelist(model, params))
+
+    def changelist(self, model, params):
+        """Returns the queryset of the admin changelist of ``model`` for the given GET params"""
+
+        request = RequestFactory().get("/", params)
+        request.user = get_user_model()(is_staff=True, is_superuser=True, is_active=True)
+        changelist = admin.site._registry[model].get_changelist_instance(request)
+
+        return changelist.get_queryset(request)[: changelist.list_per_page]
+
+    def explain(self, name, queryset):
+        self.stdout.write(self.style.SUCCESS("\n%s" % name))
+        self.stdout.write(str(queryset.query))
+        self.stdout.write(self.style.HTTP_INFO(queryset.explain()))
@@ -0,0 +1,42 @@
+"""Exports people or a course roster as CSV or JSON lines"""
+
+import sys
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from classroom.exports import CHUNK_SIZE, FORMATS, export_lines, get_dataset
+from classroom.models import Course
+
+
+class Command(BaseCommand):
+    """
+    Streams the students, the teachers or the roster of a course to a file or
+    to stdout, reading the database in chunks so memory use stays flat.
+    """
+
+    help = "Exports students, teachers or a course roster as CSV or JSON lines"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("dataset", choices=["students", "teachers", "roster"])
+        parser.add_argument("-f", "--format", choices=list(FORMATS), default="csv")
+        parser.add_argument("-c", "--course", type=str, help="The course id, for a roster.")
+        parser.add_argument("-o", "--output", type=str, help="Defaults to stdout.")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **kwargs):
+        course = None
+        if kwargs["dataset"] == "roster":
+            try:
+                course = Course.objects.get(pk=kwargs["course"])
+            except (Course.DoesNotExist, ValidationError):
+                raise CommandError("A roster needs an existing --course id.")
+
+        queryset, columns = get_dataset(kwargs["dataset"], course=course)
+        lines = export_lines(queryset, columns, kwargs["format"], kwargs["chunk_size"])
+
+        if kwargs["output"]:
+            with open(kwargs["output"], "w", newline="") as f:
+                f.writelines(lines)
+        else:
+            sys.stdout.writelines(lines)
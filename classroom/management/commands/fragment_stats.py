@@ -0,0 +1,27 @@
+"""Prints the hits and misses of the course page fragment cache"""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from classroom.cache import fragment_stats, reset_fragment_stats
+
+
+class Command(BaseCommand):
+    """
+    The counters live in the course cache alias, so with the default local
+    memory backend they're per process and this only sees its own. Point the
+    alias at a shared backend, see COURSE_CACHE_BACKEND, to count for the site.
+    """
+
+    help = "Prints the course page fragment cache hit and miss counters"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--reset", action="store_true", help="Zero the counters afterwards.")
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write(json.dumps(fragment_stats()))
+
+        if kwargs["reset"]:
+            reset_fragment_stats()
+            self.stdout.write(self.style.SUCCESS("Counters reset"))
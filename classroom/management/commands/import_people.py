@@ -0,0 +1,58 @@
+"""Imports students or teachers from a CSV file"""
+
+import csv
+import time
+
+from django.core.management.base import BaseCommand
+
+from classroom.imports import BATCH_SIZE, KINDS, import_people
+
+
+class Command(BaseCommand):
+    """
+    Creates or updates, by DNI, the students or teachers of a CSV file in bulk.
+    Rows which don't validate are skipped and can be written to an error report.
+    """
+
+    help = "Imports students or teachers from a CSV file"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("kind", choices=list(KINDS))
+        parser.add_argument("path", type=str, help="The CSV file, with a header row.")
+        parser.add_argument("-b", "--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument("-e", "--errors", type=str, help="Write rejected rows to this CSV.")
+
+    def handle(self, *args, **kwargs):
+        started = time.perf_counter()
+
+        with open(kwargs["path"], "rb") as f:
+            result = import_people(
+                kwargs["kind"], f, batch_size=kwargs["batch_size"], log=self.log_progress
+            )
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Processed %(processed)s rows: %(created)s created, %(updated)s updated, "
+                "%(unchanged)s unchanged, %(errors)s rejected" % result.as_dict()
+                + " in %.1fs (%.0f rows/sec)" % (elapsed, result.processed / elapsed)
+            )
+        )
+
+        if result.errors and kwargs["errors"]:
+            with open(kwargs["errors"], "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["line", "field", "error"])
+                for line, messages in result.errors:
+                    for field, errors in messages.items():
+                        for error in errors:
+                            writer.writerow([line, field, error])
+        elif result.errors:
+            for line, messages in result.errors[:20]:
+                self.stdout.write(self.style.ERROR("Line %s: %s" % (line, messages)))
+
+    def log_progress(self, result):
+        self.stdout.write(
+            "%(processed)s rows: %(created)s created, %(updated)s updated, "
+            "%(unchanged)s unchanged, %(errors)s rejected" % result.as_dict()
+        )
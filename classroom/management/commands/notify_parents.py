@@ -0,0 +1,55 @@
+"""Queues a notification to the parents of the students of courses or subject groups"""
+
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+
+from classroom.models import Course, SubjectGroup
+from classroom.notifications import notify_parents
+
+
+class Command(BaseCommand):
+    """
+    Queues one delivery per parent's address of the students of the courses
+    and subject groups given, once per address across siblings. The
+    ``send_notifications`` worker sends them.
+    """
+
+    help = "Queues a notification to the parents of the students of courses or subject groups"
+
+    def add_arguments(self, parser) -> None:
+        # Parsed as UUIDs, so a malformed id is a usage error rather than a traceback
+        parser.add_argument(
+            "--course",
+            action="append",
+            default=[],
+            type=uuid.UUID,
+            help="Id of a course, repeatable.",
+        )
+        parser.add_argument(
+            "--group",
+            action="append",
+            default=[],
+            type=uuid.UUID,
+            help="Id of a subject group, repeatable.",
+        )
+        parser.add_argument("--subject", required=True, help="Subject of the email.")
+        parser.add_argument("--body", required=True, help="Text of the email.")
+
+    def handle(self, *args, **kwargs):
+        courses = list(Course.objects.filter(pk__in=kwargs["course"]))
+        groups = list(SubjectGroup.objects.filter(pk__in=kwargs["group"]))
+        if len(courses) != len(set(kwargs["course"])) or len(groups) != len(set(kwargs["group"])):
+            raise CommandError("Some courses or subject groups don't exist.")
+        if not courses and not groups:
+            raise CommandError("Give at least one --course or --group.")
+
+        notification = notify_parents(
+            kwargs["subject"], kwargs["body"], courses=courses, groups=groups
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Queued %s deliveries of notification %s"
+                % (notification.deliveries.count(), notification.pk)
+            )
+        )
@@ -0,0 +1,35 @@
+"""Rebuilds the full text index of people"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from classroom.search import rebuild_index
+
+
+class Command(BaseCommand):
+    """
+    Re-indexes every student and teacher, streaming them from the database in
+    chunks. Needed after bulk writes, which don't send the signals keeping the
+    index in sync.
+    """
+
+    help = "Rebuilds the people search index"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "-c", "--chunk-size", type=int, default=2000, help="Rows read and indexed at a time."
+        )
+
+    def handle(self, *args, **kwargs):
+        started = time.perf_counter()
+
+        with transaction.atomic():
+            total = rebuild_index(chunk_size=kwargs["chunk_size"], log=self.log_progress)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS("Indexed %s people in %.1fs" % (total, elapsed)))
+
+    def log_progress(self, kind, total):
+        self.stdout.write("%s: %s people indexed" % (kind, total))
@@ -0,0 +1,19 @@
+"""Recomputes the school statistics from the enrollments"""
+
+from django.core.management.base import BaseCommand
+
+from classroom.statistics import rebuild_statistics
+
+
+class Command(BaseCommand):
+    """
+    Replaces the statistics of the dashboard with counts of the enrollments,
+    one grouped query per dimension. Run it after writes which skip the
+    signals, like raw SQL or bulk inserts of enrollments.
+    """
+
+    help = "Recomputes the school statistics from the enrollments"
+
+    def handle(self, *args, **kwargs):
+        count = rebuild_statistics()
+        self.stdout.write(self.style.SUCCESS("Stored %s statistics" % count))
@@ -0,0 +1,23 @@
+"""Recomputes the enrollment counters of courses and teachers"""
+
+from django.core.management.base import BaseCommand
+
+from classroom.counters import repair_counters
+
+
+class Command(BaseCommand):
+    """
+    Recounts Course.student_count, Course.teacher_count and Teacher.course_count
+    from the enrollment tables, one UPDATE per counter touching only the rows
+    which are off. Run it after writes which skip the signals, like raw SQL or
+    bulk inserts of enrollments.
+    """
+
+    help = "Recomputes the enrollment counters from the enrollments"
+
+    def handle(self, *args, **kwargs):
+        fixed = repair_counters(log=self.log)
+        self.stdout.write(self.style.SUCCESS("Fixed %s counters" % sum(fixed.values())))
+
+    def log(self, model, field, count):
+        self.stdout.write("%s.%s: %s rows fixed" % (model.__name__, field, count))
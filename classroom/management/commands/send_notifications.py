@@ -0,0 +1,54 @@
+"""Sends the queued notifications to the parents"""
+
+from datetime import timedelta
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from classroom.notifications import Mailer
+
+
+class Command(BaseCommand):
+    """
+    The background worker of the parent notifications: sends the pending
+    deliveries in batches through one connection to the email backend, and
+    retries the failed ones later. Without ``--loop`` it stops once nothing
+    is due, to run it from cron.
+    """
+
+    help = "Sends the queued notifications to the parents"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--loop", action="store_true", help="Keep waiting for new notifications."
+        )
+        parser.add_argument(
+            "--interval", type=float, default=5.0, help="Seconds between polls with --loop."
+        )
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--max-attempts", type=int, default=5)
+        parser.add_argument(
+            "--backoff", type=int, default=60, help="Seconds before the first retry."
+        )
+        parser.add_argument(
+            "--backend", help="Email backend to send with instead of EMAIL_BACKEND."
+        )
+
+    def handle(self, *args, **kwargs):
+        mailer = Mailer(
+            connection=get_connection(kwargs["backend"]),
+            batch_size=kwargs["batch_size"],
+            max_attempts=kwargs["max_attempts"],
+            backoff=timedelta(seconds=kwargs["backoff"]),
+        )
+        try:
+            stats = mailer.run(loop=kwargs["loop"], interval=kwargs["interval"])
+        except KeyboardInterrupt:
+            stats = mailer.stats()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Sent %(sent)s messages in %(seconds)ss (%(messages_per_second)s/s), "
+                "%(retried)s to retry, %(failed)s failed" % stats
+            )
+        )
@@ -5,6 +5,7 @@ import random
 import factory
 from django.core.management.base import BaseCommand
 
+from classroom.counters import repair_counters
 from classroom.factories import (
     CourseFactory,
     StudentFactory,
@@ -13,6 +14,9 @@ from classroom.factories import (
     TeacherFactory,
 )
 from classroom.models import Course, Student, Subject, SubjectGroup, Teacher
+from classroom.search import rebuild_index
+from classroom.seeding import BulkWriter, delete_seeded_data, seed, sizes_for_scale
+from classroom.statistics import rebuild_statistics
 
 
 class Command(BaseCommand):
@@ -24,11 +28,37 @@ class Command(BaseCommand):
         parser.add_argument(
             "-l", "--locale", type=str, help="Define a locale for the data to be generated."
         )
+        parser.add_argument(
+            "-s",
+            "--scale",
+            type=int,
+            help="Bulk mode. Generates 100 students, 5 teachers and 4 courses per unit of scale.",
+        )
+        parser.add_argument(
+            "-b",
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows written per bulk insert and transaction in bulk mode.",
+        )
+        parser.add_argument(
+            "--seed", type=int, help="Seed for the random generators to get reproducible data."
+        )
+        parser.add_argument(
+            "-w",
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes generating people in bulk mode. Try the number of cores.",
+        )
 
     def handle(self, *args, **kwargs):
         locale = kwargs.get("locale")
         self.stdout.write(self.style.SUCCESS("Locale: %s" % locale))
 
+        if kwargs.get("scale"):
+            return self.handle_bulk(**kwargs)
+
         self.stdout.write(self.style.HTTP_BAD_REQUEST("Deleting old data..."))
         Teacher.objects.all().delete()
         Student.objects.all().delete()
@@ -61,3 +91,43 @@ class Command(BaseCommand):
         """
         )
         self.stdout.write(self.style.SUCCESS("All done! 💖💅🏻💫"))
+
+    def handle_bulk(self, **kwargs):
+        """Generates rows in memory and writes them with batched bulk inserts"""
+
+        locale = kwargs.get("locale")
+        random_seed = kwargs.get("seed")
+        if random_seed is None:
+            random_seed = random.randrange(2 ** 32)
+        sizes = sizes_for_scale(kwargs["scale"])
+
+        self.stdout.write(
+            self.style.SUCCESS("Seed: %s, workers: %s" % (random_seed, kwargs["workers"]))
+        )
+        self.stdout.write(self.style.HTTP_BAD_REQUEST("Deleting old data..."))
+        delete_seeded_data()
+
+        self.stdout.write(self.style.SUCCESS("Creating new data... %s" % sizes))
+        writer = BulkWriter(batch_size=kwargs["batch_size"], log=self.log_progress)
+        seed(writer, sizes, random_seed, locale, workers=kwargs["workers"])
+
+        # Bulk inserts skip the signals which index people, count enrollments and keep statistics
+        self.stdout.write(self.style.SUCCESS("Indexing people for search..."))
+        rebuild_index(chunk_size=kwargs["batch_size"])
+        self.stdout.write(self.style.SUCCESS("Counting enrollments..."))
+        repair_counters()
+        self.stdout.write(self.style.SUCCESS("Computing statistics..."))
+        rebuild_statistics()
+
+        for table, count in writer.counts.items():
+            self.stdout.write(f"        {table}: {count}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Wrote %s rows in %.1fs (%.0f rows/sec)"
+                % (writer.total, writer.elapsed, writer.rows_per_second)
+            )
+        )
+        self.stdout.write(self.style.SUCCESS("All done! 💖💅🏻💫"))
+
+    def log_progress(self, table, count, rows_per_second):
+        self.stdout.write("%s: %s rows (%.0f rows/sec)" % (table, count, rows_per_second))
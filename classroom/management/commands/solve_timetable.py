@@ -0,0 +1,40 @@
+"""Assigns a classroom and a batch to every active course"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from classroom.models import Course
+from classroom.timetable import schedule
+
+
+class Command(BaseCommand):
+    """
+    Solves the timetable of all the active courses, see classroom.timetable,
+    and saves it in one bulk update. Courses which can't get a slot without a
+    conflict keep the one they have and are listed, conflict_report shows
+    where they collide.
+    """
+
+    help = "Assigns classrooms and batches to the active courses"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Solve without saving the result."
+        )
+
+    def handle(self, *args, **kwargs):
+        started = time.perf_counter()
+        solution, moved = schedule(commit=not kwargs["dry_run"])
+        elapsed = time.perf_counter() - started
+
+        names = Course.objects.only("name").in_bulk(solution.unassigned)
+        for pk in solution.unassigned:
+            self.stdout.write("Not placed: %s" % names[pk].name)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Placed %s courses, moved %s, %s not placed in %.2fs"
+                % (len(solution.assignments), moved, len(solution.unassigned), elapsed)
+            )
+        )
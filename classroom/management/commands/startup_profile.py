@@ -0,0 +1,167 @@
+"""Profiles what a worker does at boot: imports, app registry and warm-up"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Boots Django the way a worker does, timing every phase, in a fresh interpreter
+BOOT_SCRIPT = """
+import json, time
+
+started = time.perf_counter()
+import django
+from django.apps import AppConfig
+from django.conf import settings
+
+ready = {}
+create = AppConfig.create.__func__
+
+
+def create_timed(cls, entry):
+    config = create(cls, entry)
+    original = config.ready
+
+    def ready_timed():
+        ready_started = time.perf_counter()
+        original()
+        ready[config.label] = time.perf_counter() - ready_started
+
+    config.ready = ready_timed
+    return config
+
+
+AppConfig.create = classmethod(create_timed)
+phases = {"django": time.perf_counter() - started}
+
+phase_started = time.perf_counter()
+settings.INSTALLED_APPS
+phases["settings"] = time.perf_counter() - phase_started
+
+phase_started = time.perf_counter()
+django.setup()
+phases["apps"] = time.perf_counter() - phase_started
+
+phase_started = time.perf_counter()
+from django.core.handlers.wsgi import WSGIHandler
+WSGIHandler()
+phases["middleware"] = time.perf_counter() - phase_started
+
+warm_up = None
+if %(warm_up)r:
+    from main.warmup import warm_up as run_warm_up
+
+    phase_started = time.perf_counter()
+    warm_up = run_warm_up()
+    phases["warm_up"] = time.perf_counter() - phase_started
+
+print(json.dumps({"phases": phases, "ready": ready, "warm_up": warm_up}))
+"""
+
+# import time: self [us] | cumulative | imported package
+IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+def parse_import_times(output):
+    """Returns the self time of every module imported, in microseconds, by module name"""
+
+    times = {}
+    for line in output.splitlines():
+        match = IMPORT_TIME.match(line)
+        if match:
+            times[match.group(4)] = int(match.group(1))
+    return times
+
+
+def ms(seconds):
+    return round(seconds * 1000, 1)
+
+
+class Command(BaseCommand):
+    """
+    Boots Django in a fresh interpreter with ``python -X importtime`` and
+    reports the time of each phase: importing Django, the settings, importing
+    the apps and running their ready(), loading the middleware, and the
+    warm-up of main.warmup. Then the packages and modules which took longest
+    to import, by their own time, ie. without the modules they import.
+
+    The warm-up only compiles the templates with the cached loader, run it
+    with DEBUG=0 to see what a production worker does.
+    """
+
+    help = "Reports import times and app ready times of a worker boot"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "-n", "--top", type=int, default=15, help="Number of packages and modules to list."
+        )
+        parser.add_argument("--no-warm-up", action="store_true", help="Skip the warm-up.")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    def handle(self, *args, **kwargs):
+        script = BOOT_SCRIPT % {"warm_up": not kwargs["no_warm_up"]}
+        # With -c the working directory is on sys.path, the project's must be
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", script],
+            capture_output=True,
+            text=True,
+            cwd=settings.BASE_DIR,
+            env=os.environ.copy(),
+        )
+        if process.returncode:
+            raise CommandError("Django failed to boot:\n%s" % process.stderr[-2000:])
+
+        boot = json.loads(process.stdout.strip().splitlines()[-1])
+        imports = parse_import_times(process.stderr)
+        packages = Counter()
+        for module, microseconds in imports.items():
+            packages[module.split(".")[0]] += microseconds
+
+        top = kwargs["top"]
+        report = {
+            "phases_ms": {name: ms(seconds) for name, seconds in boot["phases"].items()},
+            "ready_ms": {label: ms(seconds) for label, seconds in boot["ready"].items()},
+            "imports": {"modules": len(imports), "ms": round(sum(imports.values()) / 1000, 1)},
+            "packages_ms": {
+                package: round(microseconds / 1000, 1)
+                for package, microseconds in packages.most_common(top)
+            },
+            "modules_ms": {
+                module: round(microseconds / 1000, 1)
+                for module, microseconds in Counter(imports).most_common(top)
+            },
+            "warm_up": boot["warm_up"],
+        }
+
+        if kwargs["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        for title, key in (
+            ("Phases", "phases_ms"),
+            ("App ready()", "ready_ms"),
+            ("Slowest packages to import", "packages_ms"),
+            ("Slowest modules to import", "modules_ms"),
+        ):
+            self.stdout.write(self.style.MIGRATE_HEADING(title))
+            for name, value in report[key].items():
+                self.stdout.write("  %-50s %8.1f ms" % (name, value))
+
+        if report["warm_up"]:
+            self.stdout.write(self.style.MIGRATE_HEADING("Warm-up"))
+            for step, result in report["warm_up"].items():
+                details = ", ".join(
+                    "%s: %s" % (key, len(value) if isinstance(value, list) else value)
+                    for key, value in result.items()
+                    if key != "ms"
+                )
+                self.stdout.write("  %-50s %8.1f ms (%s)" % (step, result["ms"], details))
+
+        self.stdout.write(
+            self.style.SUCCESS("Imported %(modules)s modules in %(ms)s ms" % report["imports"])
+        )
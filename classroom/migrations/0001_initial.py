@@ -0,0 +1,184 @@
+# Generated by Django 3.2.3 on 2026-10-18 14:11
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Course',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=60, verbose_name='Course Name')),
+                ('batch', models.CharField(choices=[('M', 'Morning'), ('A', 'Afternoon'), ('E', 'Evening')], default='M', help_text='Time of the day when the course is conducted', max_length=1, verbose_name='Batch')),
+                ('classroom', models.CharField(choices=[('A1', 'Aula-1'), ('A2', 'Aula-2'), ('A3', 'Aula-3'), ('A4', 'Aula-4'), ('A5', 'Aula-5'), ('A6', 'Aula-6'), ('A7', 'Aula-7'), ('A8', 'Aula-8'), ('A9', 'Aula-9'), ('A10', 'Aula-10'), ('B', 'Biblioteca'), ('P', 'Patio'), ('C', 'Campolter'), ('LF', 'Laboratorio FQ'), ('LT', 'Laboratorio TECH'), ('LI', 'Laboratorio De Informatica')], default='A1', help_text='Physical location where the course will be conducted.', max_length=3, verbose_name='Classroom')),
+                ('division', models.PositiveSmallIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(6)], verbose_name='Division')),
+                ('active', models.BooleanField(default=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Course',
+                'verbose_name_plural': 'Courses',
+                'ordering': ('-updated',),
+            },
+        ),
+        migrations.CreateModel(
+            name='Student',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('first_name', models.CharField(max_length=200, verbose_name='First name')),
+                ('last_name', models.CharField(max_length=200, verbose_name='Last name')),
+                ('dni', models.PositiveIntegerField(db_index=True, help_text='Your identification number', verbose_name='DNI')),
+                ('date_of_birth', models.DateField(help_text='Your date of birth as it appears on your national document', verbose_name='Date of birth')),
+                ('date_of_admission', models.DateField(help_text='The date you registered with us.', verbose_name='Date of admission')),
+                ('email', models.EmailField(help_text='We will send notification emails to this email address.', max_length=254, verbose_name='Your work email')),
+                ('address1', models.CharField(max_length=200, verbose_name='Address line 1')),
+                ('address2', models.CharField(max_length=200, verbose_name='Address line 2')),
+                ('city', models.CharField(max_length=60, verbose_name='City')),
+                ('gender', models.CharField(choices=[('M', 'Male'), ('F', 'Female'), ('O', 'Other')], default='F', max_length=2, verbose_name='Gender')),
+                ('marital_status', models.CharField(choices=[('S', 'Single'), ('M', 'Married'), ('D', 'Divorced'), ('W', 'Widowed')], default='S', max_length=2, verbose_name='Marital Status')),
+                ('phone_number', models.CharField(blank=True, help_text='We might drop you a message incase of an emergency', max_length=17, validators=[django.core.validators.RegexValidator(message="Phone number must be entered in the format: '+5491123456789'. Up to 15 digits allowed. No spaces", regex='^\\+?1?\\d{9,15}$')], verbose_name='Your cellphone number.')),
+                ('active', models.BooleanField(default=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('permission_for_photo', models.BooleanField(default=False, help_text='Whether you give us consent to use your photograph.', verbose_name='Grant permission for photograph.')),
+                ('father_first_name', models.CharField(blank=True, max_length=200, verbose_name="Father's First name")),
+                ('father_last_name', models.CharField(blank=True, max_length=200, verbose_name="Father's Last name")),
+                ('father_dni', models.PositiveIntegerField(help_text="The national document identification numberr of the applicant's father", null=True, verbose_name="Father's DNI")),
+                ('father_email', models.EmailField(blank=True, help_text="We might send email to this address for permissions or information regarding the student's activities", max_length=254, verbose_name="Father's email")),
+                ('mother_first_name', models.CharField(blank=True, max_length=200, verbose_name='Mother First name')),
+                ('mother_last_name', models.CharField(blank=True, max_length=200, verbose_name='Mother Last name')),
+                ('mother_dni', models.PositiveIntegerField(help_text="The national document identification number of the applicant's mother", null=True, verbose_name="Mother's DNI")),
+                ('mother_email', models.EmailField(blank=True, help_text="We might send email to this address for permissions or information regarding the student's activities", max_length=254, verbose_name="Mother's email")),
+            ],
+            options={
+                'verbose_name': 'Student',
+                'verbose_name_plural': 'Students',
+                'ordering': ('-updated',),
+            },
+        ),
+        migrations.CreateModel(
+            name='Subject',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(help_text='The name of the subject', max_length=255, verbose_name='Subject name')),
+                ('active', models.BooleanField(default=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Subject',
+                'verbose_name_plural': 'Subjects',
+                'ordering': ('-updated',),
+            },
+        ),
+        migrations.CreateModel(
+            name='SubjectGroup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(help_text='The group to which the subject belongs.', max_length=255, verbose_name='Subject Group')),
+                ('year', models.PositiveSmallIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(6)], verbose_name='Year')),
+                ('active', models.BooleanField(default=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'SubjectGroup',
+                'verbose_name_plural': 'SubjectGroups',
+                'ordering': ('-updated',),
+            },
+        ),
+        migrations.CreateModel(
+            name='Teacher',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('first_name', models.CharField(max_length=200, verbose_name='First name')),
+                ('last_name', models.CharField(max_length=200, verbose_name='Last name')),
+                ('dni', models.PositiveIntegerField(db_index=True, help_text='Your identification number', verbose_name='DNI')),
+                ('date_of_birth', models.DateField(help_text='Your date of birth as it appears on your national document', verbose_name='Date of birth')),
+                ('date_of_admission', models.DateField(help_text='The date you registered with us.', verbose_name='Date of admission')),
+                ('email', models.EmailField(help_text='We will send notification emails to this email address.', max_length=254, verbose_name='Your work email')),
+                ('address1', models.CharField(max_length=200, verbose_name='Address line 1')),
+                ('address2', models.CharField(max_length=200, verbose_name='Address line 2')),
+                ('city', models.CharField(max_length=60, verbose_name='City')),
+                ('gender', models.CharField(choices=[('M', 'Male'), ('F', 'Female'), ('O', 'Other')], default='F', max_length=2, verbose_name='Gender')),
+                ('marital_status', models.CharField(choices=[('S', 'Single'), ('M', 'Married'), ('D', 'Divorced'), ('W', 'Widowed')], default='S', max_length=2, verbose_name='Marital Status')),
+                ('phone_number', models.CharField(blank=True, help_text='We might drop you a message incase of an emergency', max_length=17, validators=[django.core.validators.RegexValidator(message="Phone number must be entered in the format: '+5491123456789'. Up to 15 digits allowed. No spaces", regex='^\\+?1?\\d{9,15}$')], verbose_name='Your cellphone number.')),
+                ('active', models.BooleanField(default=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('certified', models.BooleanField(default=False, help_text='Are you certified as a teacher?', verbose_name='Certified')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='teacher', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Teacher',
+                'verbose_name_plural': 'Teachers',
+                'ordering': ('-updated',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='subjectgroup',
+            index=models.Index(fields=['active', '-updated'], name='subjectgrp_active_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='subject',
+            name='groups',
+            field=models.ManyToManyField(to='classroom.SubjectGroup'),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='student', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='students',
+            field=models.ManyToManyField(to='classroom.Student'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='subject',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='Course', to='classroom.subject'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='teachers',
+            field=models.ManyToManyField(to='classroom.Teacher'),
+        ),
+        migrations.AddIndex(
+            model_name='teacher',
+            index=models.Index(fields=['active', '-updated'], name='teacher_active_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subject',
+            index=models.Index(fields=['active', '-updated'], name='subject_active_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['active', '-updated'], name='student_active_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['active', '-updated'], name='course_active_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['classroom', 'batch'], name='course_classroom_batch_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['batch'], name='course_batch_idx'),
+        ),
+    ]
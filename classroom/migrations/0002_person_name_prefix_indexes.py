@@ -0,0 +1,45 @@
+from django.db import migrations
+
+# The admin searches people by name prefix, ie. last_name__istartswith. Each
+# database needs its own kind of index to serve that, which Index can't express.
+INDEXES = [
+    ("student_last_name_prefix_idx", "classroom_student", "last_name"),
+    ("student_first_name_prefix_idx", "classroom_student", "first_name"),
+    ("teacher_last_name_prefix_idx", "classroom_teacher", "last_name"),
+    ("teacher_first_name_prefix_idx", "classroom_teacher", "first_name"),
+]
+
+INDEX_SQL = {
+    # LIKE is case insensitive and can use a NOCASE index for a prefix
+    "sqlite": "CREATE INDEX IF NOT EXISTS %s ON %s (%s COLLATE NOCASE)",
+    # istartswith is UPPER(col::text) LIKE UPPER('x%'), which needs pattern ops
+    "postgresql": "CREATE INDEX IF NOT EXISTS %s ON %s ((UPPER(%s::text)) text_pattern_ops)",
+}
+
+
+def create_indexes(apps, schema_editor):
+    sql = INDEX_SQL.get(schema_editor.connection.vendor)
+    if sql is None:
+        return
+
+    for name, table, column in INDEXES:
+        schema_editor.execute(sql % (name, table, column))
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor not in INDEX_SQL:
+        return
+
+    for name, _, _ in INDEXES:
+        schema_editor.execute("DROP INDEX IF EXISTS %s" % name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("classroom", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+# See classroom.search, the index is a full text table of its own kind on each database
+CREATE_SQL = {
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS classroom_people_search USING fts5("
+        "kind UNINDEXED, person_id UNINDEXED, name, city, parents, "
+        "prefix='2 3', tokenize='unicode61 remove_diacritics 2')",
+    ],
+    "postgresql": [
+        "CREATE TABLE IF NOT EXISTS classroom_people_search ("
+        "kind varchar(10) NOT NULL, person_id uuid NOT NULL, document tsvector NOT NULL, "
+        "PRIMARY KEY (kind, person_id))",
+        "CREATE INDEX IF NOT EXISTS classroom_people_search_document_idx "
+        "ON classroom_people_search USING GIN (document)",
+    ],
+}
+
+
+def create_index(apps, schema_editor):
+    for sql in CREATE_SQL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor in CREATE_SQL:
+        schema_editor.execute("DROP TABLE IF EXISTS classroom_people_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("classroom", "0002_person_name_prefix_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
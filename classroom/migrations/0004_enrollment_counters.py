@@ -0,0 +1,41 @@
+# Generated by Django 3.2.3 on 2026-10-18 14:28
+
+from django.db import migrations, models
+
+# Counts the existing links, classroom.counters keeps them up to date from here on
+FILL_COUNTERS = [
+    "UPDATE classroom_course SET "
+    "student_count = (SELECT COUNT(*) FROM classroom_course_students s "
+    "WHERE s.course_id = classroom_course.id), "
+    "teacher_count = (SELECT COUNT(*) FROM classroom_course_teachers t "
+    "WHERE t.course_id = classroom_course.id)",
+    "UPDATE classroom_teacher SET "
+    "course_count = (SELECT COUNT(*) FROM classroom_course_teachers t "
+    "WHERE t.teacher_id = classroom_teacher.id)",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classroom', '0003_people_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='student_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Students'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='teacher_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Teachers'),
+        ),
+        migrations.AddField(
+            model_name='teacher',
+            name='course_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Courses'),
+        ),
+        migrations.RunSQL(FILL_COUNTERS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.3 on 2026-10-18 14:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classroom', '0004_enrollment_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subject',
+            name='requires_lab',
+            field=models.BooleanField(default=False, help_text='Courses of this subject can only be held in a laboratory.', verbose_name='Requires a laboratory'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 3.2.3 on 2026-10-18 14:37
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count
+
+# What the existing enrollments count for, classroom.statistics keeps it up to date from here on
+DIMENSIONS = {"batch": "course__batch", "group": "course__subject__groups"}
+
+
+def fill_statistics(apps, schema_editor):
+    Course = apps.get_model("classroom", "Course")
+    Statistic = apps.get_model("classroom", "Statistic")
+
+    totals = Counter()
+    for dimension, key_field in DIMENSIONS.items():
+        students = (
+            Course.students.through.objects.order_by()
+            .values_list(key_field, "student__gender", "student__marital_status")
+            .annotate(count=Count("*"))
+        )
+        for key, gender, marital_status, count in students:
+            if key is not None:
+                totals[dimension, str(key), "enrollments"] += count
+                totals[dimension, str(key), "gender_%s" % gender] += count
+                totals[dimension, str(key), "marital_status_%s" % marital_status] += count
+
+        photos = (
+            Course.students.through.objects.filter(student__permission_for_photo=True)
+            .order_by()
+            .values_list(key_field)
+            .annotate(count=Count("*"))
+        )
+        teachers = (
+            Course.teachers.through.objects.order_by()
+            .values_list(key_field)
+            .annotate(count=Count("*"))
+        )
+        certified = teachers.filter(teacher__certified=True)
+        for metric, rows in (("photo", photos), ("teachers", teachers), ("certified", certified)):
+            for key, count in rows:
+                if key is not None:
+                    totals[dimension, str(key), metric] += count
+
+    Statistic.objects.bulk_create(
+        [
+            Statistic(dimension=dimension, key=key, metric=metric, value=value)
+            for (dimension, key, metric), value in totals.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classroom', '0005_subject_requires_lab'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Statistic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('group', 'Subject group'), ('batch', 'Batch')], max_length=5, verbose_name='Dimension')),
+                ('key', models.CharField(help_text='The subject group id or the batch.', max_length=36, verbose_name='Key')),
+                ('metric', models.CharField(max_length=30, verbose_name='Metric')),
+                ('value', models.IntegerField(default=0, verbose_name='Value')),
+            ],
+            options={
+                'verbose_name': 'Statistic',
+                'verbose_name_plural': 'Statistics',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='statistic',
+            constraint=models.UniqueConstraint(fields=('dimension', 'key', 'metric'), name='statistic_unique_metric'),
+        ),
+        migrations.RunPython(fill_statistics, migrations.RunPython.noop),
+    ]
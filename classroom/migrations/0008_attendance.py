@@ -0,0 +1,60 @@
+# Generated by Django 3.2.3 on 2026-10-18 14:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classroom', '0007_notifications'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RosterPosition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='positions', to='classroom.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='classroom.student')),
+            ],
+            options={
+                'verbose_name': 'Roster position',
+                'verbose_name_plural': 'Roster positions',
+            },
+        ),
+        migrations.CreateModel(
+            name='Attendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('size', models.PositiveIntegerField(verbose_name='Roster size')),
+                ('enrolled', models.BinaryField()),
+                ('present', models.BinaryField()),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendances', to='classroom.course')),
+            ],
+            options={
+                'verbose_name': 'Attendance',
+                'verbose_name_plural': 'Attendances',
+                'ordering': ('-date',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='rosterposition',
+            constraint=models.UniqueConstraint(fields=('course', 'student'), name='rosterposition_unique_student'),
+        ),
+        migrations.AddConstraint(
+            model_name='rosterposition',
+            constraint=models.UniqueConstraint(fields=('course', 'position'), name='rosterposition_unique_position'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['date'], name='attendance_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(fields=('course', 'date'), name='attendance_unique_date'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.3 on 2026-10-18 14:49
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classroom', '0008_attendance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Grade',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.PositiveSmallIntegerField(choices=[(1, 'First term'), (2, 'Second term'), (3, 'Third term')], verbose_name='Term')),
+                ('value', models.DecimalField(decimal_places=2, max_digits=4, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(10)], verbose_name='Mark')),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grades', to='classroom.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grades', to='classroom.student')),
+            ],
+            options={
+                'verbose_name': 'Grade',
+                'verbose_name_plural': 'Grades',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='grade',
+            constraint=models.UniqueConstraint(fields=('course', 'term', 'student'), name='grade_unique_student'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.3 on 2026-10-18 15:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classroom', '0009_gradebook'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='course',
+            name='course_active_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='student',
+            name='student_active_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='subject',
+            name='subject_active_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='subjectgroup',
+            name='subjectgrp_active_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='teacher',
+            name='teacher_active_updated_idx',
+        ),
+    ]
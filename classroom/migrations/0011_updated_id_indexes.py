@@ -0,0 +1,25 @@
+# Generated by Django 3.2.3 on 2026-10-18 15:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("classroom", "0010_drop_active_updated_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(fields=["updated", "id"], name="course_updated_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(fields=["updated", "id"], name="student_updated_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="teacher",
+            index=models.Index(fields=["updated", "id"], name="teacher_updated_id_idx"),
+        ),
+    ]
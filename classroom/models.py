@@ -5,9 +5,30 @@ from django.conf import settings
 from django.core.validators import MaxValueValidator, MinValueValidator, RegexValidator
 from django.db import models
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
+class CountersMixin:
+    """
+    For models with counter columns kept up to date by ``classroom.counters``
+    with F() updates. Saving an existing row leaves them out, so the counts this
+    instance was loaded with can't overwrite a change made since.
+    """
+
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.counter_fields
+            ]
+
+        super().save(*args, **kwargs)
+
+
 class Person(models.Model):
     """Abstract class which represents a person with common fields"""
 
@@ -39,6 +60,7 @@ class Person(models.Model):
     dni = models.PositiveIntegerField(
         verbose_name=_("DNI"),
         help_text=_("Your identification number"),
+        db_index=True,
     )
     date_of_birth = models.DateField(
         verbose_name=_("Date of birth"),
@@ -90,7 +112,7 @@ class Person(models.Model):
         abstract = True
 
 
-class Teacher(Person):
+class Teacher(CountersMixin, Person):
     """Teacher model which inherits from the Person abstract model."""
 
     certified = models.BooleanField(
@@ -98,14 +120,23 @@ class Teacher(Person):
         help_text=_("Are you certified as a teacher?"),
         default=False,
     )
+    course_count = models.PositiveIntegerField(
+        verbose_name=_("Courses"), default=0, editable=False
+    )
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="teacher"
     )
 
+    counter_fields = ("course_count",)
+
     class Meta:
         verbose_name = _("Teacher")
         verbose_name_plural = _("Teachers")
         ordering = ("-updated",)
+        indexes = [
+            # The changelists and keyset pages order by (-updated, -id)
+            models.Index(fields=["updated", "id"], name="teacher_updated_id_idx"),
+        ]
 
     def __str__(self) -> str:
         return ", ".join([self.first_name, self.last_name, str(self.dni)])
@@ -164,6 +195,10 @@ class Student(Person):
         verbose_name = _("Student")
         verbose_name_plural = _("Students")
         ordering = ("-updated",)
+        indexes = [
+            # The changelists and keyset pages order by (-updated, -id)
+            models.Index(fields=["updated", "id"], name="student_updated_id_idx"),
+        ]
 
     def __str__(self) -> str:
         return ", ".join([self.first_name, self.last_name, str(self.dni)])
@@ -202,6 +237,11 @@ class Subject(models.Model):
         verbose_name=_("Subject name"), help_text=_("The name of the subject"), max_length=255
     )
     groups = models.ManyToManyField(SubjectGroup)
+    requires_lab = models.BooleanField(
+        verbose_name=_("Requires a laboratory"),
+        help_text=_("Courses of this subject can only be held in a laboratory."),
+        default=False,
+    )
     active = models.BooleanField(default=True)
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
@@ -215,7 +255,7 @@ class Subject(models.Model):
         return f"{self.name}"
 
 
-class Course(models.Model):
+class Course(CountersMixin, models.Model):
     MORNING = "M"
     AFTERNOON = "A"
     EVENING = "E"
@@ -262,6 +302,8 @@ class Course(models.Model):
         (LABORATORIOINF, "Laboratorio De Informatica"),
     )
 
+    LABORATORIES = (LABORATORIOFQ, LABORATORIOTECH, LABORATORIOINF)
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(_("Course Name"), max_length=60)
     batch = models.CharField(
@@ -288,18 +330,233 @@ class Course(models.Model):
     subject = models.ForeignKey(
         Subject, on_delete=models.DO_NOTHING, related_name="Course", null=True
     )
+    student_count = models.PositiveIntegerField(
+        verbose_name=_("Students"), default=0, editable=False
+    )
+    teacher_count = models.PositiveIntegerField(
+        verbose_name=_("Teachers"), default=0, editable=False
+    )
 
     active = models.BooleanField(default=True)
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
 
+    counter_fields = ("student_count", "teacher_count")
+
     class Meta:
         verbose_name = _("Course")
         verbose_name_plural = _("Courses")
         ordering = ("-updated",)
+        indexes = [
+            models.Index(fields=["classroom", "batch"], name="course_classroom_batch_idx"),
+            models.Index(fields=["batch"], name="course_batch_idx"),
+            # The teachers' course lists and keyset pages order by (-updated, -id)
+            models.Index(fields=["updated", "id"], name="course_updated_id_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.name}, {self.batch}, {self.classroom}"
 
+    def clean(self):
+        # classroom.conflicts imports the models
+        from .conflicts import check_room
+
+        check_room(self)
+
     def get_absolute_url(self):
         return reverse("classroom:course_detail", args=[str(self.id)])
+
+
+class Statistic(models.Model):
+    """
+    One aggregate of the enrollments, ie. a count for a subject group or a
+    batch, kept up to date by ``classroom.statistics``.
+    """
+
+    GROUP = "group"
+    BATCH = "batch"
+
+    DIMENSION_CHOICES = (
+        (GROUP, _("Subject group")),
+        (BATCH, _("Batch")),
+    )
+
+    dimension = models.CharField(
+        verbose_name=_("Dimension"), max_length=5, choices=DIMENSION_CHOICES
+    )
+    key = models.CharField(
+        verbose_name=_("Key"), help_text=_("The subject group id or the batch."), max_length=36
+    )
+    metric = models.CharField(verbose_name=_("Metric"), max_length=30)
+    value = models.IntegerField(verbose_name=_("Value"), default=0)
+
+    class Meta:
+        verbose_name = _("Statistic")
+        verbose_name_plural = _("Statistics")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dimension", "key", "metric"], name="statistic_unique_metric"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.dimension} {self.key} {self.metric}: {self.value}"
+
+
+class Notification(models.Model):
+    """A message to the parents of the students of some courses or subject groups"""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    subject = models.CharField(verbose_name=_("Subject"), max_length=255)
+    body = models.TextField(verbose_name=_("Body"))
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Notification")
+        verbose_name_plural = _("Notifications")
+        ordering = ("-created",)
+
+    def __str__(self) -> str:
+        return self.subject
+
+
+class Delivery(models.Model):
+    """
+    A notification to one parent's address, sent by ``classroom.notifications``.
+    Failed sends are retried at ``next_attempt`` until they run out of attempts.
+    """
+
+    PENDING = "P"
+    SENT = "S"
+    FAILED = "F"
+
+    STATUS_CHOICES = (
+        (PENDING, _("Pending")),
+        (SENT, _("Sent")),
+        (FAILED, _("Failed")),
+    )
+
+    notification = models.ForeignKey(
+        Notification, on_delete=models.CASCADE, related_name="deliveries"
+    )
+    email = models.EmailField(verbose_name=_("Email"))
+    status = models.CharField(
+        verbose_name=_("Status"), max_length=1, choices=STATUS_CHOICES, default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(verbose_name=_("Attempts"), default=0)
+    next_attempt = models.DateTimeField(verbose_name=_("Next attempt"), default=timezone.now)
+    error = models.TextField(verbose_name=_("Last error"), blank=True)
+    sent = models.DateTimeField(verbose_name=_("Sent"), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("Delivery")
+        verbose_name_plural = _("Deliveries")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["notification", "email"], name="delivery_unique_email"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["status", "next_attempt"], name="delivery_status_next_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.email}: {self.get_status_display()}"
+
+
+class RosterPosition(models.Model):
+    """
+    The bit of a student in the attendance bitmaps of a course. Positions are
+    given once and never change or get reused, even after the student leaves.
+    """
+
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="positions")
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="+")
+    position = models.PositiveIntegerField()
+
+    class Meta:
+        verbose_name = _("Roster position")
+        verbose_name_plural = _("Roster positions")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["course", "student"], name="rosterposition_unique_student"
+            ),
+            models.UniqueConstraint(
+                fields=["course", "position"], name="rosterposition_unique_position"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.course_id} {self.position}: {self.student_id}"
+
+
+class Attendance(models.Model):
+    """
+    The attendance of a course on a day, see ``classroom.attendance``. Bit
+    ``n`` of ``enrolled`` and ``present`` is the student at roster position
+    ``n``, least significant bit first.
+    """
+
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="attendances")
+    date = models.DateField(verbose_name=_("Date"))
+    size = models.PositiveIntegerField(verbose_name=_("Roster size"))
+    enrolled = models.BinaryField()
+    present = models.BinaryField()
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Attendance")
+        verbose_name_plural = _("Attendances")
+        ordering = ("-date",)
+        constraints = [
+            models.UniqueConstraint(fields=["course", "date"], name="attendance_unique_date"),
+        ]
+        indexes = [
+            models.Index(fields=["date"], name="attendance_date_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.course_id} {self.date}"
+
+
+class Grade(models.Model):
+    """
+    The mark of a student in a course for a term. ``classroom.gradebook``
+    writes a course's marks at once and computes their statistics.
+    """
+
+    FIRST_TERM = 1
+    SECOND_TERM = 2
+    THIRD_TERM = 3
+
+    TERM_CHOICES = (
+        (FIRST_TERM, _("First term")),
+        (SECOND_TERM, _("Second term")),
+        (THIRD_TERM, _("Third term")),
+    )
+
+    MIN_VALUE = 0
+    MAX_VALUE = 10
+
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="grades")
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="grades")
+    term = models.PositiveSmallIntegerField(verbose_name=_("Term"), choices=TERM_CHOICES)
+    value = models.DecimalField(
+        verbose_name=_("Mark"),
+        max_digits=4,
+        decimal_places=2,
+        validators=[MinValueValidator(MIN_VALUE), MaxValueValidator(MAX_VALUE)],
+    )
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Grade")
+        verbose_name_plural = _("Grades")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["course", "term", "student"], name="grade_unique_student"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.student_id} {self.course_id} {self.term}: {self.value}"
@@ -0,0 +1,193 @@
+"""
+Notifications to the parents of students.
+
+``notify_parents`` resolves the addresses of the parents of the students of
+some courses or subject groups, one query per course or group, and queues one
+``Delivery`` per address. Siblings share their parents, every address gets
+the notification once however many of its children are concerned.
+
+``Mailer`` is the background worker, run by ``manage.py send_notifications``.
+It claims the deliveries which are due in batches and sends them through a
+single connection to the email backend, kept open across batches, instead of
+an SMTP session per message. A message which fails is retried later with an
+exponential backoff, until ``max_attempts``, and a connection which drops is
+opened again. Every message goes to one parent, so no parent sees another's
+address.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Course, Delivery, Notification, Student
+
+CourseStudents = Course.students.through
+
+PARENT_EMAILS = ("father_email", "mother_email")
+
+
+def get_parent_emails(course=None, group=None):
+    """Returns the parents' addresses of the students of a course or a subject group"""
+
+    if course is not None:
+        students = CourseStudents.objects.filter(course=course)
+        fields = ["student__%s" % field for field in PARENT_EMAILS]
+    else:
+        students = Student.objects.filter(course__subject__groups=group)
+        fields = PARENT_EMAILS
+
+    return {
+        email
+        for emails in students.order_by().values_list(*fields).distinct()
+        for email in emails
+        if email
+    }
+
+
+def dedupe(emails):
+    """Keeps one spelling of every address, addresses are case insensitive"""
+
+    unique = {}
+    for email in sorted(emails):
+        unique.setdefault(email.strip().lower(), email.strip())
+    return sorted(unique.values(), key=str.lower)
+
+
+def notify_parents(subject, body, courses=(), groups=()):
+    """Queues a notification to the parents of the students of ``courses`` and ``groups``"""
+
+    emails = set()
+    for course in courses:
+        emails |= get_parent_emails(course=course)
+    for group in groups:
+        emails |= get_parent_emails(group=group)
+
+    with transaction.atomic():
+        notification = Notification.objects.create(subject=subject, body=body)
+        Delivery.objects.bulk_create(
+            [Delivery(notification=notification, email=email) for email in dedupe(emails)],
+            batch_size=1000,
+        )
+
+    return notification
+
+
+class Mailer:
+    def __init__(
+        self, connection=None, batch_size=100, max_attempts=5, backoff=timedelta(minutes=1)
+    ):
+        self.connection = connection or get_connection()
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.sent = self.retried = self.failed = 0
+        self.elapsed = 0.0
+
+    def claim(self):
+        """
+        Returns the next batch of due deliveries. With several workers on
+        PostgreSQL, each skips the rows the others hold.
+        """
+
+        with transaction.atomic():
+            due = (
+                Delivery.objects.filter(status=Delivery.PENDING, next_attempt__lte=timezone.now())
+                .select_related("notification")
+                .order_by("next_attempt", "pk")
+                .select_for_update(skip_locked=True, of=("self",))[: self.batch_size]
+            )
+            deliveries = list(due)
+            # Out of the way of the other workers until this one reports back
+            Delivery.objects.filter(pk__in=[delivery.pk for delivery in deliveries]).update(
+                next_attempt=timezone.now() + self.backoff
+            )
+
+        return deliveries
+
+    def get_message(self, delivery):
+        return EmailMessage(
+            subject=delivery.notification.subject,
+            body=delivery.notification.body,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[delivery.email],
+            connection=self.connection,
+        )
+
+    def reconnect(self):
+        """Whatever broke may have been the connection, starts a fresh one"""
+
+        try:
+            self.connection.close()
+            self.connection.open()
+        except Exception:
+            # The server is still down, the next messages fail and are retried
+            pass
+
+    def send_batch(self, deliveries):
+        sent, failed = [], []
+        for delivery in deliveries:
+            try:
+                # The connection is open already, the backend leaves it open
+                if not self.connection.send_messages([self.get_message(delivery)]):
+                    raise RuntimeError("The backend didn't send the message.")
+            except Exception as error:
+                failed.append((delivery, error))
+                self.reconnect()
+            else:
+                sent.append(delivery)
+
+        now = timezone.now()
+        Delivery.objects.filter(pk__in=[delivery.pk for delivery in sent]).update(
+            status=Delivery.SENT, sent=now, attempts=F("attempts") + 1, error=""
+        )
+        for delivery, error in failed:
+            attempts = delivery.attempts + 1
+            if attempts >= self.max_attempts:
+                status, self.failed = Delivery.FAILED, self.failed + 1
+            else:
+                status, self.retried = Delivery.PENDING, self.retried + 1
+            Delivery.objects.filter(pk=delivery.pk).update(
+                status=status,
+                attempts=attempts,
+                error=repr(error),
+                next_attempt=now + self.backoff * 2 ** (attempts - 1),
+            )
+
+        self.sent += len(sent)
+
+    def run(self, loop=False, interval=5.0):
+        """
+        Sends the due deliveries batch after batch until there are none left,
+        then returns, or with ``loop`` waits ``interval`` seconds for more.
+        """
+
+        started = time.perf_counter()
+        self.connection.open()
+        try:
+            while True:
+                deliveries = self.claim()
+                if deliveries:
+                    self.send_batch(deliveries)
+                elif loop:
+                    time.sleep(interval)
+                else:
+                    break
+        finally:
+            self.connection.close()
+            self.elapsed += time.perf_counter() - started
+
+        return self.stats()
+
+    def stats(self):
+        return {
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "seconds": round(self.elapsed, 3),
+            "messages_per_second": round(self.sent / self.elapsed, 1) if self.elapsed else None,
+        }
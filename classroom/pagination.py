@@ -0,0 +1,162 @@
+"""
+Keyset (cursor) pagination.
+
+Offset pagination makes the database walk past every skipped row, so deep pages
+get slower the longer a teacher's history is. Here a page starts right after the
+(updated, id) of the last row already seen, which the (updated, id) index of
+the paged models seeks to directly, so every page costs the same however deep
+it is.
+
+Pages can be cut from a queryset or from an already ordered list of dicts, like
+the cached course summaries, with the same cursors.
+
+Also home to the paginator of the admin changelists of the big tables.
+"""
+
+import base64
+import binascii
+import bisect
+import uuid
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+ORDERING = ("-updated", "-id")
+
+
+def get_key(obj):
+    """Returns the (updated, id) of a model instance or of a dict"""
+
+    if isinstance(obj, dict):
+        return obj["updated"], obj["id"]
+    return obj.updated, obj.id
+
+
+def encode_cursor(obj):
+    """Returns an opaque, url safe cursor pointing right after ``obj``"""
+
+    updated, pk = get_key(obj)
+    value = "%s|%s" % (updated.isoformat(), pk)
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Returns the (updated, id) pair of a cursor or raises ValueError"""
+
+    try:
+        updated, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        pk = uuid.UUID(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError("Invalid cursor %r" % cursor)
+
+    updated = parse_datetime(updated)
+    if updated is None:
+        raise ValueError("Invalid cursor %r" % cursor)
+
+    return updated, pk
+
+
+class KeysetPage:
+    """A page of results along with the cursor to the next one, if any"""
+
+    def __init__(self, object_list, next_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def keyset_page(object_list, cursor=None, page_size=25):
+    """
+    Returns the ``KeysetPage`` of ``object_list``, newest first, which starts
+    after ``cursor``. One extra row is fetched to know if there's a next page.
+
+    Lists are expected to be sorted newest first already.
+    """
+
+    if isinstance(object_list, QuerySet):
+        rows = _seek_queryset(object_list, cursor, page_size + 1)
+    else:
+        rows = _seek_list(object_list, cursor, page_size + 1)
+
+    next_cursor = encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+
+    return KeysetPage(rows[:page_size], next_cursor)
+
+
+def _seek_queryset(queryset, cursor, limit):
+    queryset = queryset.order_by(*ORDERING)
+
+    if cursor:
+        updated, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(updated__lt=updated) | Q(updated=updated, id__lt=pk))
+
+    return list(queryset[:limit])
+
+
+class _OlderThan:
+    """
+    Whether each row of a newest first list is older than ``key``, ie. False
+    up to the cursor and True after it, a sorted sequence ``bisect`` can seek
+    """
+
+    def __init__(self, object_list, key):
+        self.object_list = object_list
+        self.key = key
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        updated, pk = get_key(self.object_list[index])
+        # uuids sort by their hex digits, both in python and in the database
+        return (updated, pk.hex) < self.key
+
+
+def _seek_list(object_list, cursor, limit):
+    start = 0
+
+    if cursor:
+        updated, pk = decode_cursor(cursor)
+        start = bisect.bisect_left(_OlderThan(object_list, (updated, pk.hex)), True)
+
+    return list(object_list[start : start + limit])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    A paginator which doesn't count every row of a big unfiltered table.
+
+    On PostgreSQL the planner's estimate of the table size is used instead
+    whenever it's above ``estimate_threshold``. Filtered querysets, and other
+    databases, are counted as usual.
+    """
+
+    estimate_threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+
+        if connection.vendor == "postgresql" and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples FROM pg_class WHERE relname = %s",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] > self.estimate_threshold:
+                return int(row[0])
+
+        return super().count
@@ -0,0 +1,272 @@
+"""
+Full text search over students and teachers.
+
+Every person has one document in the ``classroom_people_search`` table, with
+their name and DNI, their city and, for students, their parents' names. The
+table is an FTS5 virtual table on SQLite and a tsvector column with a GIN index
+on PostgreSQL, both created by migration 0003. Other databases fall back to a
+prefix search on the names.
+
+Documents are kept in sync by the receivers in ``classroom.signals``. Bulk
+writes skip those, run ``manage.py rebuild_search_index`` after them.
+"""
+
+import re
+
+from django.db import connections, router
+from django.db.models import Q
+
+from .models import Student, Teacher
+
+TABLE = "classroom_people_search"
+
+KINDS = {
+    "student": Student,
+    "teacher": Teacher,
+}
+
+PARENT_FIELDS = ("father_first_name", "father_last_name", "mother_first_name", "mother_last_name")
+
+# The columns loaded for the people found
+RESULT_FIELDS = ("id", "first_name", "last_name", "dni", "city", "email")
+
+DOCUMENT_FIELDS = {
+    "student": ("id", "first_name", "last_name", "dni", "city") + PARENT_FIELDS,
+    "teacher": ("id", "first_name", "last_name", "dni", "city"),
+}
+
+
+def get_kind(person):
+    return "student" if isinstance(person, Student) else "teacher"
+
+
+def make_document(kind, fields):
+    """Returns the (person_id, name, city, parents) of a person given as a dict of fields"""
+
+    name = " ".join([fields["first_name"], fields["last_name"], str(fields["dni"])])
+    parents = ""
+    if kind == "student":
+        parents = " ".join(fields[field] for field in PARENT_FIELDS if fields[field])
+
+    return fields["id"], name, fields["city"], parents
+
+
+def get_terms(query):
+    """Splits a query in words, dropping anything the search syntaxes could choke on"""
+
+    return re.findall(r"\w+", query)[:10]
+
+
+class SQLiteBackend:
+    """
+    FTS5 rows are keyed by a rowid made of 60 of the random bits of the
+    person's uuid, so they can be replaced and deleted without a lookup.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    @staticmethod
+    def rowid(person_id):
+        return person_id.int >> 68
+
+    def index(self, kind, documents):
+        """Indexes ``documents``, a list of (person_id, name, city, parents)"""
+
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                "INSERT OR REPLACE INTO %s (rowid, kind, person_id, name, city, parents) "
+                "VALUES (%%s, %%s, %%s, %%s, %%s, %%s)" % TABLE,
+                [
+                    (self.rowid(person_id), kind, person_id.hex, *texts)
+                    for person_id, *texts in documents
+                ],
+            )
+
+    def remove(self, kind, person_ids):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                "DELETE FROM %s WHERE rowid = %%s" % TABLE,
+                [(self.rowid(person_id),) for person_id in person_ids],
+            )
+
+    def clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute("DELETE FROM %s" % TABLE)
+
+    def search(self, terms, limit, offset):
+        # Every term must match the start of a word, names weigh the most
+        match = " ".join('"%s"*' % term for term in terms)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT kind, person_id, bm25(%s, 0, 0, 10.0, 2.0, 1.0) AS rank "
+                "FROM %s WHERE %s MATCH %%s ORDER BY rank LIMIT %%s OFFSET %%s"
+                % (TABLE, TABLE, TABLE),
+                [match, limit, offset],
+            )
+            return [(kind, person_id, -rank) for kind, person_id, rank in cursor.fetchall()]
+
+
+class PostgreSQLBackend:
+    DOCUMENT = (
+        "setweight(to_tsvector('simple', %s), 'A') || "
+        "setweight(to_tsvector('simple', %s), 'B') || "
+        "setweight(to_tsvector('simple', %s), 'C')"
+    )
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def index(self, kind, documents):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                "INSERT INTO %s (kind, person_id, document) VALUES (%%s, %%s, %s) "
+                "ON CONFLICT (kind, person_id) DO UPDATE SET document = EXCLUDED.document"
+                % (TABLE, self.DOCUMENT),
+                [(kind, person_id, *texts) for person_id, *texts in documents],
+            )
+
+    def remove(self, kind, person_ids):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM %s WHERE kind = %%s AND person_id = ANY(%%s)" % TABLE,
+                [kind, list(person_ids)],
+            )
+
+    def clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute("TRUNCATE %s" % TABLE)
+
+    def search(self, terms, limit, offset):
+        tsquery = " & ".join("%s:*" % term for term in terms)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT kind, person_id, ts_rank(document, query) AS rank "
+                "FROM %s, to_tsquery('simple', %%s) query WHERE document @@ query "
+                "ORDER BY rank DESC LIMIT %%s OFFSET %%s" % TABLE,
+                [tsquery, limit, offset],
+            )
+            return cursor.fetchall()
+
+
+class FallbackBackend:
+    """Prefix search on the names, for databases without a full text index"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def index(self, kind, documents):
+        pass
+
+    def remove(self, kind, person_ids):
+        pass
+
+    def clear(self):
+        pass
+
+    def search(self, terms, limit, offset):
+        results = []
+        for kind, model in KINDS.items():
+            queryset = model.objects.using(self.connection.alias).order_by("last_name")
+            for term in terms:
+                queryset = queryset.filter(
+                    Q(last_name__istartswith=term) | Q(first_name__istartswith=term)
+                )
+            ids = queryset.values_list("pk", flat=True)[: offset + limit]
+            results += [(kind, pk, 0.0) for pk in ids]
+
+        return results[offset : offset + limit]
+
+
+BACKENDS = {
+    "sqlite": SQLiteBackend,
+    "postgresql": PostgreSQLBackend,
+}
+
+
+def get_backend(using=None):
+    connection = connections[using or router.db_for_write(Student)]
+    return BACKENDS.get(connection.vendor, FallbackBackend)(connection)
+
+
+def index_people(people):
+    """Indexes, or re-indexes, a list of Student or Teacher instances"""
+
+    backend = get_backend()
+    for kind, fields in DOCUMENT_FIELDS.items():
+        documents = [
+            make_document(kind, {field: getattr(person, field) for field in fields})
+            for person in people
+            if get_kind(person) == kind
+        ]
+        if documents:
+            backend.index(kind, documents)
+
+
+def remove_people(people):
+    backend = get_backend()
+    for kind in KINDS:
+        person_ids = [person.pk for person in people if get_kind(person) == kind]
+        if person_ids:
+            backend.remove(kind, person_ids)
+
+
+def rebuild_index(chunk_size=2000, log=None):
+    """
+    Rebuilds the whole index, streaming people from the database ``chunk_size``
+    rows at a time with only the indexed columns. Returns the number indexed.
+    """
+
+    backend = get_backend()
+    backend.clear()
+    total = 0
+
+    for kind, model in KINDS.items():
+        rows = model.objects.order_by().values(*DOCUMENT_FIELDS[kind])
+        chunk = []
+        for row in rows.iterator(chunk_size=chunk_size):
+            chunk.append(make_document(kind, row))
+            if len(chunk) == chunk_size:
+                backend.index(kind, chunk)
+                total += len(chunk)
+                chunk = []
+                if log:
+                    log(kind, total)
+        if chunk:
+            backend.index(kind, chunk)
+            total += len(chunk)
+
+    return total
+
+
+def search_people(query, limit=20, offset=0):
+    """
+    Returns the people matching every word of ``query`` by prefix, best
+    matches first, as (kind, person) pairs. The people are loaded with one
+    query per kind.
+    """
+
+    terms = get_terms(query)
+    if not terms:
+        return []
+
+    hits = get_backend().search(terms, limit, offset)
+    people = {}
+    for kind, model in KINDS.items():
+        ids = [person_id for hit_kind, person_id, _ in hits if hit_kind == kind]
+        if ids:
+            people[kind] = model.objects.only(*RESULT_FIELDS).in_bulk(ids)
+
+    results = []
+    for kind, person_id, _ in hits:
+        person = people.get(kind, {}).get(_to_pk(person_id))
+        if person is not None:
+            results.append((kind, person))
+
+    return results
+
+
+def _to_pk(person_id):
+    """The uuids come back as hex strings from SQLite and as UUIDs from PostgreSQL"""
+
+    return Student._meta.pk.to_python(person_id)
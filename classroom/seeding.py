@@ -0,0 +1,427 @@
+"""
+Bulk generation of fake data for staging-sized datasets.
+
+The factories create one row per INSERT, plus one query per M2M add in their
+post_generation hooks. That's fine for unit tests but far too slow for tens of
+thousands of people, so here rows are generated in memory as plain dicts and
+written with batched ``bulk_create`` calls inside chunked transactions.
+
+People are generated in shards, each with its own seed derived from the run
+seed, so the output only depends on the seed and the batch size. Shards can be
+spread over a process pool while a single writer, the calling process, inserts
+them as they stream back.
+
+Meant to be used by the setup_test_data management command.
+"""
+
+import itertools
+import random
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from faker import Faker
+
+from users.cache import invalidate_users
+
+from .cache import get_cache
+from .models import Course, Person, Student, Subject, SubjectGroup, Teacher
+
+# Rows generated for every unit of scale, ie --scale 500 seeds 50k students
+SCALE_UNIT = {
+    "subject_groups": 1,
+    "subjects": 2,
+    "teachers": 5,
+    "students": 100,
+    "courses": 4,
+}
+GROUPS_PER_SUBJECT = 3
+TEACHERS_PER_COURSE = 2
+STUDENTS_PER_COURSE = 25
+
+# Every seeded user gets this prefix so a re-run can wipe them precisely
+USERNAME_PREFIX = "seed-"
+
+GENDER_CHOICES = [x[0] for x in Person.GENDER_CHOICES]
+MARITAL_STATUS_CHOICES = [x[0] for x in Person.MARITAL_STATUS_CHOICES]
+BATCH_CHOICES = [x[0] for x in Course.BATCH_CHOICES]
+CLASSROOM_CHOICES = [x[0] for x in Course.CLASSROOM_CHOICES]
+
+
+def sizes_for_scale(scale):
+    """Returns the number of rows to generate for each model at the given scale"""
+
+    return {name: count * scale for name, count in SCALE_UNIT.items()}
+
+
+def make_uuid(rng):
+    """Returns a version 4 uuid drawn from ``rng`` so that seeded runs are reproducible"""
+
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def make_faker(locale, seed):
+    fake = Faker(locale)
+    fake.seed_instance(seed)
+    return fake
+
+
+def make_email(first_name, last_name, number):
+    return "%s%s%s@example.com" % (first_name.lower(), last_name.lower(), number)
+
+
+def person_fields(fake, rng, number):
+    """Returns the fields common to every Person, the same way the factories fill them"""
+
+    first_name = fake.first_name()
+    last_name = fake.last_name()
+
+    return {
+        "id": make_uuid(rng),
+        "first_name": first_name,
+        "last_name": last_name,
+        "dni": rng.randint(10000000, 99999999),
+        "date_of_birth": fake.date_of_birth(minimum_age=15, maximum_age=40),
+        "date_of_admission": fake.date_this_decade(),
+        "email": make_email(first_name, last_name, number),
+        "address1": fake.address(),
+        "address2": fake.address(),
+        "city": fake.city(),
+        "gender": rng.choice(GENDER_CHOICES),
+        "marital_status": rng.choice(MARITAL_STATUS_CHOICES),
+        "phone_number": "+54911%s" % fake.randomize_nb_elements(number=50254191),
+        "active": rng.random() < 0.5,
+    }
+
+
+def teacher_fields(fake, rng, number):
+    fields = person_fields(fake, rng, number)
+    fields["certified"] = rng.random() < 0.5
+    return fields
+
+
+def student_fields(fake, rng, number):
+    fields = person_fields(fake, rng, number)
+    father_first_name = fake.first_name_male()
+    father_last_name = fake.last_name_male()
+    mother_first_name = fake.first_name_female()
+    mother_last_name = fake.last_name_female()
+    fields.update(
+        {
+            "permission_for_photo": rng.random() < 0.5,
+            "father_first_name": father_first_name,
+            "father_last_name": father_last_name,
+            "father_dni": rng.randint(10000000, 99999999),
+            "father_email": make_email(father_first_name, father_last_name, number),
+            "mother_first_name": mother_first_name,
+            "mother_last_name": mother_last_name,
+            "mother_dni": rng.randint(10000000, 99999999),
+            "mother_email": make_email(mother_first_name, mother_last_name, number),
+        }
+    )
+    return fields
+
+
+PEOPLE = {
+    "teacher": (Teacher, teacher_fields),
+    "student": (Student, student_fields),
+}
+
+
+def generate_people(kind, start, count, seed, locale=None):
+    """
+    Returns ``count`` (user, person) pairs of plain dicts for ``kind`` which is
+    either "teacher" or "student", numbered from ``start``.
+
+    Only the standard library and faker are touched here, no ORM, so the rows
+    can be built anywhere and turned into model instances by the writer.
+    """
+
+    _, make_fields = PEOPLE[kind]
+    rng = random.Random(seed)
+    fake = make_faker(locale, seed)
+    rows = []
+
+    for number in range(start, start + count):
+        person = make_fields(fake, rng, number)
+        user = {
+            "username": "%s%s-%s" % (USERNAME_PREFIX, kind, number),
+            "email": person["email"],
+            "first_name": person["first_name"],
+            "last_name": person["last_name"],
+        }
+        rows.append((user, person))
+
+    return rows
+
+
+def generate_catalogue(sizes, seed, locale=None):
+    """Returns the subject groups, subjects and the links between them"""
+
+    rng = random.Random(seed)
+    fake = make_faker(locale, seed)
+
+    groups = [
+        {
+            "id": make_uuid(rng),
+            "name": "Group #%s" % number,
+            "year": rng.randint(1, 6),
+            "active": rng.random() < 0.5,
+        }
+        for number in range(sizes["subject_groups"])
+    ]
+    subjects = [
+        {"id": make_uuid(rng), "name": fake.catch_phrase(), "active": rng.random() < 0.5}
+        for _ in range(sizes["subjects"])
+    ]
+
+    group_ids = [group["id"] for group in groups]
+    links = [
+        (subject["id"], group_id)
+        for subject in subjects
+        for group_id in rng.sample(group_ids, min(GROUPS_PER_SUBJECT, len(group_ids)))
+    ]
+
+    return groups, subjects, links
+
+
+def generate_courses(sizes, subject_ids, teacher_ids, student_ids, seed, locale=None):
+    """Returns the courses along with their teacher and student links"""
+
+    rng = random.Random(seed)
+    fake = make_faker(locale, seed)
+    courses, teacher_links, student_links = [], [], []
+
+    for _ in range(sizes["courses"]):
+        course = {
+            "id": make_uuid(rng),
+            "name": fake.color_name(),
+            "batch": rng.choice(BATCH_CHOICES),
+            "classroom": rng.choice(CLASSROOM_CHOICES),
+            "division": rng.randint(1, 6),
+            "subject_id": rng.choice(subject_ids) if subject_ids else None,
+            "active": rng.random() < 0.5,
+        }
+        courses.append(course)
+
+        for teacher_id in rng.sample(teacher_ids, min(TEACHERS_PER_COURSE, len(teacher_ids))):
+            teacher_links.append((course["id"], teacher_id))
+        for student_id in rng.sample(student_ids, min(STUDENTS_PER_COURSE, len(student_ids))):
+            student_links.append((course["id"], student_id))
+
+    return courses, teacher_links, student_links
+
+
+def shard_seed(seed, kind, start):
+    """Returns the seed of the shard of ``kind`` starting at row ``start``"""
+
+    return "%s-%s-%s" % (seed, kind, start)
+
+
+def people_tasks(kind, count, shard_size, seed, locale=None):
+    """Returns the ``generate_people`` arguments for every shard of ``kind``"""
+
+    return [
+        (kind, start, min(shard_size, count - start), shard_seed(seed, kind, start), locale)
+        for start in range(0, count, shard_size)
+    ]
+
+
+def generate_shards(tasks, workers=1):
+    """
+    Yields ``(task, rows)`` for every ``generate_people`` task, in order.
+
+    With more than one worker the tasks run on a process pool. At most two
+    shards per worker are in flight, so rows stream back to the caller as they
+    are ready instead of piling up in memory while the writer catches up.
+    """
+
+    if workers <= 1:
+        for task in tasks:
+            yield task, generate_people(*task)
+        return
+
+    tasks = iter(tasks)
+    pending = deque()
+
+    # django.setup() makes the models importable in spawned workers as well
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+        for task in itertools.islice(tasks, workers * 2):
+            pending.append((task, executor.submit(generate_people, *task)))
+
+        while pending:
+            task, future = pending.popleft()
+            rows = future.result()
+            for next_task in itertools.islice(tasks, 1):
+                pending.append((next_task, executor.submit(generate_people, *next_task)))
+            yield task, rows
+
+
+class BulkWriter:
+    """
+    Writes generated rows with ``bulk_create``, one transaction per batch,
+    keeping count of the rows written to each table.
+    """
+
+    def __init__(self, batch_size=1000, log=None):
+        self.batch_size = batch_size
+        self.log = log
+        self.counts = {}
+        self.started = time.perf_counter()
+        # An unusable password, computed once instead of once per user
+        self.password = make_password(None)
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    def batches(self, rows):
+        for start in range(0, len(rows), self.batch_size):
+            yield rows[start : start + self.batch_size]
+
+    def record(self, model, count):
+        table = model._meta.db_table
+        self.counts[table] = self.counts.get(table, 0) + count
+        if self.log:
+            self.log(table, self.counts[table], self.rows_per_second)
+
+    def insert(self, model, rows):
+        """Inserts rows given as dicts of field values into ``model``"""
+
+        for batch in self.batches(rows):
+            with transaction.atomic():
+                model.objects.bulk_create(
+                    [model(**row) for row in batch], batch_size=self.batch_size
+                )
+            self.record(model, len(batch))
+
+    def insert_links(self, model, fields, pairs):
+        """Inserts (left, right) id pairs into a many to many through ``model``"""
+
+        left, right = fields
+        self.insert(model, [{left: a, right: b} for a, b in pairs])
+
+    def insert_people(self, model, rows):
+        """
+        Inserts (user, person) pairs. Users are bulk created first and their
+        ids fetched back by username in a single query per batch, as
+        bulk_create doesn't return primary keys on every backend.
+        """
+
+        User = get_user_model()
+
+        for batch in self.batches(rows):
+            with transaction.atomic():
+                User.objects.bulk_create(
+                    [User(password=self.password, **user) for user, _ in batch],
+                    batch_size=self.batch_size,
+                )
+                user_ids = dict(
+                    User.objects.filter(
+                        username__in=[user["username"] for user, _ in batch]
+                    ).values_list("username", "id")
+                )
+                model.objects.bulk_create(
+                    [
+                        model(user_id=user_ids[user["username"]], **person)
+                        for user, person in batch
+                    ],
+                    batch_size=self.batch_size,
+                )
+            self.record(User, len(batch))
+            self.record(model, len(batch))
+
+
+def raw_delete(queryset):
+    """
+    Deletes the rows of ``queryset``, after the rows which point at them, with
+    one DELETE per table. Unlike ``QuerySet.delete()`` nothing is loaded and
+    no signal is sent, whatever the number of rows.
+    """
+
+    for field in queryset.model._meta.get_fields(include_hidden=True):
+        # The foreign keys to the model, the links of its many to many fields included
+        if field.auto_created and not field.concrete and (field.one_to_many or field.one_to_one):
+            related = field.related_model._base_manager.filter(
+                **{"%s__in" % field.field.name: queryset}
+            )
+            raw_delete(related)
+
+    queryset._raw_delete(queryset.db)
+
+
+def delete_seeded_data():
+    """
+    Wipes the classroom tables along with the users created by previous seeds.
+
+    The receivers which keep the search index, the counters, the statistics
+    and the caches in sync would run a few queries per row, so rows are deleted
+    in bulk without them. The search index, counters and statistics are rebuilt
+    after seeding, the course cache is cleared and the cached users of the
+    people deleted are dropped here.
+    """
+
+    user_ids = [
+        *Teacher.objects.order_by().values_list("user_id", flat=True),
+        *Student.objects.order_by().values_list("user_id", flat=True),
+    ]
+
+    with transaction.atomic():
+        raw_delete(Course.objects.all())
+        raw_delete(Subject.objects.all())
+        raw_delete(SubjectGroup.objects.all())
+        raw_delete(get_user_model().objects.filter(username__startswith=USERNAME_PREFIX))
+        raw_delete(Teacher.objects.all())
+        raw_delete(Student.objects.all())
+
+    get_cache().clear()
+    invalidate_users(user_ids)
+
+
+def seed(writer, sizes, seed, locale=None, workers=1):
+    """
+    Generates and writes a whole dataset of the given sizes. People, by far
+    the most expensive rows to fake, are generated on ``workers`` processes.
+    """
+
+    groups, subjects, subject_links = generate_catalogue(sizes, seed, locale)
+    writer.insert(SubjectGroup, groups)
+    writer.insert(Subject, subjects)
+    writer.insert_links(Subject.groups.through, ("subject_id", "subjectgroup_id"), subject_links)
+
+    tasks = []
+    people_ids = {}
+    for kind in PEOPLE:
+        tasks += people_tasks(kind, sizes["%ss" % kind], writer.batch_size, seed, locale)
+        people_ids[kind] = []
+
+    for task, rows in generate_shards(tasks, workers):
+        kind = task[0]
+        model, _ = PEOPLE[kind]
+        writer.insert_people(model, rows)
+        people_ids[kind].extend(person["id"] for _, person in rows)
+
+    courses, teacher_links, student_links = generate_courses(
+        sizes,
+        [subject["id"] for subject in subjects],
+        people_ids["teacher"],
+        people_ids["student"],
+        seed,
+        locale,
+    )
+    writer.insert(Course, courses)
+    writer.insert_links(Course.teachers.through, ("course_id", "teacher_id"), teacher_links)
+    writer.insert_links(Course.students.through, ("course_id", "student_id"), student_links)
@@ -0,0 +1,227 @@
+"""
+Signal receivers of the classroom app. Connected in ClassroomConfig.ready()
+
+They keep the people search index of ``classroom.search``, the per-teacher
+course cache and the course page fragments of ``classroom.cache``, the
+enrollment counters of ``classroom.counters`` and the school statistics of
+``classroom.statistics`` in sync with the database. For
+the cache, teachers and courses are invalidated right away, so the rest of the
+transaction sees fresh data, and once more on commit, so data cached by a
+concurrent request from before the commit isn't served afterwards.
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import statistics
+from .cache import invalidate_courses, invalidate_teachers
+from .conflicts import check_room, check_teacher_courses, check_teachers
+from .counters import m2m_links_changed, row_deleted
+from .models import Course, Student, Subject, SubjectGroup, Teacher
+from .search import index_people, remove_people
+
+CourseTeachers = Course.teachers.through
+CourseStudents = Course.students.through
+
+
+def teachers_of(course_ids):
+    return set(
+        CourseTeachers.objects.filter(course_id__in=course_ids).values_list(
+            "teacher_id", flat=True
+        )
+    )
+
+
+def invalidate(teacher_ids):
+    teacher_ids = set(teacher_ids)
+    invalidate_teachers(teacher_ids)
+    transaction.on_commit(lambda: invalidate_teachers(teacher_ids))
+
+
+def invalidate_rosters(course_ids):
+    course_ids = set(course_ids)
+    invalidate_courses(course_ids)
+    transaction.on_commit(lambda: invalidate_courses(course_ids))
+
+
+def people_changed(model, person_ids):
+    """Invalidates the rosters of the courses of the given students or teachers"""
+
+    if model is Student:
+        links = CourseStudents.objects.filter(student_id__in=person_ids)
+    else:
+        links = CourseTeachers.objects.filter(teacher_id__in=person_ids)
+
+    invalidate_rosters(links.values_list("course_id", flat=True))
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_save, sender=Teacher)
+def person_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_people([instance])
+
+
+@receiver(post_delete, sender=Student)
+@receiver(post_delete, sender=Teacher)
+def person_deleted(sender, instance, **kwargs):
+    remove_people([instance])
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_save, sender=Teacher)
+@receiver(pre_delete, sender=Student)
+@receiver(pre_delete, sender=Teacher)
+def roster_person_changed(sender, instance, raw=False, **kwargs):
+    # pre_delete as the course links are gone by post_delete
+    if not raw:
+        people_changed(sender, [instance.pk])
+
+
+@receiver(m2m_changed, sender=CourseStudents)
+@receiver(m2m_changed, sender=CourseTeachers)
+def enrollment_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    m2m_links_changed(sender, instance, action, reverse, pk_set)
+
+
+@receiver(pre_delete, sender=Course)
+@receiver(pre_delete, sender=Student)
+@receiver(pre_delete, sender=Teacher)
+def enrollment_deleted(sender, instance, **kwargs):
+    # The links are deleted along with the row without any m2m_changed
+    row_deleted(instance)
+
+
+@receiver(m2m_changed, sender=CourseStudents)
+@receiver(m2m_changed, sender=CourseTeachers)
+def statistics_links_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    statistics.m2m_links_changed(sender, instance, action, reverse, pk_set)
+
+
+@receiver(pre_save, sender=Course)
+@receiver(pre_save, sender=Student)
+@receiver(pre_save, sender=Teacher)
+def statistics_row_saving(sender, instance, raw=False, **kwargs):
+    if not raw:
+        statistics.row_saving(instance)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Student)
+@receiver(post_save, sender=Teacher)
+def statistics_row_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        statistics.row_saved(instance)
+
+
+@receiver(pre_delete, sender=Course)
+@receiver(pre_delete, sender=Student)
+@receiver(pre_delete, sender=Teacher)
+def statistics_row_deleted(sender, instance, **kwargs):
+    statistics.row_deleted(instance)
+
+
+@receiver(m2m_changed, sender=Subject.groups.through)
+def statistics_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    statistics.subject_groups_changed(instance, action, reverse, pk_set)
+
+
+@receiver(post_delete, sender=SubjectGroup)
+def statistics_group_deleted(sender, instance, **kwargs):
+    statistics.group_deleted(instance)
+
+
+@receiver(pre_save, sender=Course)
+def course_booked(sender, instance, raw=False, **kwargs):
+    if not settings.STRICT_BOOKINGS or raw:
+        return
+
+    check_room(instance)
+    if not instance._state.adding:
+        # The batch may have moved under the teachers
+        teacher_ids = CourseTeachers.objects.filter(course=instance).values_list(
+            "teacher_id", flat=True
+        )
+        check_teachers(instance, list(teacher_ids))
+
+
+@receiver(m2m_changed, sender=CourseTeachers)
+def teachers_booked(sender, instance, action, reverse, pk_set, **kwargs):
+    if not settings.STRICT_BOOKINGS or action != "pre_add" or not pk_set:
+        return
+
+    if reverse:
+        # instance is a teacher and pk_set holds courses
+        check_teacher_courses(instance.pk, pk_set)
+    else:
+        check_teachers(instance, pk_set)
+
+
+@receiver(post_save, sender=Course)
+@receiver(pre_delete, sender=Course)
+def course_changed(sender, instance, **kwargs):
+    # pre_delete as the teacher links are gone by post_delete
+    invalidate(teachers_of([instance.pk]))
+
+
+@receiver(post_save, sender=Subject)
+@receiver(pre_delete, sender=Subject)
+def subject_changed(sender, instance, **kwargs):
+    course_ids = Course.objects.filter(subject=instance).values("pk")
+    invalidate(teachers_of(course_ids))
+
+
+@receiver(post_save, sender=Teacher)
+@receiver(post_delete, sender=Teacher)
+def teacher_changed(sender, instance, **kwargs):
+    invalidate([instance.pk])
+
+
+@receiver(pre_delete, sender=Teacher)
+def teacher_deleted(sender, instance, **kwargs):
+    # Their colleagues' lists show a teacher count which is about to change
+    course_ids = CourseTeachers.objects.filter(teacher=instance).values("course_id")
+    invalidate(teachers_of(course_ids))
+
+
+@receiver(pre_delete, sender=Student)
+def student_deleted(sender, instance, **kwargs):
+    # Their teachers' lists show a student count which is about to change
+    course_ids = CourseStudents.objects.filter(student=instance).values("course_id")
+    invalidate(teachers_of(course_ids))
+
+
+@receiver(m2m_changed, sender=CourseTeachers)
+def course_teachers_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("pre_clear", "post_add", "post_remove"):
+        return
+
+    if reverse:
+        # instance is a teacher and pk_set holds courses
+        course_ids = pk_set or CourseTeachers.objects.filter(teacher=instance).values_list(
+            "course_id", flat=True
+        )
+        invalidate(teachers_of(course_ids) | {instance.pk})
+        invalidate_rosters(course_ids)
+    else:
+        invalidate(teachers_of([instance.pk]) | set(pk_set or ()))
+        invalidate_rosters([instance.pk])
+
+
+@receiver(m2m_changed, sender=CourseStudents)
+def course_students_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("pre_clear", "post_add", "post_remove"):
+        return
+
+    if reverse:
+        # instance is a student and pk_set holds courses
+        course_ids = pk_set or CourseStudents.objects.filter(student=instance).values_list(
+            "course_id", flat=True
+        )
+    else:
+        course_ids = [instance.pk]
+
+    invalidate(teachers_of(course_ids))
+    invalidate_rosters(course_ids)
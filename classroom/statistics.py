@@ -0,0 +1,298 @@
+"""
+School statistics for the dashboard.
+
+``Statistic`` rows hold counts of the enrollments per subject group and per
+batch: students, by gender and marital status, those with permission for
+photos, teachers and certified teachers. Rates and distributions are worked
+out from them as the dashboard reads them, so it only ever reads a few rows
+per group and batch whatever the size of the school.
+
+The unit is the enrollment, a link of a course to a student or a teacher,
+counted in the batch of the course and in every group of its subject. A
+student in two courses of a group counts twice, which is what lets a change
+be applied as a delta without knowing the rest of the student's courses.
+
+The receivers in ``classroom.signals`` keep the counts up to date: a change of
+links adds or removes their share, and a change of a field the counts depend
+on, like a student's gender or a course's batch, moves the share of the links
+of the row from the old values to the new ones. Shares are computed with one
+grouped query per dimension and applied with ``value = value + n`` updates.
+Writes which skip the signals must be followed by ``rebuild_statistics``,
+also run by ``manage.py rebuild_statistics``.
+"""
+
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import Course, Person, Statistic, Student, Subject, SubjectGroup, Teacher
+
+CourseStudents = Course.students.through
+CourseTeachers = Course.teachers.through
+
+# Where the key of every dimension comes from, seen from a link
+DIMENSIONS = {
+    Statistic.BATCH: "course__batch",
+    Statistic.GROUP: "course__subject__groups",
+}
+
+STUDENT_FIELDS = ("student__gender", "student__marital_status", "student__permission_for_photo")
+TEACHER_FIELDS = ("teacher__certified",)
+
+# The fields of a row which the counts of its links depend on
+TRACKED_FIELDS = {
+    Student: ("gender", "marital_status", "permission_for_photo"),
+    Teacher: ("certified",),
+    Course: ("batch", "subject_id"),
+}
+
+
+def student_metrics(gender, marital_status, photo):
+    metrics = ["enrollments", "gender_%s" % gender, "marital_status_%s" % marital_status]
+    if photo:
+        metrics.append("photo")
+    return metrics
+
+
+def teacher_metrics(certified):
+    return ["teachers", "certified"] if certified else ["teachers"]
+
+
+def count_links(totals, through, filters, fields, get_metrics):
+    for dimension, key_field in DIMENSIONS.items():
+        rows = (
+            through.objects.filter(**filters)
+            .order_by()
+            .values(key_field, *fields)
+            .annotate(count=Count("*"))
+            .values_list(key_field, *fields, "count")
+        )
+        for key, *values, count in rows:
+            if key is None:
+                # A course without a subject, or a subject without groups
+                continue
+            for metric in get_metrics(*values):
+                totals[dimension, str(key), metric] += count
+
+
+def get_counts(students=None, teachers=None):
+    """
+    Returns the counts of the student links matching the ``students`` filters
+    and of the teacher links matching ``teachers``, by (dimension, key, metric).
+    """
+
+    totals = Counter()
+    if students is not None:
+        count_links(totals, CourseStudents, students, STUDENT_FIELDS, student_metrics)
+    if teachers is not None:
+        count_links(totals, CourseTeachers, teachers, TEACHER_FIELDS, teacher_metrics)
+    return totals
+
+
+def apply_changes(changes):
+    """Adds ``changes``, a mapping of (dimension, key, metric) to a delta, to the counts"""
+
+    changes = {metric: delta for metric, delta in changes.items() if delta}
+    if not changes:
+        return
+
+    Statistic.objects.bulk_create(
+        [
+            Statistic(dimension=dimension, key=key, metric=metric)
+            for dimension, key, metric in changes
+        ],
+        ignore_conflicts=True,
+    )
+
+    # One UPDATE per distinct delta, usually one or two for the whole change
+    by_delta = defaultdict(list)
+    for (dimension, key, metric), delta in changes.items():
+        by_delta[delta].append(Q(dimension=dimension, key=key, metric=metric))
+
+    for delta, conditions in by_delta.items():
+        query = Q()
+        for condition in conditions:
+            query |= condition
+        Statistic.objects.filter(query).update(value=F("value") + delta)
+
+
+def apply_difference(before, after):
+    changes = Counter(after)
+    changes.subtract(before)
+    apply_changes(changes)
+
+
+def get_link_filters(model, pks):
+    """The filters of ``get_counts`` selecting the links of rows of ``model``"""
+
+    if model is Student:
+        return {"students": {"student_id__in": pks}}
+    if model is Teacher:
+        return {"teachers": {"teacher_id__in": pks}}
+    if model is Subject:
+        return {
+            "students": {"course__subject_id__in": pks},
+            "teachers": {"course__subject_id__in": pks},
+        }
+    return {"students": {"course_id__in": pks}, "teachers": {"course_id__in": pks}}
+
+
+@contextmanager
+def tracking(model, pks):
+    """Moves the counts of the links of the rows for the changes made inside the block"""
+
+    filters = get_link_filters(model, list(pks))
+    before = get_counts(**filters)
+    yield
+    apply_difference(before, get_counts(**filters))
+
+
+def row_saving(instance):
+    """Keeps the counts of the links of a row about to be saved, if their fields change"""
+
+    instance._statistics = None
+    if instance._state.adding:
+        return
+
+    fields = TRACKED_FIELDS[type(instance)]
+    old = type(instance).objects.filter(pk=instance.pk).values_list(*fields).first()
+    if old is not None and old != tuple(getattr(instance, field) for field in fields):
+        instance._statistics = get_counts(**get_link_filters(type(instance), [instance.pk]))
+
+
+def row_saved(instance):
+    before = getattr(instance, "_statistics", None)
+    if before is not None:
+        apply_difference(before, get_counts(**get_link_filters(type(instance), [instance.pk])))
+        instance._statistics = None
+
+
+def row_deleted(instance):
+    apply_changes(
+        {
+            metric: -count
+            for metric, count in get_counts(
+                **get_link_filters(type(instance), [instance.pk])
+            ).items()
+        }
+    )
+
+
+def m2m_links_changed(through, instance, action, reverse, pk_set):
+    """Counts a change of the students or teachers of courses, as sent by m2m_changed"""
+
+    person_field = "student_id" if through is CourseStudents else "teacher_id"
+    own, others = ("course_id", person_field) if not reverse else (person_field, "course_id")
+    kind = "students" if through is CourseStudents else "teachers"
+
+    if action == "post_add":
+        # pk_set only holds the links which were actually created
+        apply_changes(get_counts(**{kind: {own: instance.pk, others + "__in": pk_set}}))
+    elif action in ("pre_remove", "pre_clear"):
+        filters = {own: instance.pk}
+        if action == "pre_remove":
+            filters[others + "__in"] = pk_set
+        apply_changes({metric: -n for metric, n in get_counts(**{kind: filters}).items()})
+
+
+def subject_groups_changed(instance, action, reverse, pk_set):
+    """Moves the counts of the courses of subjects whose groups change, as sent by m2m_changed"""
+
+    if action.startswith("pre_"):
+        if not reverse:
+            subject_ids = [instance.pk]
+        elif action == "pre_clear":
+            subject_ids = list(instance.subject_set.values_list("pk", flat=True))
+        else:
+            subject_ids = list(pk_set)
+        filters = get_link_filters(Subject, subject_ids)
+        instance._statistics = (filters, get_counts(**filters))
+    elif getattr(instance, "_statistics", None) is not None:
+        filters, before = instance._statistics
+        apply_difference(before, get_counts(**filters))
+        instance._statistics = None
+
+
+def group_deleted(instance):
+    Statistic.objects.filter(dimension=Statistic.GROUP, key=str(instance.pk)).delete()
+
+
+def rebuild_statistics():
+    """Recomputes every count from the links, returns the number of rows"""
+
+    totals = get_counts(students={}, teachers={})
+    with transaction.atomic():
+        Statistic.objects.all().delete()
+        Statistic.objects.bulk_create(
+            [
+                Statistic(dimension=dimension, key=key, metric=metric, value=value)
+                for (dimension, key, metric), value in totals.items()
+            ],
+            batch_size=1000,
+        )
+
+    return len(totals)
+
+
+def share(part, whole):
+    """``part`` as a percentage of ``whole``"""
+
+    return round(100 * part / whole, 1) if whole else None
+
+
+def summarize(label, metrics):
+    enrollments = metrics.get("enrollments", 0)
+    teachers = metrics.get("teachers", 0)
+
+    return {
+        "label": label,
+        "enrollments": enrollments,
+        "genders": [
+            (name, share(metrics.get("gender_%s" % code, 0), enrollments))
+            for code, name in Person.GENDER_CHOICES
+        ],
+        "marital_statuses": [
+            (name, share(metrics.get("marital_status_%s" % code, 0), enrollments))
+            for code, name in Person.MARITAL_STATUS_CHOICES
+        ],
+        "photo_rate": share(metrics.get("photo", 0), enrollments),
+        "teachers": teachers,
+        "certified_rate": share(metrics.get("certified", 0), teachers),
+    }
+
+
+def get_dashboard():
+    """
+    Returns the summaries of every batch, of the whole school and of every
+    subject group. Reads the statistics and the names of the groups, both as
+    many rows as there are groups and batches.
+    """
+
+    metrics = defaultdict(dict)
+    for dimension, key, metric, value in Statistic.objects.values_list(
+        "dimension", "key", "metric", "value"
+    ):
+        metrics[dimension, key][metric] = value
+
+    batches = [
+        summarize(name, metrics[Statistic.BATCH, code]) for code, name in Course.BATCH_CHOICES
+    ]
+
+    # Every link is in exactly one batch, so their sum is the school's
+    total = Counter()
+    for code, _ in Course.BATCH_CHOICES:
+        total.update(metrics[Statistic.BATCH, code])
+
+    group_keys = [key for dimension, key in metrics if dimension == Statistic.GROUP]
+    groups = SubjectGroup.objects.filter(pk__in=group_keys).order_by("year", "name", "pk")
+
+    return {
+        "batches": batches,
+        "total": summarize("Total", total),
+        "groups": [
+            dict(summarize(group.name, metrics[Statistic.GROUP, str(group.pk)]), year=group.year)
+            for group in groups.only("name", "year")
+        ],
+    }
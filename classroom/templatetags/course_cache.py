@@ -0,0 +1,61 @@
+"""
+The ``coursecache`` tag caches a fragment of a course page until the course
+changes, see ``classroom.cache``. Usage::
+
+    {% load course_cache %}
+    {% coursecache course "roster" page_number %}
+        ...
+    {% endcoursecache %}
+
+The first argument is the course, the second names the fragment and any others
+are values the fragment varies on, like a page number.
+"""
+
+from django import template
+
+from classroom.cache import count_fragment, fragment_key, get_cache
+
+register = template.Library()
+
+
+class CourseCacheNode(template.Node):
+    def __init__(self, nodelist, course, name, vary_on):
+        self.nodelist = nodelist
+        self.course = course
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        course = self.course.resolve(context)
+        key = fragment_key(
+            course,
+            self.name.resolve(context),
+            [variable.resolve(context) for variable in self.vary_on],
+        )
+
+        cache = get_cache()
+        value = cache.get(key)
+        count_fragment(hit=value is not None)
+        if value is None:
+            value = self.nodelist.render(context)
+            cache.set(key, value)
+
+        return value
+
+
+@register.tag("coursecache")
+def do_coursecache(parser, token):
+    nodelist = parser.parse(("endcoursecache",))
+    parser.delete_first_token()
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(
+            "%r tag requires at least a course and a fragment name." % bits[0]
+        )
+
+    return CourseCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        parser.compile_filter(bits[2]),
+        [parser.compile_filter(bit) for bit in bits[3:]],
+    )
@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from classroom.factories import StudentFactory
+from classroom.models import Student
+from classroom.pagination import EstimatedCountPaginator
+from main.testing import QueryBudgetMixin
+
+
+class PersonChangelistTests(QueryBudgetMixin, TestCase):
+    """The people changelists search through the indexes and cost the same at any size"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "x")
+        StudentFactory.create_batch(30, first_name="Other", last_name="Other")
+        cls.student = StudentFactory(first_name="Ana", last_name="Zubiri", dni=12345678)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.url = reverse("admin:classroom_student_changelist")
+
+    def search(self, term):
+        response = self.client.get(self.url, {"q": term})
+        return list(response.context["cl"].result_list)
+
+    def test_dni(self):
+        self.assertEqual(self.search("12345678"), [self.student])
+        self.assertEqual(self.search(" 12345678 "), [self.student])
+        self.assertEqual(self.search("1234"), [])
+        self.assertEqual(self.search("1" * 20), [])
+
+    def test_name_prefix(self):
+        self.assertEqual(self.search("zub"), [self.student])
+        self.assertEqual(self.search("Ana"), [self.student])
+        # Prefixes only, not any substring
+        self.assertEqual(self.search("ubiri"), [])
+
+    def test_paginator(self):
+        changelist = self.client.get(self.url).context["cl"]
+        self.assertIsInstance(changelist.paginator, EstimatedCountPaginator)
+        # Not PostgreSQL, the rows are counted
+        self.assertEqual(changelist.paginator.count, Student.objects.count())
+
+    def test_query_budget(self):
+        # The count and the page with the users joined, the session and user are cached
+        self.client.get(self.url)
+        response = self.assertQueryBudget(self.url, 2)
+        self.assertEqual(len(response.context["cl"].result_list), 31)
@@ -0,0 +1,121 @@
+from datetime import date, timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+
+from classroom.attendance import (
+    get_absence_rates,
+    get_daily_rates,
+    mark_class,
+    mark_students,
+    pack,
+    unpack,
+)
+from classroom.factories import CourseFactory, StudentFactory, TeacherFactory
+from classroom.models import Attendance, RosterPosition, Student
+
+MONDAY = date(2021, 5, 3)
+
+
+class AttendanceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.students = StudentFactory.create_batch(10)
+        cls.teacher = TeacherFactory()
+        cls.course = CourseFactory(students=cls.students, teachers=[cls.teacher])
+
+    def test_bitmaps(self):
+        flags = [True, False, False, True, True, False, False, False, False, True]
+        self.assertEqual(pack(flags), bytes([0b00011001, 0b10]))
+        self.assertEqual(
+            unpack([pack(flags), b"\x01"], 10).tolist(), [flags, [True] + [False] * 9]
+        )
+
+    def test_mark_class(self):
+        absent = self.students[3]
+        attendance = mark_class(self.course, MONDAY, exceptions=[absent.pk])
+
+        self.assertEqual((attendance.size, len(attendance.enrolled)), (10, 2))
+        self.assertEqual(
+            get_daily_rates([self.course]),
+            [
+                {
+                    "course": self.course.pk,
+                    "date": MONDAY,
+                    "enrolled": 10,
+                    "present": 9,
+                    "rate": 0.9,
+                }
+            ],
+        )
+
+        # Marked again, one row still
+        mark_class(self.course, MONDAY, present=False)
+        mark_students(self.course, MONDAY, [absent.pk])
+        self.assertEqual(Attendance.objects.count(), 1)
+        self.assertEqual(get_daily_rates([self.course])[0]["present"], 1)
+
+    def test_stable_positions(self):
+        mark_class(self.course, MONDAY)
+        positions = dict(RosterPosition.objects.values_list("student_id", "position"))
+
+        leaving, joining = self.students[0], StudentFactory()
+        self.course.students.remove(leaving)
+        self.course.students.add(joining)
+        mark_class(self.course, MONDAY + timedelta(days=1))
+
+        new_positions = dict(RosterPosition.objects.values_list("student_id", "position"))
+        self.assertEqual(new_positions[joining.pk], 10)
+        del new_positions[joining.pk]
+        self.assertEqual(new_positions, positions)
+
+        rates = get_absence_rates(self.course)
+        self.assertEqual(rates[leaving.pk], {"days": 1, "absences": 0, "rate": 0.0})
+        self.assertEqual(rates[joining.pk], {"days": 1, "absences": 0, "rate": 0.0})
+        self.assertEqual(rates[self.students[1].pk]["days"], 2)
+
+    def test_deleted_students_positions(self):
+        mark_class(self.course, MONDAY)
+        positions = dict(RosterPosition.objects.values_list("position", "student_id"))
+        # The last position, and one in the middle so the roster has a gap
+        Student.objects.filter(pk__in=[positions[9], positions[4]]).delete()
+
+        joining = StudentFactory()
+        self.course.students.add(joining)
+        mark_class(self.course, MONDAY + timedelta(days=1), exceptions=[joining.pk])
+
+        self.assertEqual(RosterPosition.objects.get(student=joining).position, 10)
+        rates = get_absence_rates(self.course)
+        self.assertEqual(rates[joining.pk], {"days": 1, "absences": 1, "rate": 1.0})
+        self.assertEqual(rates[positions[8]]["days"], 2)
+
+    def test_absence_rates(self):
+        student = self.students[5]
+        for day in range(4):
+            mark_class(self.course, MONDAY + timedelta(days=day), exceptions=[student.pk][day:])
+
+        with self.assertNumQueries(2):
+            rates = get_absence_rates(self.course, start=MONDAY, end=MONDAY + timedelta(days=3))
+
+        self.assertEqual(rates[student.pk], {"days": 4, "absences": 1, "rate": 0.25})
+        self.assertEqual(rates[self.students[0].pk]["absences"], 0)
+        self.assertEqual(len(get_absence_rates(self.course, start=MONDAY + timedelta(days=1))), 10)
+        self.assertEqual(get_absence_rates(self.course, end=MONDAY - timedelta(days=1)), {})
+
+    def test_view(self):
+        url = reverse("classroom:course_attendance", args=[self.course.pk])
+        self.client.force_login(self.teacher.user)
+
+        response = self.client.post(
+            url, {"date": "2021-05-03", "status": "present", "except": [self.students[0].pk]}
+        )
+        self.assertEqual(response.json()["days"][0]["present"], 9)
+
+        response = self.client.get(url, {"start": "2021-05-01"})
+        self.assertEqual(response.json()["students"][str(self.students[0].pk)]["absences"], 1)
+
+        self.assertEqual(self.client.post(url, {"status": "late"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"start": "May"}).status_code, 400)
+
+        self.client.force_login(TeacherFactory().user)
+        self.assertEqual(self.client.get(url).status_code, 403)
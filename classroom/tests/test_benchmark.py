@@ -0,0 +1,26 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from classroom.models import Course, Student, Teacher
+
+
+class BenchmarkCommandTests(TestCase):
+    def test_benchmark(self):
+        out = StringIO()
+        call_command(
+            "benchmark", teachers=2, students=5, courses=2, requests=1, warmup=0, stdout=out
+        )
+
+        report = json.loads(out.getvalue())
+        self.assertEqual(len(report["results"]), 6)
+        for name, result in report["results"].items():
+            self.assertEqual(result["status"], 200, name)
+            self.assertGreaterEqual(result["queries_per_request"], 0)
+
+        # Rolled back
+        for model in (Course, Student, Teacher, get_user_model()):
+            self.assertFalse(model.objects.exists())
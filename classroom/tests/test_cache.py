@@ -0,0 +1,98 @@
+from django.test import TestCase
+
+from classroom.cache import course_summary, get_teacher_courses
+from classroom.factories import CourseFactory, StudentFactory, SubjectFactory, TeacherFactory
+from classroom.models import Course
+
+
+class TeacherCoursesCacheTests(TestCase):
+    """The cached course lists must go stale as soon as what they show changes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = TeacherFactory()
+        cls.colleague = TeacherFactory()
+        cls.students = StudentFactory.create_batch(3)
+        cls.course = CourseFactory(
+            teachers=[cls.teacher, cls.colleague], students=cls.students, active=True
+        )
+
+    def setUp(self):
+        # Cached before every change
+        get_teacher_courses(self.teacher.pk)
+
+    def get_summary(self, teacher=None):
+        (summary,) = get_teacher_courses((teacher or self.teacher).pk)
+        return summary
+
+    def assertFresh(self, teacher=None):
+        course = Course.objects.select_related("subject").get(pk=self.course.pk)
+        self.assertEqual(self.get_summary(teacher), course_summary(course))
+
+    def test_cached(self):
+        # Changes which skip the signals aren't seen
+        Course.objects.filter(pk=self.course.pk).update(name="Skipped")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_summary()["name"], self.course.name)
+
+    def test_student_added(self):
+        self.course.students.add(StudentFactory())
+        self.assertFresh()
+        self.assertEqual(self.get_summary()["student_count"], 4)
+
+    def test_student_added_from_the_student_side(self):
+        StudentFactory().course_set.add(self.course)
+        self.assertEqual(self.get_summary()["student_count"], 4)
+
+    def test_student_removed(self):
+        self.course.students.remove(self.students[0])
+        self.assertEqual(self.get_summary()["student_count"], 2)
+
+    def test_students_cleared(self):
+        self.course.students.clear()
+        self.assertEqual(self.get_summary()["student_count"], 0)
+
+    def test_student_deleted(self):
+        self.students[0].delete()
+        self.assertFresh()
+        self.assertEqual(self.get_summary()["student_count"], 2)
+
+    def test_course_edited(self):
+        self.course.name = "Renamed"
+        self.course.save()
+        self.assertEqual(self.get_summary()["name"], "Renamed")
+        self.assertFresh(self.colleague)
+
+    def test_course_deleted(self):
+        self.course.delete()
+        self.assertEqual(get_teacher_courses(self.teacher.pk), [])
+
+    def test_subject_edited(self):
+        subject = SubjectFactory(name="Before")
+        self.course.subject = subject
+        self.course.save()
+        get_teacher_courses(self.teacher.pk)
+
+        subject.name = "After"
+        subject.save()
+        self.assertFresh()
+
+    def test_teacher_edited(self):
+        Course.objects.filter(pk=self.course.pk).update(name="Skipped")
+        self.teacher.save()
+        self.assertEqual(self.get_summary()["name"], "Skipped")
+
+    def test_teacher_added(self):
+        self.course.teachers.add(TeacherFactory())
+        self.assertEqual(self.get_summary()["teacher_count"], 3)
+
+    def test_teacher_removed(self):
+        self.course.teachers.remove(self.colleague)
+        self.assertEqual(self.get_summary()["teacher_count"], 1)
+        self.assertEqual(get_teacher_courses(self.colleague.pk), [])
+
+    def test_teacher_deleted(self):
+        self.colleague.delete()
+        self.assertFresh()
+        self.assertEqual(self.get_summary()["teacher_count"], 1)
@@ -0,0 +1,77 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from classroom.conflicts import OccupancyIndex, check_room, check_teachers
+from classroom.factories import CourseFactory, TeacherFactory
+from classroom.models import Course
+
+
+class ConflictTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = TeacherFactory()
+        cls.course = CourseFactory(
+            classroom=Course.AULA1, batch=Course.MORNING, active=True, teachers=[cls.teacher]
+        )
+
+    def test_room_double_booked(self):
+        course = Course(name="Other", classroom=Course.AULA1, batch=Course.MORNING)
+
+        with self.assertRaises(ValidationError):
+            check_room(course)
+        with self.assertRaises(ValidationError):
+            course.full_clean()
+
+    def test_room_free(self):
+        check_room(Course(name="Other", classroom=Course.AULA1, batch=Course.EVENING))
+        check_room(Course(name="Other", classroom=Course.AULA2, batch=Course.MORNING))
+        check_room(
+            Course(name="Other", classroom=Course.AULA1, batch=Course.MORNING, active=False)
+        )
+        check_room(self.course)
+
+    def test_teacher_double_booked(self):
+        course = CourseFactory(classroom=Course.AULA2, batch=Course.MORNING, active=True)
+
+        with self.assertRaises(ValidationError):
+            check_teachers(course, [self.teacher.pk])
+
+        course.batch = Course.EVENING
+        check_teachers(course, [self.teacher.pk])
+
+    @override_settings(STRICT_BOOKINGS=True)
+    def test_strict(self):
+        with self.assertRaises(ValidationError):
+            CourseFactory(classroom=Course.AULA1, batch=Course.MORNING, active=True)
+
+        course = CourseFactory(classroom=Course.AULA2, batch=Course.MORNING, active=True)
+        # The error is raised inside the atomic block of add(), which breaks the test transaction
+        with self.assertRaises(ValidationError), transaction.atomic():
+            course.teachers.add(self.teacher)
+        with self.assertRaises(ValidationError), transaction.atomic():
+            self.teacher.course_set.add(course)
+
+        course.batch = Course.EVENING
+        course.save()
+        course.teachers.add(self.teacher)
+
+    def test_report(self):
+        room = CourseFactory(classroom=Course.AULA1, batch=Course.MORNING, active=True)
+        CourseFactory(classroom=Course.AULA1, batch=Course.MORNING, active=False)
+        shared = CourseFactory(
+            classroom=Course.AULA3, batch=Course.MORNING, active=True, teachers=[self.teacher]
+        )
+
+        conflicts = {
+            (conflict.kind, conflict.slot): set(conflict.course_ids)
+            for conflict in OccupancyIndex.build().conflicts()
+        }
+
+        self.assertEqual(
+            conflicts,
+            {
+                ("room", (Course.AULA1, Course.MORNING)): {self.course.pk, room.pk},
+                ("teacher", (self.teacher.pk, Course.MORNING)): {self.course.pk, shared.pk},
+            },
+        )
@@ -0,0 +1,84 @@
+from django.test import TestCase
+
+from classroom.counters import repair_counters
+from classroom.factories import CourseFactory, StudentFactory, TeacherFactory
+from classroom.models import Course, Teacher
+
+
+class EnrollmentCounterTests(TestCase):
+    """The counters must match the enrollments whichever way they change"""
+
+    def setUp(self):
+        self.teachers = TeacherFactory.create_batch(size=2)
+        self.students = StudentFactory.create_batch(size=3)
+        self.course = CourseFactory(teachers=self.teachers, students=self.students)
+
+    def assertCounts(self, student_count, teacher_count):
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.student_count, student_count)
+        self.assertEqual(self.course.teacher_count, teacher_count)
+        for teacher in Teacher.objects.all():
+            self.assertEqual(teacher.course_count, teacher.course_set.count())
+
+    def test_add(self):
+        self.assertCounts(3, 2)
+
+        self.course.students.add(StudentFactory(), *self.students)
+
+        self.assertCounts(4, 2)
+
+    def test_add_from_the_other_side(self):
+        TeacherFactory().course_set.add(self.course)
+
+        self.assertCounts(3, 3)
+
+    def test_remove_only_counts_existing_links(self):
+        self.course.students.remove(self.students[0], StudentFactory())
+
+        self.assertCounts(2, 2)
+
+    def test_clear(self):
+        self.course.teachers.clear()
+        self.course.students.clear()
+
+        self.assertCounts(0, 0)
+
+    def test_clear_from_the_other_side(self):
+        self.teachers[0].course_set.clear()
+
+        self.assertCounts(3, 1)
+
+    def test_set(self):
+        self.course.students.set([self.students[0], StudentFactory()])
+
+        self.assertCounts(2, 2)
+
+    def test_delete_person(self):
+        self.students[0].delete()
+        self.teachers[0].delete()
+
+        self.assertCounts(2, 1)
+
+    def test_delete_course(self):
+        self.course.delete()
+
+        self.assertEqual(set(Teacher.objects.values_list("course_count", flat=True)), {0})
+
+    def test_save_keeps_counters(self):
+        stale = Course.objects.get(pk=self.course.pk)
+        self.course.students.add(StudentFactory())
+
+        stale.name = "Renamed"
+        stale.save()
+
+        self.assertCounts(4, 2)
+
+    def test_repair(self):
+        Course.objects.update(student_count=0, teacher_count=10)
+        Teacher.objects.update(course_count=5)
+
+        fixed = repair_counters()
+
+        self.assertEqual(sum(fixed.values()), 1 + 1 + 2)
+        self.assertCounts(3, 2)
+        self.assertEqual(repair_counters(), dict.fromkeys(fixed, 0))
@@ -0,0 +1,98 @@
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from classroom.exports import ROSTER_COLUMNS, STUDENT_COLUMNS, TEACHER_COLUMNS, export_lines
+from classroom.factories import CourseFactory, StudentFactory, TeacherFactory
+from classroom.models import Student
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_user("staff", is_staff=True)
+        cls.students = StudentFactory.create_batch(4, father_email="father@example.com")
+        cls.teacher = TeacherFactory()
+        cls.course = CourseFactory(students=cls.students[:2], teachers=[cls.teacher])
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def get(self, dataset, fmt):
+        return self.client.get(reverse("classroom:export", args=[dataset, fmt]))
+
+    def read(self, response):
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv(self):
+        response = self.get("students", "csv")
+
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="students.csv"')
+        rows = list(csv.reader(io.StringIO(self.read(response))))
+        self.assertEqual(tuple(rows[0]), STUDENT_COLUMNS)
+        self.assertCountEqual(
+            [row[0] for row in rows[1:]], [str(student.pk) for student in self.students]
+        )
+        father_email = STUDENT_COLUMNS.index("father_email")
+        self.assertEqual({row[father_email] for row in rows[1:]}, {"father@example.com"})
+
+    def test_jsonl(self):
+        response = self.get("teachers", "jsonl")
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        (line,) = self.read(response).splitlines()
+        row = json.loads(line)
+        self.assertEqual(tuple(row), TEACHER_COLUMNS)
+        self.assertEqual((row["id"], row["dni"]), (str(self.teacher.pk), self.teacher.dni))
+
+    def test_roster(self):
+        url = reverse("classroom:course_roster_export", args=[self.course.pk, "csv"])
+        response = self.client.get(url)
+
+        self.assertEqual(
+            response["Content-Disposition"],
+            'attachment; filename="roster-%s.csv"' % self.course.pk,
+        )
+        rows = list(csv.DictReader(io.StringIO(self.read(response))))
+        self.assertEqual(tuple(rows[0]), ROSTER_COLUMNS)
+        self.assertCountEqual(
+            [row["id"] for row in rows], [str(student.pk) for student in self.students[:2]]
+        )
+
+    def test_streamed(self):
+        lines = export_lines(Student.objects.all(), STUDENT_COLUMNS, "csv", chunk_size=2)
+
+        # The header goes out before any query
+        with self.assertNumQueries(0):
+            next(lines)
+        self.assertEqual(len(list(lines)), 4)
+
+    def test_ordered(self):
+        lines = export_lines(Student.objects.all(), ("last_name", "first_name", "id"), "jsonl")
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(rows, sorted(rows, key=lambda row: tuple(row.values())))
+
+    def test_not_found(self):
+        self.assertEqual(self.get("grades", "csv").status_code, 404)
+        self.assertEqual(self.get("students", "xml").status_code, 404)
+        self.assertEqual(self.get("roster", "csv").status_code, 404)
+        url = reverse("classroom:course_roster_export", args=[self.students[0].pk, "csv"])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        url = reverse("classroom:course_roster_export", args=[self.course.pk, "xml"])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_permissions(self):
+        url = reverse("classroom:course_roster_export", args=[self.course.pk, "csv"])
+
+        self.client.force_login(self.teacher.user)
+        self.assertEqual(self.get("students", "csv").status_code, 403)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.logout()
+        self.assertEqual(self.get("students", "csv").status_code, 302)
@@ -0,0 +1,117 @@
+from decimal import Decimal
+
+import numpy as np
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.urls import reverse
+
+from classroom.factories import (
+    CourseFactory,
+    StudentFactory,
+    SubjectFactory,
+    SubjectGroupFactory,
+    TeacherFactory,
+)
+from classroom.gradebook import describe, get_course_statistics, get_group_statistics, save_grades
+from classroom.models import Grade
+
+
+class GradebookTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.groups = SubjectGroupFactory.create_batch(2)
+        cls.subject = SubjectFactory(groups=cls.groups)
+        cls.students = StudentFactory.create_batch(5)
+        cls.teacher = TeacherFactory()
+        cls.course = CourseFactory(
+            subject=cls.subject, students=cls.students, teachers=[cls.teacher]
+        )
+        cls.other = CourseFactory(subject=SubjectFactory(groups=cls.groups[:1]))
+
+    def grades(self, *values):
+        return {student.pk: value for student, value in zip(self.students, values)}
+
+    def test_upsert(self):
+        # The enrollment check and the upsert
+        with self.assertNumQueries(2):
+            self.assertEqual(save_grades(self.course, Grade.FIRST_TERM, self.grades(7, 8, 9)), 3)
+        save_grades(self.course, Grade.FIRST_TERM, self.grades("6.5", 8))
+        save_grades(self.course, Grade.SECOND_TERM, self.grades(4))
+
+        self.assertEqual(
+            sorted(Grade.objects.filter(term=Grade.FIRST_TERM).values_list("value", flat=True)),
+            [Decimal("6.5"), Decimal(8), Decimal(9)],
+        )
+        self.assertEqual(Grade.objects.count(), 4)
+
+    def test_invalid(self):
+        with self.assertRaises(ValidationError):
+            save_grades(self.course, Grade.FIRST_TERM, self.grades(11))
+        with self.assertRaises(ValidationError):
+            save_grades(self.course, Grade.FIRST_TERM, {StudentFactory().pk: 5})
+        with self.assertRaises(ValidationError):
+            save_grades(self.course, 4, self.grades(5))
+        self.assertFalse(Grade.objects.exists())
+
+    def test_describe(self):
+        values = [3, 10, 7.5, 6, 2, 9, 4]
+        keys = ["a", "b", "a", "b", "a", "a", "b"]
+        statistics = describe(keys, values)
+
+        for key in "ab":
+            group = [value for value, k in zip(values, keys) if k == key]
+            self.assertEqual(statistics[key]["count"], len(group))
+            self.assertEqual(statistics[key]["mean"], round(np.mean(group), 2))
+            self.assertEqual(statistics[key]["std"], round(np.std(group), 2))
+            self.assertEqual(statistics[key]["median"], round(np.median(group), 2))
+            for percentile, result in statistics[key]["percentiles"].items():
+                self.assertEqual(result, round(np.percentile(group, percentile), 2))
+
+        self.assertEqual(statistics["b"]["distribution"], [0, 0, 0, 0, 1, 0, 1, 0, 0, 1])
+        self.assertEqual((statistics["a"]["min"], statistics["a"]["max"]), (2.0, 9.0))
+        self.assertEqual(describe([], []), {})
+
+    def test_statistics(self):
+        save_grades(self.course, Grade.FIRST_TERM, self.grades(4, 6, 8))
+        save_grades(self.other, Grade.FIRST_TERM, {})
+        Grade.objects.create(
+            course=self.other, student=self.students[0], term=Grade.FIRST_TERM, value=10
+        )
+
+        with self.assertNumQueries(1):
+            courses = get_course_statistics(term=Grade.FIRST_TERM)
+        self.assertEqual(courses[self.course.pk]["mean"], 6)
+        self.assertEqual(courses[self.other.pk]["count"], 1)
+
+        with self.assertNumQueries(1):
+            groups = get_group_statistics(term=Grade.FIRST_TERM)
+        self.assertEqual(groups[self.groups[0].pk]["mean"], 7)
+        self.assertEqual(groups[self.groups[1].pk]["count"], 3)
+
+        groups = get_group_statistics(groups=self.groups[1:])
+        self.assertEqual(list(groups), [self.groups[1].pk])
+        self.assertEqual(get_course_statistics(term=Grade.SECOND_TERM), {})
+
+    def test_views(self):
+        url = reverse("classroom:course_grades", args=[self.course.pk])
+        self.client.force_login(self.teacher.user)
+
+        data = {"grade-%s" % pk: value for pk, value in self.grades(5, 7).items()}
+        response = self.client.post(url, {"term": Grade.FIRST_TERM, **data})
+        self.assertEqual(response.json()["statistics"]["mean"], 6)
+        self.assertEqual(len(self.client.get(url, {"term": 1}).json()["grades"]), 2)
+
+        response = self.client.post(url, {"term": Grade.FIRST_TERM, "grade-nope": 5})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            url, {"term": Grade.FIRST_TERM, "grade-%s" % self.students[0].pk: 12}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.json()["errors"])
+
+        statistics_url = reverse("classroom:grade_statistics")
+        self.assertEqual(self.client.get(statistics_url).status_code, 403)
+        self.teacher.user.is_staff = True
+        self.teacher.user.save()
+        groups = self.client.get(statistics_url, {"term": 1}).json()["groups"]
+        self.assertEqual(groups[str(self.groups[1].pk)]["count"], 2)
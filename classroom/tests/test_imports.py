@@ -0,0 +1,170 @@
+import csv
+import io
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError
+from django.test import TestCase
+from django.urls import reverse
+
+from classroom.factories import StudentFactory, TeacherFactory
+from classroom.imports import PeopleImporter, import_people
+from classroom.models import Student
+from classroom.search import search_people
+
+COLUMNS = (
+    "dni",
+    "first_name",
+    "last_name",
+    "email",
+    "date_of_birth",
+    "date_of_admission",
+    "address1",
+    "address2",
+    "city",
+    "phone_number",
+    "father_dni",
+    "mother_dni",
+)
+
+
+def make_csv(rows, columns=COLUMNS):
+    f = io.StringIO()
+    writer = csv.DictWriter(f, columns)
+    writer.writeheader()
+    writer.writerows(rows)
+    return f.getvalue().encode()
+
+
+def make_row(dni, **values):
+    return {
+        "dni": dni,
+        "first_name": "Ana",
+        "last_name": "Imported",
+        "email": "ana%s@example.com" % dni,
+        "date_of_birth": "2005-03-01",
+        "date_of_admission": "2020-03-01",
+        "address1": "Calle 1",
+        "address2": "Piso 2",
+        "city": "Salta",
+        "phone_number": "+5491123456789",
+        "father_dni": 10000001,
+        "mother_dni": 10000002,
+        **values,
+    }
+
+
+class ImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = StudentFactory(dni=20000001, city="Jujuy")
+
+    def run_import(self, data, batch_size=100):
+        return import_people("students", io.BytesIO(data), batch_size=batch_size)
+
+    def test_create(self):
+        result = self.run_import(make_csv([make_row(30000001), make_row(30000002)]))
+
+        self.assertEqual(result.as_dict()["created"], 2)
+        student = Student.objects.select_related("user").get(dni=30000001)
+        self.assertEqual(student.user.username, "students-30000001")
+        self.assertFalse(student.user.has_usable_password())
+        self.assertIn(student, [person for _, person in search_people("imported")])
+
+    def test_update(self):
+        rows = [
+            {"dni": self.student.dni, "first_name": "Renamed", "last_name": "Student"},
+            {"dni": 30000003, "first_name": "Only", "last_name": "Names"},
+        ]
+        result = self.run_import(make_csv(rows, ("dni", "first_name", "last_name")))
+
+        self.student.refresh_from_db()
+        self.assertEqual((self.student.first_name, self.student.city), ("Renamed", "Jujuy"))
+        self.assertEqual(result.as_dict()["updated"], 1)
+        # A new person needs the columns without a default
+        ((line, messages),) = result.errors
+        self.assertEqual(line, 3)
+        self.assertIn("date_of_birth", messages)
+
+    def test_unchanged(self):
+        student = self.student
+        rows = [
+            {
+                "dni": student.dni,
+                "first_name": student.first_name,
+                "last_name": student.last_name,
+                "city": "Jujuy",
+            }
+        ]
+        data = make_csv(rows, ("dni", "first_name", "last_name", "city"))
+
+        self.assertEqual(self.run_import(data).as_dict()["unchanged"], 1)
+
+    def test_invalid_rows(self):
+        rows = [
+            make_row(30000004, phone_number="12"),
+            make_row("abc"),
+            make_row(30000005),
+            make_row(30000005),
+            make_row(30000006, email="nope"),
+        ]
+        result = self.run_import(make_csv(rows), batch_size=2)
+
+        self.assertEqual(
+            result.as_dict(),
+            {"processed": 5, "created": 1, "updated": 0, "unchanged": 0, "errors": 4},
+        )
+        self.assertEqual(
+            [(line, sorted(messages)) for line, messages in result.errors],
+            [(2, ["phone_number"]), (3, ["dni"]), (5, ["dni"]), (6, ["email"])],
+        )
+
+    def test_counters_ignored(self):
+        teacher = TeacherFactory()
+        row = {"dni": teacher.dni, "first_name": "Renamed", "last_name": "T", "course_count": 99}
+        data = make_csv([row], ("dni", "first_name", "last_name", "course_count"))
+
+        result = import_people("teachers", io.BytesIO(data))
+
+        self.assertEqual(result.as_dict()["updated"], 1)
+        teacher.refresh_from_db()
+        self.assertEqual((teacher.first_name, teacher.course_count), ("Renamed", 0))
+
+    def test_missing_columns(self):
+        result = self.run_import(make_csv([{"dni": 1}], ("dni", "city")))
+        self.assertEqual(result.errors[0][0], 1)
+        self.assertEqual(result.as_dict()["processed"], 0)
+
+    def test_username_taken(self):
+        user = get_user_model().objects.create_user("students-30000007")
+
+        result = self.run_import(make_csv([make_row(30000007), make_row(30000008)]))
+
+        self.assertEqual(result.as_dict()["created"], 1)
+        self.assertEqual(result.errors, [(2, {"dni": [mock.ANY]})])
+        self.assertFalse(Student.objects.filter(user=user).exists())
+        self.assertFalse(Student.objects.filter(dni=30000007).exists())
+
+    def test_conflict(self):
+        with mock.patch.object(PeopleImporter, "create", side_effect=IntegrityError("unique")):
+            result = self.run_import(make_csv([make_row(30000009), make_row("x")]))
+
+        self.assertEqual([line for line, _ in result.errors], [3, 2])
+        self.assertEqual(result.as_dict()["created"], 0)
+        self.assertFalse(Student.objects.filter(dni=30000009).exists())
+
+    def test_admin(self):
+        admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "x")
+        self.client.force_login(admin)
+        url = reverse("admin:classroom_student_import")
+        get_user_model().objects.create_user("students-30000010")
+
+        upload = SimpleUploadedFile("students.csv", make_csv([make_row(30000010)]))
+        response = self.client.post(url, {"file": upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "students-30000010")
+
+        upload = SimpleUploadedFile("students.csv", make_csv([make_row(30000011)]))
+        response = self.client.post(url, {"file": upload})
+        self.assertRedirects(response, reverse("admin:classroom_student_changelist"))
@@ -0,0 +1,126 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from classroom.factories import CourseFactory, StudentFactory, SubjectFactory, SubjectGroupFactory
+from classroom.models import Delivery
+from classroom.notifications import Mailer, get_parent_emails, notify_parents
+
+LOCMEM = "django.core.mail.backends.locmem.EmailBackend"
+
+
+class FlakyBackend(EmailBackend):
+    """Fails the first messages it's given, then sends"""
+
+    def __init__(self, failures=1, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = failures
+        self.opened = 0
+
+    def open(self):
+        self.opened += 1
+
+    def send_messages(self, messages):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionResetError("Connection reset by peer")
+        return super().send_messages(messages)
+
+
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = SubjectGroupFactory()
+        cls.subject = SubjectFactory(groups=[cls.group])
+        # Siblings, one of them in both courses
+        cls.siblings = StudentFactory.create_batch(
+            2, father_email="father@example.com", mother_email="Mother@example.com"
+        )
+        cls.student = StudentFactory(father_email="parent@example.com", mother_email="")
+        cls.course = CourseFactory(subject=cls.subject, students=[*cls.siblings, cls.student])
+        cls.other = CourseFactory(subject=cls.subject, students=cls.siblings[:1])
+
+    def test_parent_emails(self):
+        emails = {"father@example.com", "Mother@example.com", "parent@example.com"}
+        with self.assertNumQueries(1):
+            self.assertEqual(get_parent_emails(course=self.course), emails)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_parent_emails(group=self.group), emails)
+
+    def test_deduplicated(self):
+        StudentFactory(father_email="mother@example.com", mother_email="").course_set.add(
+            self.other
+        )
+        notification = notify_parents("Trip", "On Friday", courses=[self.course, self.other])
+
+        self.assertEqual(
+            sorted(notification.deliveries.values_list("email", flat=True)),
+            ["Mother@example.com", "father@example.com", "parent@example.com"],
+        )
+
+    def test_send(self):
+        notify_parents("Trip", "On Friday", groups=[self.group])
+        stats = Mailer(connection=get_connection(LOCMEM), batch_size=2).run()
+
+        self.assertEqual(stats["sent"], 3)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ["Mother@example.com", "father@example.com", "parent@example.com"],
+        )
+        self.assertTrue(all(len(message.to) == 1 for message in mail.outbox))
+        self.assertFalse(Delivery.objects.exclude(status=Delivery.SENT).exists())
+        # Nothing is sent twice
+        self.assertEqual(Mailer().run()["sent"], 0)
+
+    def test_retry(self):
+        notify_parents("Trip", "On Friday", courses=[self.course])
+        connection = FlakyBackend(failures=1)
+        stats = Mailer(connection=connection, backoff=timedelta(minutes=1)).run()
+
+        self.assertEqual((stats["sent"], stats["retried"]), (2, 1))
+        self.assertEqual(connection.opened, 2)
+        retried = Delivery.objects.get(status=Delivery.PENDING)
+        self.assertEqual(retried.attempts, 1)
+        self.assertIn("ConnectionResetError", retried.error)
+        self.assertGreater(retried.next_attempt, timezone.now())
+
+        Delivery.objects.update(next_attempt=timezone.now())
+        self.assertEqual(Mailer(connection=connection).run()["sent"], 1)
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_give_up(self):
+        notify_parents("Trip", "On Friday", courses=[self.other])
+        delivery = Delivery.objects.get(email="father@example.com")
+        Delivery.objects.filter(pk=delivery.pk).update(attempts=4)
+
+        stats = Mailer(connection=FlakyBackend(failures=2), max_attempts=5).run()
+
+        self.assertEqual((stats["sent"], stats["retried"], stats["failed"]), (0, 1, 1))
+        delivery.refresh_from_db()
+        self.assertEqual((delivery.status, delivery.attempts), (Delivery.FAILED, 5))
+
+    def test_commands(self):
+        out = StringIO()
+        call_command(
+            "notify_parents", course=[self.course.pk], subject="Trip", body="Friday", stdout=out
+        )
+        call_command("send_notifications", backend=LOCMEM, stdout=out)
+
+        self.assertIn("Sent 3 messages", out.getvalue())
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_command_errors(self):
+        options = ["--subject", "Trip", "--body", "Friday"]
+        for ids, message in (
+            (["--course", "not-a-uuid"], "invalid UUID value"),
+            (["--group", str(self.course.pk)], "don't exist"),
+            ([], "at least one"),
+        ):
+            with self.assertRaisesMessage(CommandError, message):
+                call_command("notify_parents", *ids, *options)
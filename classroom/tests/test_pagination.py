@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from classroom.cache import course_summary
+from classroom.factories import CourseFactory, TeacherFactory
+from classroom.models import Course
+from classroom.pagination import decode_cursor, encode_cursor, keyset_page
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        courses = CourseFactory.create_batch(7)
+        # Three courses share their timestamp, the id breaks the tie
+        for index, course in enumerate(courses):
+            updated = now - timedelta(minutes=min(index, 3))
+            Course.objects.filter(pk=course.pk).update(updated=updated)
+
+        cls.queryset = Course.objects.all()
+        cls.ordered = list(cls.queryset.order_by("-updated", "-id"))
+        cls.summaries = [course_summary(course) for course in cls.ordered]
+
+    def walk(self, object_list, page_size):
+        pages, cursor = [], None
+        while True:
+            page = keyset_page(object_list, cursor, page_size)
+            pages.append([row["id"] if isinstance(row, dict) else row.pk for row in page])
+            if not page.has_next():
+                return pages
+            cursor = page.next_cursor
+
+    def test_pages(self):
+        expected = [course.pk for course in self.ordered]
+
+        for object_list in (self.queryset, self.summaries):
+            for page_size in (1, 2, 3, 7, 10):
+                with self.subTest(object_list=type(object_list), page_size=page_size):
+                    pages = self.walk(object_list, page_size)
+                    self.assertEqual(sum(pages, []), expected)
+                    self.assertTrue(all(len(page) == page_size for page in pages[:-1]))
+
+    def test_list_and_queryset_agree(self):
+        # A cursor from one side points at the same row on the other
+        for index in range(len(self.ordered)):
+            cursor = encode_cursor(self.ordered[index])
+            from_list = keyset_page(self.summaries, cursor, 2)
+            from_queryset = keyset_page(self.queryset, cursor, 2)
+            self.assertEqual(
+                [row["id"] for row in from_list], [course.pk for course in from_queryset]
+            )
+            self.assertEqual(from_list.next_cursor, from_queryset.next_cursor)
+
+    def test_first_and_last_page(self):
+        first = keyset_page(self.summaries, None, 3)
+        self.assertEqual(first.object_list, self.summaries[:3])
+        self.assertEqual(first.next_cursor, encode_cursor(self.summaries[2]))
+
+        last = keyset_page(self.summaries, encode_cursor(self.ordered[-1]), 3)
+        self.assertEqual(len(last), 0)
+        self.assertFalse(last.has_next())
+        self.assertFalse(keyset_page([], None, 3).has_next())
+
+    def test_bad_cursor(self):
+        for cursor in ("nope", "bm9wZQ==", encode_cursor(self.ordered[0])[:-4] + "AAAA"):
+            with self.subTest(cursor=cursor), self.assertRaises(ValueError):
+                decode_cursor(cursor)
+        with self.assertRaises(ValueError):
+            keyset_page(self.summaries, "nope")
+
+    def test_bad_cursor_in_view(self):
+        self.client.force_login(TeacherFactory().user)
+        response = self.client.get(reverse("classroom:course_list"), {"cursor": "nope"})
+        self.assertEqual(response.status_code, 404)
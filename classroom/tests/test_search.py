@@ -0,0 +1,107 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from classroom.factories import StudentFactory, TeacherFactory
+from classroom.models import Student, Teacher
+from classroom.search import get_terms, rebuild_index, search_people
+
+
+class PeopleSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = StudentFactory(
+            first_name="José",
+            last_name="Núñez",
+            dni=30111222,
+            city="Córdoba",
+            father_first_name="Ramón",
+            mother_last_name="Ibarra",
+        )
+        cls.teacher = TeacherFactory(first_name="Josefina", last_name="Paz", city="Rosario")
+        # Fixed parents' names, as random ones may match the queries
+        StudentFactory.create_batch(
+            5,
+            first_name="Other",
+            last_name="Person",
+            city="Salta",
+            father_first_name="Luis",
+            father_last_name="Person",
+            mother_first_name="Marta",
+            mother_last_name="Person",
+        )
+
+    def search(self, query):
+        return [person for _, person in search_people(query)]
+
+    def test_prefix(self):
+        self.assertEqual(self.search("Nú"), [self.student])
+        self.assertCountEqual(self.search("Jos"), [self.student, self.teacher])
+        self.assertEqual(self.search("3011"), [self.student])
+        # Every word must match
+        self.assertEqual(self.search("Jos Paz"), [self.teacher])
+        self.assertEqual(self.search("uñez"), [])
+
+    def test_accents_and_case(self):
+        self.assertEqual(self.search("nunez"), [self.student])
+        self.assertEqual(self.search("NÚÑEZ"), [self.student])
+        self.assertEqual(self.search("cordoba"), [self.student])
+
+    def test_parents(self):
+        self.assertEqual(self.search("ramon"), [self.student])
+        self.assertEqual(self.search("ibarra"), [self.student])
+
+    def test_names_rank_first(self):
+        father = StudentFactory(first_name="Ana", last_name="Ruiz", father_first_name="Paz")
+        self.assertEqual(self.search("paz"), [self.teacher, father])
+
+    def test_kinds(self):
+        self.assertEqual(search_people("josefina"), [("teacher", self.teacher)])
+        self.assertEqual(search_people("núñez"), [("student", self.student)])
+
+    def test_edited(self):
+        self.student.last_name = "Quiroga"
+        self.student.save()
+
+        self.assertEqual(self.search("quiroga"), [self.student])
+        self.assertEqual(self.search("nunez"), [])
+
+    def test_deleted(self):
+        self.student.delete()
+        self.teacher.delete()
+
+        self.assertEqual(self.search("jos"), [])
+
+    def test_empty_and_punctuation(self):
+        for query in ("", "   ", "*", '"', "-- ; ()", "' OR 1=1", "NEAR(", "a AND"):
+            with self.subTest(query=query):
+                self.assertIsInstance(search_people(query), list)
+        self.assertEqual(search_people(""), [])
+        self.assertEqual(search_people("*!?"), [])
+        self.assertEqual(get_terms('"Núñez"* OR paz'), ["Núñez", "OR", "paz"])
+
+    def test_paging(self):
+        first = search_people("other", limit=3)
+        second = search_people("other", limit=3, offset=3)
+        self.assertEqual((len(first), len(second)), (3, 2))
+        self.assertFalse({p.pk for _, p in first} & {p.pk for _, p in second})
+
+    def test_rebuild(self):
+        # Bulk writes skip the signals
+        Student.objects.filter(pk=self.student.pk).update(last_name="Bulk")
+        Teacher.objects.filter(pk=self.teacher.pk).update(last_name="Bulk")
+        self.assertEqual(self.search("bulk"), [])
+
+        total = Student.objects.count() + Teacher.objects.count()
+        self.assertEqual(rebuild_index(chunk_size=2), total)
+        self.assertCountEqual(self.search("bulk"), [self.student, self.teacher])
+
+    def test_view(self):
+        url = reverse("classroom:people_search")
+        self.client.force_login(TeacherFactory().user)
+        self.assertEqual(self.client.get(url, {"q": "nunez"}).status_code, 403)
+
+        staff = get_user_model().objects.create_user("staff", is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(url, {"q": "nunez"})
+        self.assertEqual([person for _, person in response.context["results"]], [self.student])
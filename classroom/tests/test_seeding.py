@@ -0,0 +1,65 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from classroom.factories import CourseFactory, StudentFactory, TeacherFactory
+from classroom.models import Course, Student, Subject, SubjectGroup, Teacher
+from classroom.search import search_people
+from classroom.seeding import USERNAME_PREFIX, delete_seeded_data, sizes_for_scale
+
+
+class SeedingTests(TestCase):
+    def setup_test_data(self, workers=1):
+        call_command(
+            "setup_test_data", scale=1, seed=7, workers=workers, batch_size=40, stdout=StringIO()
+        )
+
+    def get_ids(self):
+        return {
+            model.__name__: set(model.objects.values_list("pk", flat=True))
+            for model in (Course, Student, Subject, SubjectGroup, Teacher)
+        }
+
+    def test_counts(self):
+        self.setup_test_data()
+
+        sizes = sizes_for_scale(1)
+        self.assertEqual(Student.objects.count(), sizes["students"])
+        self.assertEqual(Teacher.objects.count(), sizes["teachers"])
+        self.assertEqual(Course.objects.count(), sizes["courses"])
+        self.assertEqual(Subject.objects.count(), sizes["subjects"])
+        self.assertEqual(SubjectGroup.objects.count(), sizes["subject_groups"])
+        users = get_user_model().objects.filter(username__startswith=USERNAME_PREFIX)
+        self.assertEqual(users.count(), sizes["students"] + sizes["teachers"])
+
+        # The counters and the search index are rebuilt after the bulk inserts
+        course = Course.objects.first()
+        self.assertEqual(course.student_count, course.students.count())
+        student = Student.objects.first()
+        self.assertIn(student, [person for _, person in search_people(str(student.dni))])
+
+    def test_workers(self):
+        self.setup_test_data(workers=1)
+        ids = self.get_ids()
+
+        # Seeding again replaces the data
+        self.setup_test_data(workers=3)
+
+        self.assertEqual(self.get_ids(), ids)
+        self.assertEqual(Student.objects.count(), sizes_for_scale(1)["students"])
+
+    def test_delete(self):
+        teacher = TeacherFactory()
+        CourseFactory(teachers=[teacher], students=StudentFactory.create_batch(2))
+        self.setup_test_data()
+
+        # One DELETE per table and relation, however many rows
+        with self.assertNumQueries(40):
+            delete_seeded_data()
+
+        for model in (Course, Student, Subject, SubjectGroup, Teacher):
+            self.assertFalse(model.objects.exists())
+        self.assertFalse(get_user_model().objects.filter(username__startswith=USERNAME_PREFIX))
+        self.assertTrue(get_user_model().objects.filter(pk=teacher.user_id).exists())
@@ -0,0 +1,107 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from classroom.factories import (
+    CourseFactory,
+    StudentFactory,
+    SubjectFactory,
+    SubjectGroupFactory,
+    TeacherFactory,
+)
+from classroom.models import Course, Person, Statistic
+from classroom.statistics import get_counts, get_dashboard, rebuild_statistics
+
+
+class StatisticsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = SubjectGroupFactory()
+        cls.subject = SubjectFactory(groups=[cls.group])
+        cls.students = StudentFactory.create_batch(3, gender=Person.FEMALE)
+        cls.teacher = TeacherFactory(certified=True)
+        cls.course = CourseFactory(
+            batch=Course.MORNING,
+            subject=cls.subject,
+            students=cls.students,
+            teachers=[cls.teacher],
+        )
+
+    def assertStatisticsAccurate(self):
+        stored = {
+            (statistic.dimension, statistic.key, statistic.metric): statistic.value
+            for statistic in Statistic.objects.exclude(value=0)
+        }
+        self.assertEqual(stored, dict(get_counts(students={}, teachers={})))
+
+    def test_links(self):
+        self.assertStatisticsAccurate()
+        self.course.students.remove(self.students[0])
+        self.assertStatisticsAccurate()
+        self.students[1].course_set.clear()
+        self.assertStatisticsAccurate()
+        self.course.teachers.add(TeacherFactory(certified=False))
+        self.assertStatisticsAccurate()
+
+    def test_rows_saved(self):
+        student = self.students[0]
+        student.gender = Person.MALE
+        student.permission_for_photo = not student.permission_for_photo
+        student.save()
+        self.assertStatisticsAccurate()
+
+        self.course.batch = Course.EVENING
+        self.course.save()
+        self.assertStatisticsAccurate()
+
+        self.teacher.certified = False
+        self.teacher.save()
+        self.assertStatisticsAccurate()
+
+    def test_groups_changed(self):
+        other = SubjectGroupFactory()
+        self.subject.groups.add(other)
+        self.assertStatisticsAccurate()
+        other.subject_set.clear()
+        self.assertStatisticsAccurate()
+        self.subject.groups.clear()
+        self.assertStatisticsAccurate()
+
+    def test_rows_deleted(self):
+        self.students[0].delete()
+        self.assertStatisticsAccurate()
+        self.teacher.delete()
+        self.assertStatisticsAccurate()
+        self.course.delete()
+        self.assertStatisticsAccurate()
+
+    def test_rebuild(self):
+        Statistic.objects.all().delete()
+        rebuild_statistics()
+        self.assertStatisticsAccurate()
+
+    def test_dashboard(self):
+        dashboard = get_dashboard()
+
+        self.assertEqual(dashboard["total"]["enrollments"], 3)
+        self.assertEqual(dict(dashboard["total"]["genders"])["Female"], 100.0)
+        self.assertEqual(dashboard["total"]["certified_rate"], 100.0)
+        self.assertEqual(dashboard["groups"][0]["label"], self.group.name)
+        self.assertEqual(dashboard["groups"][0]["enrollments"], 3)
+
+    def test_view(self):
+        url = reverse("classroom:statistics")
+        user = get_user_model().objects.create_user("staff", password="x", is_staff=True)
+        self.client.force_login(user)
+
+        self.client.get(url, secure=True)
+
+        # The statistics and the names of the groups, the session and user are cached
+        with self.assertNumQueries(2):
+            response = self.client.get(url, secure=True)
+        self.assertContains(response, self.group.name)
+
+        group = SubjectGroupFactory()
+        CourseFactory(subject=SubjectFactory(groups=[group]), students=self.students)
+        with self.assertNumQueries(2):
+            self.client.get(url, secure=True)
@@ -0,0 +1,102 @@
+from django.test import TestCase, override_settings
+
+from classroom.conflicts import OccupancyIndex
+from classroom.factories import CourseFactory, StudentFactory, SubjectFactory, TeacherFactory
+from classroom.models import Course, Statistic
+from classroom.statistics import rebuild_statistics
+from classroom.timetable import Timetable, schedule
+
+ROOMS = {"A1": (30, False), "A2": (20, False), "LI": (30, True)}
+
+
+class TimetableTests(TestCase):
+    def test_teachers_get_different_batches(self):
+        timetable = Timetable(ROOMS, "MAE")
+        for pk in range(3):
+            timetable.add_course(pk, 10, teacher_ids=[1])
+
+        solution = timetable.solve()
+
+        self.assertEqual(solution.unassigned, [])
+        batches = [batch for _, batch in solution.assignments.values()]
+        self.assertCountEqual(batches, "MAE")
+
+    def test_capacity_and_laboratories(self):
+        timetable = Timetable(ROOMS, "M")
+        timetable.add_course("big", 25)
+        timetable.add_course("small", 15)
+        timetable.add_course("lab", 10, lab=True)
+
+        solution = timetable.solve()
+
+        self.assertEqual(
+            solution.assignments, {"big": ("A1", "M"), "small": ("A2", "M"), "lab": ("LI", "M")}
+        )
+
+    def test_unassigned(self):
+        timetable = Timetable(ROOMS, "M")
+        timetable.book("A1", "M", teacher_ids=[1])
+        timetable.add_course("huge", 50)
+        timetable.add_course("busy", 10, teacher_ids=[1])
+        timetable.add_course("free", 10, teacher_ids=[2])
+
+        solution = timetable.solve()
+
+        self.assertCountEqual(solution.unassigned, ["huge", "busy"])
+        self.assertEqual(solution.assignments, {"free": ("A2", "M")})
+
+
+@override_settings(CLASSROOM_CAPACITY={"A1": 30, "A2": 30, "LI": 30})
+class ScheduleTests(TestCase):
+    def test_schedule(self):
+        teacher = TeacherFactory()
+        lab = CourseFactory(
+            classroom=Course.AULA1,
+            batch=Course.MORNING,
+            active=True,
+            subject=SubjectFactory(requires_lab=True),
+            teachers=[teacher],
+        )
+        courses = [
+            CourseFactory(
+                classroom=Course.AULA1, batch=Course.MORNING, active=True, teachers=[teacher]
+            )
+            for _ in range(2)
+        ]
+        courses[0].students.add(*StudentFactory.create_batch(3))
+
+        solution, moved = schedule()
+
+        self.assertEqual(solution.unassigned, [])
+        # The fullest course keeps its slot, the others move
+        self.assertEqual(moved, 2)
+        self.assertEqual(solution.assignments[courses[0].pk], (Course.AULA1, Course.MORNING))
+        lab.refresh_from_db()
+        self.assertEqual(lab.classroom, Course.LABORATORIOINF)
+        self.assertEqual(list(OccupancyIndex.build().conflicts()), [])
+
+        _, moved = schedule()
+        self.assertEqual(moved, 0)
+
+    def test_statistics(self):
+        teacher = TeacherFactory()
+        for _ in range(2):
+            CourseFactory(
+                classroom=Course.AULA1,
+                batch=Course.MORNING,
+                active=True,
+                teachers=[teacher],
+                students=StudentFactory.create_batch(2),
+            )
+
+        def get_statistics():
+            statistics = Statistic.objects.exclude(value=0)
+            return set(statistics.values_list("dimension", "key", "metric", "value"))
+
+        _, moved = schedule()
+        self.assertEqual(moved, 1)
+
+        # The enrollments of the moved course count in its new batch
+        statistics = get_statistics()
+        rebuild_statistics()
+        self.assertEqual(statistics, get_statistics())
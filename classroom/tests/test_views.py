@@ -0,0 +1,231 @@
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from classroom.factories import CourseFactory, StudentFactory, TeacherFactory
+from classroom.models import Student
+from classroom.views import CourseDetailView
+from main.testing import QueryBudgetMixin
+
+
+class CourseViewsQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """The course pages must cost the same number of queries however big the data"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = TeacherFactory()
+        colleagues = TeacherFactory.create_batch(size=3)
+        students = StudentFactory.create_batch(size=30)
+        cls.courses = [
+            CourseFactory(teachers=[cls.teacher, *colleagues], students=students) for _ in range(5)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.teacher.user)
+        # Loads the user into the cache, the login saved it
+        self.client.get(reverse("classroom:classroom_home"))
+
+    def test_course_list(self):
+        # Only the courses on a cache miss, the session and user with its teacher are cached
+        self.assertQueryBudget(reverse("classroom:course_list"), 1)
+
+    def test_course_list_cached(self):
+        url = reverse("classroom:course_list")
+        self.client.get(url)
+
+        self.assertQueryBudget(url, 0)
+
+    def test_course_list_paged(self):
+        url = reverse("classroom:course_list")
+
+        response = self.assertQueryBudget(url + "?page_size=2", 1)
+
+        self.assertEqual(len(response.context["course_list"]), 2)
+        self.assertTrue(response.context["is_paginated"])
+
+    def test_course_detail(self):
+        # course, teachers and roster page, the roster count is the course's counter
+        url = self.courses[0].get_absolute_url()
+
+        response = self.assertQueryBudget(url, 3)
+
+        self.assertEqual(response.context["roster_page"].paginator.count, 30)
+
+    def test_course_detail_cached(self):
+        # Only the course, the teachers and roster come from the fragment cache
+        url = self.courses[0].get_absolute_url()
+        self.client.get(url)
+
+        self.assertQueryBudget(url, 1)
+
+    def test_course_detail_cached_page_numbers(self):
+        # Any page number is cached as the page it resolves to, the only one here
+        url = self.courses[0].get_absolute_url()
+        self.client.get(url)
+
+        for number in ("1", "9", "x", "-1"):
+            self.assertQueryBudget("%s?roster_page=%s" % (url, number), 1)
+
+
+class CourseFragmentCacheTests(TestCase):
+    """Cached course page fragments must go stale as soon as what they show changes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = TeacherFactory()
+        cls.course = CourseFactory(teachers=[cls.teacher], students=StudentFactory.create_batch(2))
+
+    def setUp(self):
+        self.client.force_login(self.teacher.user)
+        self.url = self.course.get_absolute_url()
+        self.client.get(self.url)
+
+    def test_enrolment(self):
+        student = StudentFactory(last_name="Enrolled")
+        self.course.students.add(student)
+
+        self.assertContains(self.client.get(self.url), "Enrolled")
+
+    def test_enrolment_from_the_student_side(self):
+        student = StudentFactory(last_name="Enrolled")
+        student.course_set.add(self.course)
+
+        self.assertContains(self.client.get(self.url), "Enrolled")
+
+    def test_person_renamed(self):
+        student = self.course.students.first()
+        student.last_name = "Renamed"
+        student.save()
+
+        self.assertContains(self.client.get(self.url), "Renamed")
+
+    def test_person_deleted(self):
+        student = self.course.students.first()
+        student.delete()
+
+        self.assertNotContains(self.client.get(self.url), student.email)
+
+
+class CourseDetailAccessTests(TestCase):
+    """The roster shows the students' contacts, only the course's teachers and staff see it"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = CourseFactory(teachers=[TeacherFactory()], students=[StudentFactory()])
+        cls.url = cls.course.get_absolute_url()
+
+    def test_unrelated_student(self):
+        self.client.force_login(StudentFactory().user)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_other_teacher(self):
+        self.client.force_login(TeacherFactory().user)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_staff(self):
+        user = get_user_model().objects.create_user("staff", is_staff=True)
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_missing(self):
+        self.client.force_login(self.course.teachers.get().user)
+        url = reverse("classroom:course_detail", args=[uuid.uuid4()])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class CourseDetailRosterTests(TestCase):
+    """The roster is paged and loads only the columns it shows"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = TeacherFactory()
+        cls.students = StudentFactory.create_batch(size=55)
+        cls.course = CourseFactory(teachers=[cls.teacher], students=cls.students)
+
+    def setUp(self):
+        self.client.force_login(self.teacher.user)
+        self.url = self.course.get_absolute_url()
+
+    def test_pruned_columns(self):
+        response = self.client.get(self.url)
+        student = response.context["roster_page"][0]
+        teacher = response.context["teachers"][0]
+
+        self.assertEqual(
+            student.get_deferred_fields(),
+            {field.attname for field in Student._meta.concrete_fields}
+            - set(CourseDetailView.student_roster_fields),
+        )
+        self.assertIn("father_email", student.get_deferred_fields())
+        self.assertNotIn("email", teacher.get_deferred_fields())
+        self.assertIn("address1", teacher.get_deferred_fields())
+
+    def test_pages(self):
+        ordered = sorted(self.students, key=lambda s: (s.last_name, s.first_name, str(s.pk)))
+
+        page = self.client.get(self.url).context["roster_page"]
+        self.assertEqual((page.number, page.paginator.num_pages, len(page)), (1, 2, 50))
+        self.assertEqual([student.pk for student in page], [s.pk for s in ordered[:50]])
+
+        response = self.client.get(self.url, {"roster_page": 2})
+        page = response.context["roster_page"]
+        self.assertEqual([student.pk for student in page], [s.pk for s in ordered[50:]])
+        self.assertContains(response, "?roster_page=1")
+
+        # Out of range and invalid numbers fall back to a page which exists
+        for number, expected in ((9, 2), ("x", 1)):
+            response = self.client.get(self.url, {"roster_page": number})
+            self.assertEqual(response.context["roster_page"].number, expected)
+
+
+class AsyncCourseViewsTests(TransactionTestCase):
+    """
+    The async views query from other threads, which don't see the data of a
+    test's transaction, so these tests commit it.
+    """
+
+    def setUp(self):
+        self.teacher = TeacherFactory()
+        students = StudentFactory.create_batch(2)
+        self.course = CourseFactory(teachers=[self.teacher], students=students)
+        self.list_url = reverse("classroom:course_list_async")
+        self.detail_url = reverse("classroom:course_detail_async", args=[self.course.pk])
+
+    def test_anonymous(self):
+        for url in (self.list_url, self.detail_url):
+            login_url = "%s?next=%s" % (reverse("account_login"), url)
+            response = self.client.get(url)
+            self.assertRedirects(response, login_url, fetch_redirect_response=False)
+
+    def test_not_a_teacher(self):
+        user = get_user_model().objects.create_user("student", password="x")
+        self.client.force_login(user)
+
+        self.assertEqual(self.client.get(self.list_url).status_code, 403)
+        self.assertEqual(self.client.get(reverse("classroom:course_list")).status_code, 403)
+
+    def test_unrelated_student(self):
+        self.client.force_login(StudentFactory().user)
+
+        self.assertEqual(self.client.get(self.detail_url).status_code, 403)
+
+    def test_staff(self):
+        user = get_user_model().objects.create_user("staff", is_staff=True)
+        self.client.force_login(user)
+
+        self.assertEqual(self.client.get(self.detail_url).status_code, 200)
+
+    def test_teacher(self):
+        self.client.force_login(self.teacher.user)
+
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.context["view"].request.user, self.teacher.user)
+        self.assertEqual(
+            [course["id"] for course in response.context["course_list"]], [self.course.pk]
+        )
+
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.context["object"], self.course)
+        self.assertEqual(response.context["roster_page"].paginator.count, 2)
@@ -0,0 +1,244 @@
+"""
+Timetable solver, assigning a classroom and a batch to active courses.
+
+Every course needs a (classroom, batch) slot of its own, in a classroom with a
+seat for every student of its roster, ``settings.CLASSROOM_CAPACITY``, and in a
+laboratory if its subject requires one. Courses sharing a teacher need
+different batches, ie. a colouring of the graph of courses linked by their
+teachers with the batches as colours.
+
+The solver is greedy with constraint propagation, in the manner of DSatur:
+courses are placed most constrained first, the fewest batches left with a free
+classroom that fits them, then the most teacher neighbours, then the largest
+roster. A course takes the batch which leaves the most options to its
+unplaced neighbours and the smallest free classroom which fits it, keeping
+laboratories for the courses which need them. Placing a course only touches
+its neighbours, and the courses of a classroom size only when its last free
+classroom in a batch goes, so thousands of courses solve in well under a
+second. Courses left with no options are reported rather than forced into a
+conflict.
+
+``schedule`` loads the courses from the database, solves them with the active
+courses which aren't part of the run kept where they are, and writes the new
+slots back in one bulk update.
+"""
+
+import heapq
+from collections import defaultdict
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Course
+from .signals import invalidate, teachers_of
+from .statistics import tracking
+
+CourseTeachers = Course.teachers.through
+
+
+class Solution(NamedTuple):
+    """The (classroom, batch) of every placed course and the ids of those left out"""
+
+    assignments: dict
+    unassigned: list
+
+
+class Timetable:
+    def __init__(self, rooms, batches):
+        """``rooms`` maps every classroom to its capacity and whether it's a laboratory"""
+
+        self.rooms = rooms
+        self.batches = list(batches)
+        self.courses = {}
+        self.booked = set()
+        self.busy = set()
+
+    def add_course(self, pk, size, lab=False, teacher_ids=()):
+        self.courses[pk] = (size, lab, frozenset(teacher_ids))
+
+    def book(self, classroom, batch, teacher_ids=()):
+        """Marks a slot, and the teachers in the batch, as taken by a course kept in place"""
+
+        self.booked.add((classroom, batch))
+        self.busy.update((teacher_id, batch) for teacher_id in teacher_ids)
+
+    def get_fitting_rooms(self, size, lab):
+        # Smallest first, and the laboratories last unless the course needs one
+        return tuple(
+            sorted(
+                (
+                    room
+                    for room, (capacity, is_lab) in self.rooms.items()
+                    if capacity >= size and (is_lab or not lab)
+                ),
+                key=lambda room: (self.rooms[room][1] != lab, self.rooms[room][0], room),
+            )
+        )
+
+    def solve(self):
+        batches = self.batches
+
+        # Courses needing the same classrooms share a group, with a count of
+        # the free classrooms of the group per batch
+        groups, group_of, members = {}, {}, defaultdict(list)
+        fitting = {}
+        for pk, (size, lab, _) in self.courses.items():
+            if (size, lab) not in fitting:
+                fitting[size, lab] = self.get_fitting_rooms(size, lab)
+            group_of[pk] = groups.setdefault(fitting[size, lab], len(groups))
+            members[group_of[pk]].append(pk)
+        rooms_of = {group: rooms for rooms, group in groups.items()}
+        groups_of_room = defaultdict(list)
+        for rooms, group in groups.items():
+            for room in rooms:
+                groups_of_room[room].append(group)
+        free = {
+            (group, batch): sum((room, batch) not in self.booked for room in rooms)
+            for rooms, group in groups.items()
+            for batch in batches
+        }
+
+        by_teacher = defaultdict(list)
+        for pk, (_, _, teacher_ids) in self.courses.items():
+            for teacher_id in teacher_ids:
+                by_teacher[teacher_id].append(pk)
+        neighbours = {
+            pk: {other for t in teacher_ids for other in by_teacher[t] if other != pk}
+            for pk, (_, _, teacher_ids) in self.courses.items()
+        }
+
+        allowed = {
+            pk: {
+                batch
+                for batch in batches
+                if not any((teacher_id, batch) in self.busy for teacher_id in teacher_ids)
+            }
+            for pk, (_, _, teacher_ids) in self.courses.items()
+        }
+        options = {
+            pk: sum(free[group_of[pk], batch] > 0 for batch in allowed[pk]) for pk in self.courses
+        }
+
+        order = {pk: index for index, pk in enumerate(self.courses)}
+        heap = []
+
+        def push(pk):
+            key = (options[pk], -len(neighbours[pk]), -self.courses[pk][0], order[pk])
+            heapq.heappush(heap, (key, pk))
+
+        for pk in self.courses:
+            push(pk)
+
+        assignments, unassigned, taken = {}, [], set(self.booked)
+        while heap:
+            (count, *_), pk = heapq.heappop(heap)
+            if pk in assignments or count != options[pk]:
+                # Placed already, or a stale entry for a course whose options changed
+                continue
+            if not count:
+                unassigned.append(pk)
+                options[pk] = None
+                continue
+
+            group = group_of[pk]
+            batch = min(
+                (batch for batch in allowed[pk] if free[group, batch]),
+                key=lambda batch: (
+                    sum(batch in allowed[other] for other in neighbours[pk]),
+                    -free[group, batch],
+                    batches.index(batch),
+                ),
+            )
+            room = next(room for room in rooms_of[group] if (room, batch) not in taken)
+            assignments[pk] = (room, batch)
+            taken.add((room, batch))
+
+            for other in neighbours[pk]:
+                if batch in allowed[other]:
+                    allowed[other].discard(batch)
+                    if free[group_of[other], batch] and options[other] is not None:
+                        options[other] -= 1
+                        push(other)
+
+            for other_group in groups_of_room[room]:
+                free[other_group, batch] -= 1
+                if free[other_group, batch]:
+                    continue
+                # The last classroom of the group in the batch went
+                for other in members[other_group]:
+                    if batch in allowed[other] and options[other] and other not in assignments:
+                        options[other] -= 1
+                        push(other)
+
+        return Solution(assignments, unassigned)
+
+
+def get_rooms():
+    """The classrooms with a capacity in the settings, the others aren't used"""
+
+    capacities = settings.CLASSROOM_CAPACITY
+    return {
+        room: (capacities[room], room in Course.LABORATORIES)
+        for room, _ in Course.CLASSROOM_CHOICES
+        if room in capacities
+    }
+
+
+def load(course_ids=None):
+    """
+    Returns the timetable of the active courses in ``course_ids``, or of all of
+    them, with the other active courses booked where they are.
+    """
+
+    timetable = Timetable(get_rooms(), [batch for batch, _ in Course.BATCH_CHOICES])
+
+    teachers = defaultdict(list)
+    links = CourseTeachers.objects.filter(course__active=True).order_by()
+    for course_id, teacher_id in links.values_list("course_id", "teacher_id").iterator():
+        teachers[course_id].append(teacher_id)
+
+    courses = Course.objects.filter(active=True).order_by("name", "pk")
+    for pk, size, lab, classroom, batch in courses.values_list(
+        "pk", "student_count", "subject__requires_lab", "classroom", "batch"
+    ).iterator():
+        if course_ids is None or pk in course_ids:
+            timetable.add_course(pk, size, bool(lab), teachers[pk])
+        else:
+            timetable.book(classroom, batch, teachers[pk])
+
+    return timetable
+
+
+def apply(assignments, batch_size=500):
+    """Writes the changed slots in one bulk update, returns the number of courses moved"""
+
+    now = timezone.now()
+    changed = []
+    for course in Course.objects.filter(pk__in=assignments).only("classroom", "batch"):
+        classroom, batch = assignments[course.pk]
+        if (course.classroom, course.batch) != (classroom, batch):
+            course.classroom, course.batch, course.updated = classroom, batch, now
+            changed.append(course)
+
+    with transaction.atomic():
+        # The statistics count enrollments per batch, bulk_update sends no signals to move them
+        with tracking(Course, [course.pk for course in changed]):
+            Course.objects.bulk_update(changed, ["classroom", "batch", "updated"], batch_size)
+        # Bulk updates don't send the signals which drop the cached pages of the teachers
+        invalidate(teachers_of([course.pk for course in changed]))
+
+    return len(changed)
+
+
+def schedule(course_ids=None, commit=True):
+    """Solves the active courses in ``course_ids``, or all of them, and saves the result"""
+
+    if course_ids is not None:
+        course_ids = set(course_ids)
+
+    solution = load(course_ids).solve()
+    moved = apply(solution.assignments) if commit else 0
+
+    return solution, moved
@@ -1,6 +1,19 @@
 from django.urls import path
 
-from .views import CourseDetailView, CourseListView, HomePageView
+from .views import (
+    CourseAttendanceView,
+    CourseDetailView,
+    CourseGradesView,
+    CourseListView,
+    CourseRosterExportView,
+    ExportView,
+    GradeStatisticsView,
+    HomePageView,
+    PeopleSearchView,
+    StatisticsView,
+    course_detail_async,
+    course_list_async,
+)
 
 app_name = "classroom"
 
@@ -8,4 +21,22 @@ urlpatterns = [
     path("", HomePageView.as_view(), name="classroom_home"),
     path("courses/", CourseListView.as_view(), name="course_list"),
     path("courses/<uuid:pk>/", CourseDetailView.as_view(), name="course_detail"),
+    path(
+        "courses/<uuid:pk>/roster.<slug:format>",
+        CourseRosterExportView.as_view(),
+        name="course_roster_export",
+    ),
+    path(
+        "courses/<uuid:pk>/attendance/",
+        CourseAttendanceView.as_view(),
+        name="course_attendance",
+    ),
+    path("courses/<uuid:pk>/grades/", CourseGradesView.as_view(), name="course_grades"),
+    # Async versions of the course pages, for when served over ASGI, see main.asgi
+    path("async/courses/", course_list_async, name="course_list_async"),
+    path("async/courses/<uuid:pk>/", course_detail_async, name="course_detail_async"),
+    path("people/search/", PeopleSearchView.as_view(), name="people_search"),
+    path("statistics/", StatisticsView.as_view(), name="statistics"),
+    path("grades/statistics/", GradeStatisticsView.as_view(), name="grade_statistics"),
+    path("export/<slug:dataset>.<slug:format>", ExportView.as_view(), name="export"),
 ]
@@ -1,9 +1,37 @@
 """Views for the ElFaro app"""
 
-from django.contrib.auth.mixins import LoginRequiredMixin
-from django.views.generic import DetailView, ListView, TemplateView
+import uuid
 
-from classroom.models import Course
+from asgiref.sync import sync_to_async
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.core.paginator import Paginator
+from django.db import close_old_connections
+from django.db.models import Exists, OuterRef
+from django.http import Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.translation import gettext as _
+from django.views.generic import DetailView, ListView, TemplateView, View
+
+from classroom.attendance import get_absence_rates, get_daily_rates, mark_class, mark_students
+from classroom.cache import get_teacher_courses
+from classroom.exports import FORMATS, export_lines, get_dataset
+from classroom.gradebook import (
+    get_course_statistics,
+    get_grades,
+    get_group_statistics,
+    save_grades,
+)
+from classroom.models import Course, Grade, Teacher
+from classroom.pagination import keyset_page
+from classroom.search import search_people
+from classroom.statistics import get_dashboard
+from main.instrumentation import record_thread_queries
+
+CourseTeachers = Course.teachers.through
 
 
 class HomePageView(TemplateView):
@@ -13,22 +41,455 @@ class HomePageView(TemplateView):
 
 
 class CourseListView(LoginRequiredMixin, ListView):
-    """Lists all the courses for a particular teacher"""
+    """
+    Lists all the courses for a particular teacher, newest first.
+
+    The list comes from the per-teacher course cache and is keyset paginated
+    on (updated, id) through the ``cursor`` query parameter. The page size can
+    be picked with ``page_size`` up to a hard cap.
+    """
 
     model = Course
     context_object_name = "course_list"
     template_name = "classroom/course_list.html"
+    paginate_by = 25
+    max_paginate_by = 100
+    page_size_kwarg = "page_size"
+    cursor_kwarg = "cursor"
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        queryset = queryset.filter(teachers=self.request.user.teacher)
+        try:
+            teacher = self.request.user.teacher
+        except Teacher.DoesNotExist:
+            raise PermissionDenied
+
+        return get_teacher_courses(teacher.pk)
+
+    def get_paginate_by(self, queryset):
+        try:
+            page_size = int(self.request.GET.get(self.page_size_kwarg, self.paginate_by))
+        except ValueError:
+            page_size = self.paginate_by
+
+        return max(1, min(page_size, self.max_paginate_by))
+
+    def paginate_queryset(self, queryset, page_size):
+        try:
+            page = keyset_page(queryset, self.request.GET.get(self.cursor_kwarg), page_size)
+        except ValueError:
+            raise Http404(_("Invalid cursor."))
+
+        return (None, page, page.object_list, page.has_next())
+
+
+class CourseTeacherMixin(LoginRequiredMixin, UserPassesTestMixin):
+    """Lets the teachers of the course of the URL, and staff, in"""
+
+    def get_course_queryset(self):
+        return Course.objects.all()
+
+    def test_func(self):
+        user = self.request.user
+        # The course and whether the user teaches it, in one query
+        taught = CourseTeachers.objects.filter(course=OuterRef("pk"), teacher__user=user)
+        courses = self.get_course_queryset().annotate(is_taught=Exists(taught))
+        self.course = get_object_or_404(courses, pk=self.kwargs["pk"])
+        return user.is_staff or self.course.is_taught
 
-        return queryset
 
+class CourseDetailView(CourseTeacherMixin, DetailView):
+    """
+    Renders a detailed view for a course along with its roster, for the
+    teachers of the course and staff.
 
-class CourseDetailView(LoginRequiredMixin, DetailView):
-    """Renders a detailed view for a course"""
+    Only the columns the roster shows are loaded, the wide parent and address
+    fields never leave the database. Students are paged through ``roster_page``,
+    so the page costs the same handful of queries however many students are
+    enrolled. The teachers and the roster page are only queried when the
+    template renders them, which it doesn't when their cached fragments, see
+    ``classroom.templatetags.course_cache``, are still current. The roster's
+    are cached by the number of the page shown, not the one asked for.
+    """
 
     model = Course
     context_object_name = "course"
     template_name = "classroom/course_detail.html"
+    roster_paginate_by = 50
+    roster_page_kwarg = "roster_page"
+    student_roster_fields = ("id", "first_name", "last_name", "dni", "email", "phone_number")
+    teacher_roster_fields = ("id", "first_name", "last_name", "email", "certified")
+
+    def get_queryset(self):
+        return super().get_queryset().select_related("subject")
+
+    def get_course_queryset(self):
+        return self.get_queryset()
+
+    def get_object(self, queryset=None):
+        # Loaded along with the permission check
+        return self.course
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        students = self.object.students.only(*self.student_roster_fields).order_by(
+            "last_name", "first_name", "id"
+        )
+        paginator = Paginator(students, self.roster_paginate_by)
+        # The enrollment counter, so the page is resolved without a COUNT and
+        # only queried if its cached fragment is stale
+        paginator.count = self.object.student_count
+
+        context.update(
+            {
+                "teachers": self.object.teachers.only(*self.teacher_roster_fields).order_by(
+                    "last_name", "first_name"
+                ),
+                "roster_page": paginator.get_page(self.request.GET.get(self.roster_page_kwarg)),
+            }
+        )
+
+        return context
+
+
+def run_in_thread(func):
+    """
+    Makes a blocking, database using, function awaitable from the async views.
+
+    Django 3.2 has no async ORM, so queries have to run in a thread. These go to
+    a pool of threads, rather than the single thread Django runs sync code in,
+    so concurrent requests wait on the database side by side. The connections
+    which outlived CONN_MAX_AGE get closed like at the end of a sync request.
+    Their queries are counted by the query instrumentation of the request.
+    """
+
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            with record_thread_queries():
+                return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(wrapper, thread_sensitive=False)
+
+
+@run_in_thread
+def resolve_user(request, teacher=False):
+    """
+    Returns the user, and their teacher if asked to, of a request. request.user
+    is lazily loaded from the session and the database, so it must not be
+    touched for the first time from the event loop.
+    """
+
+    user = request.user
+    if not user.is_authenticated or not teacher:
+        return user, None
+
+    try:
+        return user, user.teacher
+    except Teacher.DoesNotExist:
+        raise PermissionDenied
+
+
+async def course_list_async(request):
+    """The async twin of CourseListView, for ASGI servers"""
+
+    user, teacher = await resolve_user(request, teacher=True)
+    if not user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+
+    view = CourseListView()
+    view.setup(request)
+    courses = await run_in_thread(get_teacher_courses)(teacher.pk)
+
+    # The summaries are plain dicts, paging through them doesn't touch the database
+    _paginator, page, object_list, is_paginated = view.paginate_queryset(
+        courses, view.get_paginate_by(courses)
+    )
+    context = {
+        "view": view,
+        "page_obj": page,
+        "is_paginated": is_paginated,
+        "object_list": object_list,
+        view.context_object_name: object_list,
+    }
+
+    return await run_in_thread(render)(request, view.template_name, context)
+
+
+async def course_detail_async(request, pk):
+    """The async twin of CourseDetailView, for ASGI servers"""
+
+    user, _teacher = await resolve_user(request)
+    if not user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+
+    view = CourseDetailView()
+    view.setup(request, pk=pk)
+
+    def get_context():
+        # The teachers of the course and staff only, like the sync view
+        if not view.test_func():
+            raise PermissionDenied
+        view.object = view.get_object()
+        return view.get_context_data(object=view.object)
+
+    # The teachers and roster are lazy, they're queried while rendering, if at all
+    context = await run_in_thread(get_context)()
+
+    return await run_in_thread(render)(request, view.template_name, context)
+
+
+class PeopleSearchView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
+    """
+    Ranked full text search of students and teachers for staff. Matches the
+    start of words in names, DNIs, cities and parents' names.
+    """
+
+    template_name = "classroom/people_search.html"
+    paginate_by = 20
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get("q", "")
+
+        try:
+            page = max(1, int(self.request.GET.get("page", 1)))
+        except ValueError:
+            page = 1
+
+        results = search_people(
+            query, limit=self.paginate_by + 1, offset=(page - 1) * self.paginate_by
+        )
+        context.update(
+            {
+                "query": query,
+                "page": page,
+                "results": results[: self.paginate_by],
+                "has_next": len(results) > self.paginate_by,
+            }
+        )
+
+        return context
+
+
+class StatisticsView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
+    """
+    Enrollment statistics of the school per batch and per subject group, for
+    staff. Reads the precomputed counts of classroom.statistics only, so it
+    costs the same whatever the number of students.
+    """
+
+    template_name = "classroom/statistics.html"
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        dashboard = get_dashboard()
+        context.update(
+            {
+                "total": dashboard["total"],
+                "sections": [
+                    (_("Batches"), dashboard["batches"], dashboard["total"]),
+                    (_("Subject groups"), dashboard["groups"], None),
+                ],
+            }
+        )
+        return context
+
+
+class ExportView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """
+    Streams all the students or all the teachers as CSV or JSON lines, for
+    staff. Memory use stays flat and the first bytes go out right away.
+    """
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get_dataset(self):
+        try:
+            return get_dataset(self.kwargs["dataset"])
+        except ValueError:
+            raise Http404(_("Unknown export."))
+
+    def get_filename(self):
+        return "%s.%s" % (self.kwargs["dataset"], self.kwargs["format"])
+
+    def get(self, request, *args, **kwargs):
+        fmt = self.kwargs["format"]
+        if fmt not in FORMATS:
+            raise Http404(_("Unknown export format."))
+
+        queryset, columns = self.get_dataset()
+        response = StreamingHttpResponse(
+            export_lines(queryset, columns, fmt), content_type=FORMATS[fmt][1]
+        )
+        response["Content-Disposition"] = 'attachment; filename="%s"' % self.get_filename()
+
+        return response
+
+
+class CourseRosterExportView(ExportView):
+    """Streams the students of a course, with their parents' contacts"""
+
+    def get_dataset(self):
+        self.course = get_object_or_404(Course, pk=self.kwargs["pk"])
+        return get_dataset("roster", course=self.course)
+
+    def get_filename(self):
+        return "roster-%s.%s" % (self.course.pk, self.kwargs["format"])
+
+
+class CourseAttendanceView(CourseTeacherMixin, View):
+    """
+    The attendance of a course, for its teachers and staff, as JSON.
+
+    GET reports the share of the class present every day and the share of
+    days every student was absent, between the ``start`` and ``end`` dates.
+    POST marks the class of a ``date``, today by default: with ``status``
+    "present" or "absent", the whole class but the ``except`` students, or
+    only the ``students`` given.
+    """
+
+    def get_date(self, data, key, default=None):
+        value = data.get(key)
+        if not value:
+            return default
+        try:
+            date = parse_date(value)
+        except ValueError:
+            date = None
+        if date is None:
+            raise ValueError("Invalid date %r" % value)
+        return date
+
+    def get(self, request, *args, **kwargs):
+        try:
+            start = self.get_date(request.GET, "start")
+            end = self.get_date(request.GET, "end")
+        except ValueError as error:
+            return HttpResponseBadRequest(str(error))
+
+        students = get_absence_rates(self.course, start, end)
+        return JsonResponse(
+            {
+                "days": get_daily_rates([self.course], start, end),
+                "students": {str(pk): rates for pk, rates in students.items()},
+            }
+        )
+
+    def post(self, request, *args, **kwargs):
+        try:
+            date = self.get_date(request.POST, "date", timezone.localdate())
+            exceptions = [uuid.UUID(pk) for pk in request.POST.getlist("except")]
+            students = [uuid.UUID(pk) for pk in request.POST.getlist("students")]
+        except ValueError as error:
+            return HttpResponseBadRequest(str(error))
+
+        status = request.POST.get("status")
+        if status not in ("present", "absent"):
+            return HttpResponseBadRequest("The status must be present or absent.")
+
+        present = status == "present"
+        if students:
+            mark_students(self.course, date, students, present)
+        else:
+            mark_class(self.course, date, present, exceptions)
+
+        return JsonResponse({"days": get_daily_rates([self.course], date, date)})
+
+
+def get_term(data):
+    """Returns the ``term`` of the query or form data, None if there is none"""
+
+    term = data.get("term")
+    if not term:
+        return None
+    try:
+        term = int(term)
+    except ValueError:
+        term = None
+    if term not in dict(Grade.TERM_CHOICES):
+        raise ValueError("Invalid term %r" % data.get("term"))
+    return term
+
+
+class CourseGradesView(CourseTeacherMixin, View):
+    """
+    The marks of a course, for its teachers and staff, as JSON.
+
+    GET returns the marks of the ``term``, all terms by default, and their
+    statistics. POST stores the marks of a whole class for a ``term`` at
+    once, one ``grade-<student id>`` field per student.
+    """
+
+    grade_prefix = "grade-"
+
+    def get_response(self, term):
+        grades = get_grades(term, course=self.course).values_list("student_id", "term", "value")
+        return JsonResponse(
+            {
+                "grades": [
+                    {"student": student_id, "term": term, "value": value}
+                    for student_id, term, value in grades
+                ],
+                "statistics": get_course_statistics([self.course], term).get(self.course.pk),
+            }
+        )
+
+    def get(self, request, *args, **kwargs):
+        try:
+            term = get_term(request.GET)
+        except ValueError as error:
+            return HttpResponseBadRequest(str(error))
+
+        return self.get_response(term)
+
+    def post(self, request, *args, **kwargs):
+        try:
+            term = get_term(request.POST)
+            grades = {
+                uuid.UUID(key[len(self.grade_prefix) :]): value
+                for key, value in request.POST.items()
+                if key.startswith(self.grade_prefix)
+            }
+        except ValueError as error:
+            return HttpResponseBadRequest(str(error))
+
+        if term is None:
+            return HttpResponseBadRequest("The term is required.")
+
+        try:
+            save_grades(self.course, term, grades)
+        except ValidationError as error:
+            return JsonResponse({"errors": error.messages}, status=400)
+
+        return self.get_response(term)
+
+
+class GradeStatisticsView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """The statistics of the marks of every subject group and course, for staff, as JSON"""
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        try:
+            term = get_term(request.GET)
+        except ValueError as error:
+            return HttpResponseBadRequest(str(error))
+
+        groups = get_group_statistics(term=term)
+        courses = get_course_statistics(term=term)
+        return JsonResponse(
+            {
+                "groups": {str(pk): stats for pk, stats in groups.items()},
+                "courses": {str(pk): stats for pk, stats in courses.items()},
+            }
+        )
@@ -3,14 +3,34 @@ ASGI config for main project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI server, ie. uvicorn workers under gunicorn::
+
+    gunicorn main.asgi:application -k uvicorn.workers.UvicornWorker --workers 4
+
+or ``make run-asgi`` for development. Every worker runs one event loop. The
+async course pages, ``classroom.views.course_list_async`` and
+``course_detail_async``, wait on the database in a pool of threads while the
+loop serves other requests. The sync views still work, Django runs them one at
+a time in a thread of their own, so keep WSGI for a mostly sync deployment.
+Set DB_CONN_MAX_AGE, see main.database, so the pool threads reuse connections.
+``manage.py async_benchmark`` compares both.
+
+Workers warm up before they take traffic, see main.warmup.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 """
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'main.settings')
 
 application = get_asgi_application()
+
+if settings.WARM_UP:
+    from main.warmup import warm_up
+
+    warm_up()
@@ -0,0 +1,142 @@
+"""
+Query instrumentation shared by the QueryInstrumentationMiddleware and the
+query budget assertions of the test suite.
+
+Connections are per thread, so rather than installing a recorder on the
+connections of the thread which records, every connection gets one execute
+wrapper, ``dispatch``, as it opens. It hands the queries to the recorders of
+a context variable, which ``record_queries`` sets. asgiref copies the context
+to the threads it runs sync code in, so the queries of the sync views of an
+ASGI server, and of the ``run_in_thread`` of the async views, count for the
+request which gave them the work. Other threads started by hand aren't
+recorded.
+"""
+
+import functools
+import hashlib
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# "IN (%s, %s, %s)" and "IN (%s)" are the same query with a different number of params
+IN_LIST = re.compile(r"\((?:%s,\s*)+%s\)")
+
+# The recorders of the running requests or blocks, innermost last
+current_recorders = ContextVar("current_recorders", default=())
+
+
+def fingerprint(sql):
+    """Returns a short stable id for the shape of a query, whatever its params"""
+
+    normalised = IN_LIST.sub("(%s)", sql)
+    return hashlib.sha1(normalised.encode()).hexdigest()[:12]
+
+
+class QueryRecorder:
+    """
+    An execute wrapper which counts and times the queries run through the
+    connections it's installed on, keeping one sample per query shape.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.samples = {}
+        # Queries may run in several threads at once
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            key = fingerprint(sql)
+            with self.lock:
+                self.duration += duration
+                self.count += 1
+                self.fingerprints[key] += 1
+                self.samples.setdefault(key, sql)
+
+    @property
+    def duplicates(self):
+        """Returns the query shapes run more than once, the usual sign of an N+1"""
+
+        return {key: count for key, count in self.fingerprints.items() if count > 1}
+
+    def as_dict(self):
+        return {
+            "queries": self.count,
+            "db_ms": round(self.duration * 1000, 2),
+            "duplicates": [
+                {"fingerprint": key, "count": count, "sql": self.samples[key][:200]}
+                for key, count in sorted(self.duplicates.items(), key=lambda item: -item[1])
+            ],
+        }
+
+
+def dispatch(execute, sql, params, many, context):
+    """The execute wrapper of every connection, runs the query through the current recorders"""
+
+    for recorder in current_recorders.get():
+        execute = functools.partial(recorder, execute)
+    return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def add_dispatcher(sender, connection, **kwargs):
+    if dispatch not in connection.execute_wrappers:
+        connection.execute_wrappers.append(dispatch)
+
+
+def add_dispatchers():
+    """Adds ``dispatch`` to the connections of this thread opened before this module was loaded"""
+
+    for connection in connections.all():
+        add_dispatcher(None, connection)
+
+
+@contextmanager
+def install(recorder):
+    """
+    Installs ``recorder`` on every database connection of this thread, for the
+    queries run outside of its context, like those of a response's content
+    """
+
+    with ExitStack() as stack:
+        for connection in connections.all():
+            if recorder not in connection.execute_wrappers:
+                stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+
+@contextmanager
+def record_queries():
+    """Records the queries of this thread, and of the threads given work with its context"""
+
+    add_dispatchers()
+    recorder = QueryRecorder()
+    token = current_recorders.set(current_recorders.get() + (recorder,))
+    try:
+        yield recorder
+    finally:
+        current_recorders.reset(token)
+
+
+@contextmanager
+def record_thread_queries():
+    """
+    Records the queries of this thread with the recorders of the context it
+    runs in, if any, for functions run in another thread like sync_to_async's
+    """
+
+    add_dispatchers()
+    yield current_recorders.get()
@@ -0,0 +1,186 @@
+"""Project wide middleware"""
+
+import asyncio
+import json
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+from main.instrumentation import install, record_queries
+from main.staticfiles import StaticFileIndex
+
+logger = logging.getLogger("main.instrumentation")
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Records the number of queries, the time spent in the database and in the
+    view, and the repeated query shapes of every request.
+
+    Results are sent back in a Server-Timing header, which browsers show in
+    their network panel, and logged as one JSON line per request. Opt-in, set
+    QUERY_INSTRUMENTATION=1 in the environment to enable it.
+
+    Streaming responses, like the exports, run most of their queries after
+    the view returns. Their header only has the queries of the view, and the
+    line is logged once the content has been sent, with all of them. File
+    responses, which the server may send itself, are logged right away.
+
+    Both sync and async, like StaticFilesMiddleware, so turning it on doesn't
+    put the async views of an ASGI server behind a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.QUERY_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(self.get_response):
+            # Tells Django this instance is a coroutine function, like MiddlewareMixin
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        started = time.perf_counter()
+        with record_queries() as recorder:
+            response = self.get_response(request)
+
+        return self.process_response(request, response, recorder, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with record_queries() as recorder:
+            response = await self.get_response(request)
+
+        return self.process_response(request, response, recorder, started)
+
+    def process_response(self, request, response, recorder, started):
+        stats = recorder.as_dict()
+        response["Server-Timing"] = 'db;dur=%s;desc="%s queries", view;dur=%s' % (
+            stats["db_ms"],
+            stats["queries"],
+            self.get_view_ms(recorder, started),
+        )
+
+        if response.streaming and not isinstance(response, FileResponse):
+            response.streaming_content = self.record_stream(
+                request, response, response.streaming_content, recorder, started
+            )
+        else:
+            self.log(request, response, recorder, started)
+
+        return response
+
+    def get_view_ms(self, recorder, started):
+        return round((time.perf_counter() - started - recorder.duration) * 1000, 2)
+
+    def record_stream(self, request, response, content, recorder, started):
+        try:
+            with install(recorder):
+                yield from content
+        finally:
+            self.log(request, response, recorder, started)
+
+    def log(self, request, response, recorder, started):
+        logger.info(
+            json.dumps(
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "view_ms": self.get_view_ms(recorder, started),
+                    **recorder.as_dict(),
+                }
+            )
+        )
+
+
+class StaticFilesMiddleware:
+    """
+    Serves the collected static files, see main.staticfiles, so a small
+    deployment needs no separate static server. Goes right after the security
+    middleware, so static requests skip the sessions and authentication.
+
+    Picks the brotli or gzip variant the client accepts, sends hashed names
+    with immutable far future cache headers and answers revalidations with a
+    304. Anything not in STATIC_ROOT goes down the stack. Opt-out, set
+    SERVE_STATIC=0 in the environment to leave static files to another server.
+
+    Both sync and async, so it doesn't put the async views of an ASGI server
+    behind a thread. The lookup is a dictionary read, only the static files
+    themselves are opened in a thread, off the event loop.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SERVE_STATIC:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.index = StaticFileIndex(settings.STATIC_ROOT, settings.STATIC_URL)
+        if asyncio.iscoroutinefunction(self.get_response):
+            # Tells Django this instance is a coroutine function, like MiddlewareMixin
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        static_file = self.get_static_file(request)
+        if static_file is None:
+            return self.get_response(request)
+
+        return self.serve(request, static_file)
+
+    async def __acall__(self, request):
+        static_file = self.get_static_file(request)
+        if static_file is None:
+            return await self.get_response(request)
+
+        return await sync_to_async(self.serve, thread_sensitive=False)(request, static_file)
+
+    def get_static_file(self, request):
+        if request.method not in ("GET", "HEAD"):
+            return None
+
+        return self.index.get(request.path_info)
+
+    def serve(self, request, static_file):
+        encoding, path, size = static_file.get_variant(
+            request.META.get("HTTP_ACCEPT_ENCODING", "")
+        )
+        etag = static_file.get_etag(encoding)
+
+        if etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+            response = HttpResponseNotModified()
+        else:
+            if request.method == "HEAD":
+                response = HttpResponse(content_type=static_file.content_type)
+            else:
+                # Sent with the server's sendfile when it has one
+                response = FileResponse(open(path, "rb"), content_type=static_file.content_type)
+                del response["Content-Disposition"]
+            response["Content-Length"] = size
+            if encoding:
+                response["Content-Encoding"] = encoding
+
+        response["ETag"] = etag
+        response["Last-Modified"] = static_file.last_modified
+        response["Cache-Control"] = static_file.cache_control
+        if static_file.variants:
+            patch_vary_headers(response, ("Accept-Encoding",))
+
+        return response
@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 import os
 from pathlib import Path
 
+from main.database import get_database
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -28,6 +30,28 @@ DEBUG = int(os.environ.get("DEBUG", default=0))
 
 ALLOWED_HOSTS = ["testserver", "localhost", "127.0.0.1"]
 
+# Per request query count, db time and N+1 detection, see main.middleware
+QUERY_INSTRUMENTATION = int(os.environ.get("QUERY_INSTRUMENTATION", default=0))
+
+# Reject any course save or teacher assignment which double books a classroom or
+# a teacher, not only those made through forms, see classroom.conflicts
+STRICT_BOOKINGS = int(os.environ.get("STRICT_BOOKINGS", default=0))
+
+# Compile the templates, resolve the URLs and connect to the database as the
+# WSGI or ASGI application loads, see main.warmup
+WARM_UP = int(os.environ.get("WARM_UP", default=not DEBUG))
+
+# Seats per classroom, by Course.classroom code, for the timetable solver
+CLASSROOM_CAPACITY = {
+    **{"A%s" % number: 30 for number in range(1, 11)},
+    "B": 40,
+    "P": 120,
+    "C": 120,
+    "LF": 30,
+    "LT": 30,
+    "LI": 30,
+}
+
 
 # Application definition
 
@@ -50,7 +74,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "main.middleware.QueryInstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "main.middleware.StaticFilesMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -73,7 +99,14 @@ ACCOUNT_EMAIL_REQUIRED = True
 ACCOUNT_UNIQUE_EMAIL = True
 ACCOUNT_LOGOUT_REDIRECT = "classroom:classroom_home"
 LOGIN_REDIRECT_URL = "classroom:classroom_home"
+# Django's and allauth's backends, with the user of the session loaded from a
+# cache along with its teacher or student profile, see users.cache. The plain
+# ones stay listed, after them, as sessions keep the path of the backend they
+# logged in with and those from before the cached backends would be dropped.
+# They can go once those sessions have expired.
 AUTHENTICATION_BACKENDS = (
+    "users.backends.CachedModelBackend",
+    "users.backends.CachedAuthenticationBackend",
     "django.contrib.auth.backends.ModelBackend",
     "allauth.account.auth_backends.AuthenticationBackend",
 )
@@ -105,11 +138,68 @@ WSGI_APPLICATION = "main.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# See main.database, which also tunes every SQLite connection
 DATABASES = {
+    "default": get_database(
+        os.environ.get("DATABASE_URL", "sqlite:///%s" % (BASE_DIR / "db.sqlite3")),
+        conn_max_age=int(os.environ.get("DB_CONN_MAX_AGE", default=600)),
+        health_checks=bool(int(os.environ.get("DB_HEALTH_CHECKS", default=1))),
+        server_side_cursors=bool(int(os.environ.get("DB_SERVER_SIDE_CURSORS", default=1))),
+    )
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+# The per-teacher course lists get their own alias. Local memory evicts the least
+# recently used entries, set COURSE_CACHE_BACKEND and COURSE_CACHE_LOCATION to
+# share it between workers, ie. PyMemcacheCache and 127.0.0.1:11211
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "courses": {
+        "BACKEND": os.environ.get(
+            "COURSE_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("COURSE_CACHE_LOCATION", "courses"),
+        "TIMEOUT": 60 * 60 * 24,
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+    # Sessions and their users, set AUTH_CACHE_BACKEND and AUTH_CACHE_LOCATION
+    # like the course cache to share it between workers
+    "auth": {
+        "BACKEND": os.environ.get(
+            "AUTH_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("AUTH_CACHE_LOCATION", "auth"),
+        "TIMEOUT": 60 * 5,
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+COURSE_CACHE_ALIAS = "courses"
+USER_CACHE_ALIAS = "auth"
+
+# Sessions are read from the cache and written through to the database, so
+# they survive a cache restart
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+SESSION_CACHE_ALIAS = "auth"
+
+
+# Logging
+# https://docs.djangoproject.com/en/3.2/topics/logging/
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "main.instrumentation": {"handlers": ["console"], "level": "INFO", "propagate": False},
+        "main.warmup": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
 }
 
 
@@ -158,6 +248,12 @@ STATICFILES_FINDERS = [
     "django.contrib.staticfiles.finders.FileSystemFinder",
     "django.contrib.staticfiles.finders.AppDirectoriesFinder",
 ]
+# Content hashed names plus gzip and brotli variants, written by collectstatic.
+# The tests use plain storage, see main.testing.TestRunner
+STATICFILES_STORAGE = "main.staticfiles.CompressedManifestStaticFilesStorage"
+TEST_RUNNER = "main.testing.TestRunner"
+# Serve STATIC_ROOT from the application, see main.middleware.StaticFilesMiddleware
+SERVE_STATIC = int(os.environ.get("SERVE_STATIC", default=1))
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
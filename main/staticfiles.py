@@ -0,0 +1,180 @@
+"""
+Static files pipeline.
+
+``collectstatic`` stores every file under a name carrying a hash of its
+content, through Django's manifest storage, and writes gzip and, with the
+Brotli package installed, brotli variants of the text files next to them,
+ie. ``css/style.1a2b3c4d5e6f.css.gz`` and ``.br``. Compressing once at
+deploy time allows the slowest, smallest, settings.
+
+``StaticFilesMiddleware`` in ``main.middleware`` serves ``STATIC_ROOT`` from
+the application server: the variant the client accepts, and hashed names
+with far future immutable cache headers as their content can never change
+under them. ``StaticFileIndex`` scans the directory once at startup, so a
+request is a dictionary lookup and a file read.
+"""
+
+import gzip
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {
+    ".css",
+    ".js",
+    ".map",
+    ".json",
+    ".svg",
+    ".txt",
+    ".html",
+    ".xml",
+    ".ico",
+    ".ttf",
+    ".otf",
+    ".eot",
+}
+# Below this the headers outweigh the savings
+MIN_COMPRESS_SIZE = 256
+# A variant which doesn't save at least 5% isn't worth the negotiation
+MAX_COMPRESS_RATIO = 0.95
+
+# Preferred first
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Unhashed names may change at the next deploy, clients revalidate them
+MUTABLE_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+
+# The 12 hex digits ManifestStaticFilesStorage puts before the extension
+HASHED_NAME = re.compile(r"\.[0-9a-f]{12}(\.[^/.]+)?$")
+
+
+def compress(data):
+    """Returns the compressed variants of ``data`` worth keeping, by file suffix"""
+
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+
+    return {
+        suffix: compressed
+        for suffix, compressed in variants.items()
+        if len(compressed) <= len(data) * MAX_COMPRESS_RATIO
+    }
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage which also writes precompressed variants of the hashed files"""
+
+    # Files missing from the manifest, ie. copied after the last collectstatic,
+    # are hashed from their content instead of raising ValueError
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        # The hashed names are only final once every pass is done
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+        if not dry_run:
+            for name in set(self.hashed_files.values()):
+                self.compress(name)
+
+    def compress(self, name):
+        if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+            return
+
+        with self.open(name) as f:
+            data = f.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+
+        for suffix, compressed in compress(data).items():
+            # Hashed names never change content, a variant written before is current
+            if not self.exists(name + suffix):
+                self._save(name + suffix, ContentFile(compressed))
+
+
+class StaticFile:
+    def __init__(self, path, url):
+        stat = os.stat(path)
+        self.path = path
+        self.size = stat.st_size
+        self.mtime = int(stat.st_mtime)
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        self.content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.cache_control = (
+            IMMUTABLE_CACHE_CONTROL if HASHED_NAME.search(url) else MUTABLE_CACHE_CONTROL
+        )
+        # Only the encodings with a variant on disk
+        self.variants = {}
+        for encoding, suffix in ENCODINGS:
+            if os.path.isfile(path + suffix):
+                self.variants[encoding] = (path + suffix, os.stat(path + suffix).st_size)
+
+    def get_variant(self, accept_encoding):
+        """Returns the encoding, if any, the path and the size to send for the header"""
+
+        accepted = parse_accept_encoding(accept_encoding)
+        for encoding, _ in ENCODINGS:
+            if encoding in self.variants and accepted.get(encoding, 0) > 0:
+                return (encoding, *self.variants[encoding])
+
+        return None, self.path, self.size
+
+    def get_etag(self, encoding):
+        # The same in every worker, and different for every variant
+        return '"%x-%x%s"' % (self.mtime, self.size, "-" + encoding if encoding else "")
+
+
+def parse_accept_encoding(header):
+    """Returns the q value of every encoding of an Accept-Encoding header"""
+
+    accepted = {}
+    for item in header.split(","):
+        encoding, _, params = item.strip().partition(";")
+        if not encoding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[encoding.strip().lower()] = quality
+
+    if "*" in accepted:
+        for encoding, _ in ENCODINGS:
+            accepted.setdefault(encoding, accepted["*"])
+
+    return accepted
+
+
+class StaticFileIndex:
+    """The files of a directory by URL path, without the compressed variants"""
+
+    def __init__(self, root, url):
+        self.files = {}
+        if not root or not os.path.isdir(root):
+            return
+
+        suffixes = tuple(suffix for _, suffix in ENCODINGS)
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                if filename.endswith(suffixes) and os.path.isfile(path.rsplit(".", 1)[0]):
+                    continue
+                relative = os.path.relpath(path, root).replace(os.sep, "/")
+                self.files[url + relative] = StaticFile(path, url + relative)
+
+    def get(self, path):
+        return self.files.get(path)
@@ -0,0 +1,49 @@
+"""Helpers for the test suites of the project apps"""
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from main.instrumentation import record_queries
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Runs the tests with plain static files storage, the manifest one can only
+    name the files a collectstatic wrote. Tests of the manifest storage give
+    it a STATIC_ROOT of their own.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.static_settings = override_settings(
+            STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage"
+        )
+        self.static_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.static_settings.disable()
+        super().teardown_test_environment(**kwargs)
+
+
+class QueryBudgetMixin:
+    """
+    Adds ``assertQueryBudget`` to a TestCase, to fail as soon as a page runs
+    more queries than it's allowed to or repeats the same query shape.
+    """
+
+    def assertQueryBudget(self, url, max_queries, max_duplicates=0, client=None):
+        client = client or self.client
+
+        with record_queries() as recorder:
+            response = client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        stats = recorder.as_dict()
+        self.assertLessEqual(
+            recorder.count, max_queries, "%s ran over its query budget: %s" % (url, stats)
+        )
+        self.assertLessEqual(
+            len(recorder.duplicates), max_duplicates, "%s repeats queries: %s" % (url, stats)
+        )
+
+        return response
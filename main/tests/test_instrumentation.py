@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from classroom.models import Course
+from classroom.views import run_in_thread
+from main.instrumentation import record_queries
+from main.middleware import QueryInstrumentationMiddleware
+
+
+def count_courses():
+    return Course.objects.count()
+
+
+@override_settings(QUERY_INSTRUMENTATION=True)
+class QueryInstrumentationTests(TestCase):
+    def run_middleware(self, view):
+        middleware = QueryInstrumentationMiddleware(lambda request: view())
+        with self.assertLogs("main.instrumentation") as logs:
+            response = middleware(RequestFactory().get("/"))
+            if response.streaming:
+                b"".join(response.streaming_content)
+        return response, [json.loads(line.split(":", 2)[2]) for line in logs.output]
+
+    def test_view(self):
+        def view():
+            count_courses()
+            count_courses()
+            return HttpResponse()
+
+        response, (stats,) = self.run_middleware(view)
+
+        self.assertIn('desc="2 queries"', response["Server-Timing"])
+        self.assertEqual(stats["queries"], 2)
+        self.assertEqual(len(stats["duplicates"]), 1)
+
+    def test_streaming(self):
+        def view():
+            count_courses()
+            return StreamingHttpResponse(str(count_courses()) for _ in range(3))
+
+        response, (stats,) = self.run_middleware(view)
+
+        # The header goes out before the content, the log line after it
+        self.assertIn('desc="1 queries"', response["Server-Timing"])
+        self.assertEqual(stats["queries"], 4)
+
+    def test_async(self):
+        async def get_response(request):
+            # A sync view adapted by Django, and an async one's queries
+            await sync_to_async(count_courses)()
+            await run_in_thread(count_courses)()
+            return HttpResponse()
+
+        middleware = QueryInstrumentationMiddleware(get_response)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+
+        with self.assertLogs("main.instrumentation") as logs:
+            response = async_to_sync(middleware)(RequestFactory().get("/"))
+
+        (stats,) = [json.loads(line.split(":", 2)[2]) for line in logs.output]
+        self.assertIn("Server-Timing", response)
+        self.assertEqual([duplicate["count"] for duplicate in stats["duplicates"]], [2])
+
+    def test_nested(self):
+        with record_queries() as outer:
+            count_courses()
+            with record_queries() as inner:
+                count_courses()
+
+        self.assertEqual((outer.count, inner.count), (2, 1))
+
+    def test_other_threads(self):
+        with record_queries() as recorder:
+            count_courses()
+            async_to_sync(run_in_thread(count_courses))()
+
+        # The thread's connection may have been opened, and set up, too
+        self.assertEqual(recorder.duplicates, {self.get_fingerprint(recorder): 2})
+
+        # Nothing recorded outside of a recording block
+        count = recorder.count
+        async_to_sync(run_in_thread(count_courses))()
+        self.assertEqual(recorder.count, count)
+
+    def get_fingerprint(self, recorder):
+        (key,) = [key for key, sql in recorder.samples.items() if "COUNT(*)" in sql]
+        return key
@@ -0,0 +1,107 @@
+import asyncio
+import gzip
+import os
+import shutil
+import tempfile
+
+from asgiref.sync import async_to_sync
+from django.core.handlers.base import BaseHandler
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from main.middleware import StaticFilesMiddleware
+from main.staticfiles import CompressedManifestStaticFilesStorage, parse_accept_encoding
+
+
+class StaticFilesTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = tempfile.mkdtemp()
+        cls.settings = override_settings(
+            STATIC_ROOT=cls.root,
+            STATICFILES_STORAGE="main.staticfiles.CompressedManifestStaticFilesStorage",
+            SERVE_STATIC=True,
+        )
+        cls.settings.enable()
+        call_command("collectstatic", interactive=False, verbosity=0)
+        cls.storage = CompressedManifestStaticFilesStorage(location=cls.root)
+        cls.middleware = StaticFilesMiddleware(lambda request: None)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        shutil.rmtree(cls.root)
+        super().tearDownClass()
+
+    def get(self, url, **headers):
+        return self.middleware(RequestFactory().get(url, **headers))
+
+    def test_hashed_and_compressed(self):
+        url = self.storage.url("admin/css/base.css")
+        self.assertRegex(url, r"^/static/admin/css/base\.[0-9a-f]{12}\.css$")
+
+        response = self.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        with self.storage.open(self.storage.stored_name("admin/css/base.css")) as f:
+            self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), f.read())
+        response.close()
+
+    def test_not_in_manifest(self):
+        # Collected after the manifest was written, hashed from its content
+        with open(os.path.join(self.root, "late.css"), "w") as f:
+            f.write("body {}")
+
+        self.assertRegex(self.storage.stored_name("late.css"), r"^late\.[0-9a-f]{12}\.css$")
+
+    def test_identity(self):
+        name = self.storage.stored_name("admin/css/base.css")
+        response = self.get("/static/" + name, HTTP_ACCEPT_ENCODING="identity")
+
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(int(response["Content-Length"]), self.storage.size(name))
+        response.close()
+
+    def test_unhashed_revalidated(self):
+        response = self.get("/static/admin/css/base.css")
+        response.close()
+        self.assertEqual(response["Cache-Control"], "public, max-age=0, must-revalidate")
+
+        response = self.get("/static/admin/css/base.css", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_not_static(self):
+        self.assertIsNone(self.get("/static/missing.css"))
+        self.assertIsNone(self.get("/courses/"))
+
+    def test_async(self):
+        async def get_response(request):
+            return "view"
+
+        middleware = StaticFilesMiddleware(get_response)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+
+        def get(url):
+            return async_to_sync(middleware)(RequestFactory().get(url))
+
+        self.assertEqual(get("/courses/"), "view")
+        response = get("/static/admin/css/base.css")
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+    def test_async_stack(self):
+        # Nothing adapts the stack of an ASGI server to sync for this middleware
+        with override_settings(DEBUG=True), self.assertLogs("django.request", "DEBUG") as logs:
+            BaseHandler().load_middleware(is_async=True)
+
+        self.assertFalse(
+            [message for message in logs.output if "StaticFilesMiddleware adapted" in message]
+        )
+
+    def test_accept_encoding(self):
+        self.assertEqual(parse_accept_encoding("gzip;q=0.5, br;q=0"), {"gzip": 0.5, "br": 0.0})
+        self.assertEqual(parse_accept_encoding("*"), {"*": 1.0, "br": 1.0, "gzip": 1.0})
@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.template import engines
+from django.test import TestCase, override_settings
+
+from classroom.management.commands.startup_profile import parse_import_times
+from main.warmup import get_template_names, warm_up
+
+CACHED_TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "DIRS": [],
+        "APP_DIRS": True,
+        "OPTIONS": {"debug": False},
+    }
+]
+
+
+class WarmUpTests(TestCase):
+    @override_settings(TEMPLATES=CACHED_TEMPLATES)
+    def test_warm_up(self):
+        with self.assertLogs("main.warmup"):
+            report = warm_up()
+
+        self.assertGreater(report["urls"]["patterns"], 0)
+        self.assertGreater(report["templates"]["compiled"], 0)
+        self.assertEqual(report["templates"]["failed"], [])
+        self.assertEqual(report["databases"]["connections"], 1)
+
+        # Served from the cached loader from now on
+        loader = engines["django"].engine.template_loaders[0]
+        self.assertIn("classroom/course_list.html", loader.get_template_cache)
+
+    def test_template_names(self):
+        names = get_template_names(engines["django"])
+
+        self.assertIn("layouts/base.html", names)
+        self.assertIn("classroom/course_detail.html", names)
+        self.assertIn("admin/base.html", names)
+
+    def test_parse_import_times(self):
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |     django.utils.version\n"
+            "import time:        30 |        150 |   django\n"
+            "some other line\n"
+        )
+
+        self.assertEqual(parse_import_times(output), {"django.utils.version": 120, "django": 30})
+
+    def test_startup_profile(self):
+        # The boot must not depend on the directory the command is run from
+        cwd = os.getcwd()
+        stdout = StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            try:
+                call_command("startup_profile", no_warm_up=True, json=True, top=3, stdout=stdout)
+            finally:
+                os.chdir(cwd)
+
+        report = json.loads(stdout.getvalue())
+        self.assertIn("apps", report["phases_ms"])
+        self.assertEqual(len(report["modules_ms"]), 3)
@@ -0,0 +1,105 @@
+"""
+Worker warm-up.
+
+Django imports the views, compiles the templates and connects to the database
+lazily, on the first requests which need them, so those requests after every
+deploy or scale out pay for the worker's start. ``warm_up`` does it all as the
+worker boots, before it takes traffic. ``main.wsgi`` and ``main.asgi`` call
+it unless ``WARM_UP`` is off, which it is by default with ``DEBUG`` where
+templates aren't cached and the autoreloader restarts often.
+
+Templates only stay compiled with the cached loader, which Django uses when
+``DEBUG`` is off. The database connections are opened in the thread which
+imports the application. That is the request thread of a sync gunicorn
+worker, so the connection is reused there with ``DB_CONN_MAX_AGE``. Under
+ASGI requests run in other threads and it only checks the database is up.
+Don't use it with ``gunicorn --preload``, the workers would share the
+connections of the master.
+"""
+
+import json
+import logging
+import os
+import time
+
+from django.db import connections
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.template.loaders.cached import Loader as CachedLoader
+from django.template.utils import get_app_template_dirs
+from django.urls import get_resolver
+
+logger = logging.getLogger("main.warmup")
+
+TEMPLATE_EXTENSIONS = (".html", ".txt", ".xml")
+
+
+def get_template_names(engine):
+    """Every template name under the directories and app directories of an engine"""
+
+    directories = list(engine.dirs)
+    if engine.app_dirs:
+        directories += get_app_template_dirs("templates")
+
+    names = set()
+    for root in directories:
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                if filename.endswith(TEMPLATE_EXTENSIONS):
+                    path = os.path.join(directory, filename)
+                    names.add(os.path.relpath(path, root).replace(os.sep, "/"))
+
+    return sorted(names)
+
+
+def compile_templates():
+    """
+    Loads every template into the cached loaders. Some can fail, ie. templates
+    of apps which aren't installed or fragments which aren't valid on their own.
+    """
+
+    compiled, failed = 0, []
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        if not any(isinstance(loader, CachedLoader) for loader in engine.engine.template_loaders):
+            continue
+
+        for name in get_template_names(engine):
+            try:
+                engine.get_template(name)
+            except Exception:
+                failed.append(name)
+            else:
+                compiled += 1
+
+    return {"compiled": compiled, "failed": failed}
+
+
+def resolve_urls():
+    """Imports every URLconf and the views, and builds the reverse lookup tables"""
+
+    return {"patterns": len(get_resolver().reverse_dict)}
+
+
+def connect_databases():
+    for connection in connections.all():
+        connection.ensure_connection()
+    return {"connections": len(connections.all())}
+
+
+def warm_up():
+    """Runs every step, returns and logs the time each took"""
+
+    report = {}
+    for name, step in (
+        ("urls", resolve_urls),
+        ("templates", compile_templates),
+        ("databases", connect_databases),
+    ):
+        started = time.perf_counter()
+        result = step()
+        report[name] = {"ms": round((time.perf_counter() - started) * 1000, 1), **result}
+
+    logger.info(json.dumps({"warm_up": report}))
+    return report
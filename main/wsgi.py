@@ -2,6 +2,7 @@
 WSGI config for main project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
+Workers warm up before they take traffic, see main.warmup.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/wsgi/
@@ -9,8 +10,14 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'main.settings')
 
 application = get_wsgi_application()
+
+if settings.WARM_UP:
+    from main.warmup import warm_up
+
+    warm_up()
@@ -0,0 +1,25 @@
+"""
+Authentication backends which load the session's user from ``users.cache``.
+
+They authenticate like the backends they extend, only ``get_user``, which
+runs on every request with a session, changes.
+"""
+
+from allauth.account.auth_backends import AuthenticationBackend
+from django.contrib.auth.backends import ModelBackend
+
+from users.cache import load_user
+
+
+class CachedUserMixin:
+    def get_user(self, user_id):
+        user = load_user(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+
+class CachedModelBackend(CachedUserMixin, ModelBackend):
+    pass
+
+
+class CachedAuthenticationBackend(CachedUserMixin, AuthenticationBackend):
+    """The allauth backend, to log in by email"""
@@ -0,0 +1,50 @@
+"""
+Cache of the users of the sessions, along with their teacher and student
+profiles.
+
+``load_user`` fetches a user and both profiles in one query and keeps them in
+``settings.USER_CACHE_ALIAS``, so an authenticated request finds its user, and
+``request.user.teacher``, without touching the database. The receivers in
+``users.signals`` drop the entry whenever the user or one of its profiles is
+saved or deleted, right away and once more on commit, so a request which read
+the database before the commit can't leave the old row behind for longer than
+that. The alias has a short timeout to bound what bulk writes, which send no
+signals, can leave stale.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+
+USER_KEY = "users:user:%s"
+PROFILES = ("teacher", "student")
+
+
+def get_cache():
+    return caches[settings.USER_CACHE_ALIAS]
+
+
+def load_user(user_id):
+    """Returns the user with its profiles, from the cache or in one query, or None"""
+
+    cache = get_cache()
+    key = USER_KEY % user_id
+    user = cache.get(key)
+
+    if user is None:
+        UserModel = get_user_model()
+        user = UserModel._default_manager.select_related(*PROFILES).filter(pk=user_id).first()
+        if user is not None:
+            cache.set(key, user)
+
+    return user
+
+
+def invalidate_users(user_ids):
+    keys = [USER_KEY % user_id for user_id in user_ids if user_id is not None]
+    if not keys:
+        return
+
+    get_cache().delete_many(keys)
+    transaction.on_commit(lambda: get_cache().delete_many(keys))
@@ -8,7 +8,8 @@ class UserFactory(factory.django.DjangoModelFactory):
     email = factory.LazyAttribute(
         lambda obj: "%s@example.com" % (obj.first_name.lower() + obj.last_name.lower())
     )
-    username = factory.Faker("user_name")
+    # Random user names collide in the larger batches of the tests
+    username = factory.Sequence(lambda n: "user%s" % n)
 
     class Meta:
         model = get_user_model()
@@ -0,0 +1,22 @@
+"""Signal receivers of the users app. Connected in UsersConfig.ready()"""
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.cache import invalidate_users
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    invalidate_users([instance.pk])
+
+
+@receiver(post_save, sender="classroom.Teacher")
+@receiver(post_delete, sender="classroom.Teacher")
+@receiver(post_save, sender="classroom.Student")
+@receiver(post_delete, sender="classroom.Student")
+def profile_changed(sender, instance, **kwargs):
+    # The profile is cached along with its user
+    invalidate_users([instance.user_id])
@@ -0,0 +1,83 @@
+from django.contrib.auth import BACKEND_SESSION_KEY, get_user
+from django.test import RequestFactory, TestCase
+
+from classroom.factories import TeacherFactory
+from users.cache import load_user
+
+
+class CachedUserTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = TeacherFactory()
+        cls.user = cls.teacher.user
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def get_request_user(self):
+        request = RequestFactory().get("/")
+        request.session = self.client.session
+        return get_user(request)
+
+    def test_one_query_then_cached(self):
+        with self.assertNumQueries(1):
+            user = self.get_request_user()
+            self.assertEqual(user.teacher, self.teacher)
+
+        with self.assertNumQueries(0):
+            user = self.get_request_user()
+            self.assertEqual(user.teacher, self.teacher)
+
+    def test_no_profile(self):
+        load_user(self.user.pk)
+        self.teacher.delete()
+
+        with self.assertNumQueries(1):
+            user = self.get_request_user()
+            self.assertFalse(hasattr(user, "teacher"))
+            self.assertFalse(hasattr(user, "student"))
+
+    def test_invalidated_on_save(self):
+        self.get_request_user()
+
+        self.user.first_name = "Renamed"
+        self.user.save()
+        self.assertEqual(self.get_request_user().first_name, "Renamed")
+
+        self.teacher.first_name = "Renamed"
+        self.teacher.save()
+        self.assertEqual(self.get_request_user().teacher.first_name, "Renamed")
+
+    def test_password_changed(self):
+        self.get_request_user()
+
+        self.user.set_password("changed")
+        self.user.save()
+        self.assertFalse(self.get_request_user().is_authenticated)
+
+    def test_inactive(self):
+        self.get_request_user()
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertFalse(self.get_request_user().is_authenticated)
+
+    def test_sessions_of_the_previous_backends(self):
+        for backend in (
+            "django.contrib.auth.backends.ModelBackend",
+            "allauth.account.auth_backends.AuthenticationBackend",
+        ):
+            session = self.client.session
+            session[BACKEND_SESSION_KEY] = backend
+            session.save()
+
+            self.assertEqual(self.get_request_user(), self.user)
+
+    def test_logs_in_with_the_cached_backend(self):
+        self.user.set_password("secret")
+        self.user.save()
+
+        self.assertTrue(self.client.login(username=self.user.username, password="secret"))
+        self.assertEqual(
+            self.client.session[BACKEND_SESSION_KEY], "users.backends.CachedModelBackend"
+        )